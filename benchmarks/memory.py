@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""
+Memory benchmark for the compilation of an xls file.
+
+Runs Rxncon and Bngl (get_bngl with translation and missing reactions)
+and reports, while all objects are still alive:
+- peak RSS of the process,
+- number of instances of Molecule, State, Component, Contingency
+  and Reaction (with subclasses) and their size
+  (object + __dict__ when the class has one).
+
+Usage:
+python benchmarks/memory.py [xls_file]
+"""
+
+import argparse
+import gc
+import resource
+import sys
+from rxnconcompiler.compiler import Compiler
+from rxnconcompiler.molecule.molecule import Molecule
+from rxnconcompiler.molecule.state import State
+from rxnconcompiler.molecule.component import Component
+from rxnconcompiler.contingency.contingency import Contingency
+from rxnconcompiler.reaction.reaction import Reaction
+
+CLASSES = [Molecule, State, Component, Contingency, Reaction]
+DEFAULT_FILE = 'tests/test_data/xls_files/Tiger_et_al_TableS1.xls'
+
+
+def get_size(obj):
+    """Returns size of object with its __dict__."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def count_instances():
+    """Returns {class name: (instances, bytes)} for CLASSES."""
+    result = dict((cls.__name__, [0, 0]) for cls in CLASSES)
+    for obj in gc.get_objects():
+        for cls in CLASSES:
+            if isinstance(obj, cls):
+                result[cls.__name__][0] += 1
+                result[cls.__name__][1] += get_size(obj)
+                break
+    return result
+
+def main():
+    """Compiles given file and prints memory report."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('xls_file', nargs='?', default=DEFAULT_FILE)
+    args = parser.parse_args()
+
+    bngl = Compiler(args.xls_file).get_bngl(True, True)
+    gc.collect()
+    counts = count_instances()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print 'file: %s' % args.xls_file
+    print '%-12s %10s %12s %10s' % ('class', 'instances', 'bytes', 'per inst.')
+    total = 0
+    for cls in CLASSES:
+        number, size = counts[cls.__name__]
+        total += size
+        print '%-12s %10i %12i %10.1f' % (cls.__name__, number, size, \
+            float(size) / max(number, 1))
+    print '%-12s %10s %12i' % ('total', '', total)
+    print 'peak RSS: %i kB' % peak
+    return bngl
+
+if __name__ == '__main__':
+    main()
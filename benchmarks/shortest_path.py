@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+"""
+Benchmark for BiologicalComplex.get_shortest_path.
+
+Compares the breadth-first get_shortest_path with the previous
+implementation (all paths from get_paths sorted by length and str)
+on deep and branched complexes:
+- tree:     binary tree of distinct molecules (depth given),
+- scaffold: chain of levels, each with several molecules of the same name
+            (get_paths follows exponentially many alternatives).
+
+Usage:
+python benchmarks/shortest_path.py [--depth 4 6 8] [--repeat 3]
+"""
+
+import argparse
+import time
+from rxnconcompiler.biological_complex.biological_complex import BiologicalComplex
+from rxnconcompiler.molecule.molecule import Molecule
+from rxnconcompiler.molecule.state import get_state
+
+
+def all_paths_shortest(comp, mol1, mol2):
+    """Previous implementation of get_shortest_path."""
+    all_paths = comp.get_paths(mol1, mol2)
+    if not all_paths:
+        return []
+    length = len(all_paths[0])
+    result = [path for path in all_paths if len(path) == length]
+    result = sorted(result, key=lambda x: str(x))
+    return result[0]
+
+def tree_complex(depth):
+    """Binary tree of molecules T1, T2, ... (T1 is the root)."""
+    comp = BiologicalComplex()
+    for parent in range(1, 2 ** depth):
+        for child in [2 * parent, 2 * parent + 1]:
+            comp.add_state(get_state('T%i--T%i' % (parent, child)))
+    return comp
+
+def scaffold_complex(depth, copies=3):
+    """
+    Chain of scaffold levels L1--L2--...: every level has 
+    copies molecules with the same name (e.g. oligomers on a scaffold).
+    Partners are found by name, so get_paths follows 
+    copies ** depth alternative paths.
+    """
+    comp = BiologicalComplex()
+    levels = []
+    for index in range(1, depth + 1):
+        level = [Molecule('L%i' % index) for _ in range(copies)]
+        comp.molecules.extend(level)
+        levels.append(level)
+    for index in range(1, depth):
+        state = get_state('L%i--L%i' % (index, index + 1))
+        for mol in levels[index - 1] + levels[index]:
+            mol.add_bond(state)
+    return comp
+
+def measure(function, comp, pairs, repeat):
+    """Returns the best time of repeat runs and results."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        result = [str(function(comp, mol1, mol2)) for mol1, mol2 in pairs]
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def main():
+    """Runs benchmark and prints table."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, nargs='+', default=[4, 6, 8])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print '%-10s %6s %6s %12s %12s %8s' % ('complex', 'depth', 'mols', 'all_paths[s]', 'bfs[s]', 'speedup')
+    for kind, build in [('tree', tree_complex), ('scaffold', scaffold_complex)]:
+        for depth in args.depth:
+            comp = build(depth)
+            root = comp.molecules[0]
+            pairs = [(root, mol) for mol in comp.molecules]
+            old_time, old_result = measure(all_paths_shortest, comp, pairs, args.repeat)
+            new_time, new_result = measure(BiologicalComplex.get_shortest_path, comp, pairs, args.repeat)
+            if old_result != new_result:
+                raise AssertionError('Different paths for %s %i' % (kind, depth))
+            print '%-10s %6i %6i %12.4f %12.4f %8.1f' % (kind, depth, len(comp), \
+                old_time, new_time, old_time / max(new_time, 1e-9))
+
+if __name__ == '__main__':
+    main()
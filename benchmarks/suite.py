@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+"""
+Benchmark suite for the whole compilation (Compiler.translate
+with translation and missing reactions) with regression baselines.
+
+Cases:
+- xls:<name>   - every xls file in tests/test_data/xls_files,
+- rules:<name> - all rxncon strings from
+                 tests/test_data/bngl_rules/rules_<name>_data.py
+                 (each compiled separately, times are summed).
+
+Each case runs in a fresh process (so the peak RSS is its own)
+repeat times, the best time of each stage is kept.
+Stage times are spans of PROFILER (see rxnconcompiler.util.profiling),
+total is the time of the whole case.
+
+Baseline (JSON, {case: {'total': s, 'stages': {stage: s}, 'peak_rss_kb': kB}}):
+--save writes the results as the new baseline,
+otherwise results are compared with the baseline and the script
+exits with 1 when total, a stage or the peak RSS of any case is more
+than threshold (fraction) above the baseline.
+Stages shorter than min-time in the baseline are not compared (noise).
+Baselines depend on the machine, create one before changing the code.
+
+Usage:
+python benchmarks/suite.py [--cases xls:Tiger_et_al_TableS1 rules:basic]
+                           [--repeat 3] [--baseline benchmarks/baseline.json]
+                           [--save] [--threshold 0.2] [--min-time 0.01]
+                           [--output results.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from rxnconcompiler.compiler import Compiler
+from rxnconcompiler.util.profiling import PROFILER
+
+XLS_PATH = os.path.join(ROOT, 'tests', 'test_data', 'xls_files')
+RULES_DATA = ['basic', 'mapk', 'input', 'geometry', 'difficult', 'pheromon']
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+
+def get_cases():
+    """Returns list of (case name, list of inputs)."""
+    cases = []
+    for file_name in sorted(os.listdir(XLS_PATH)):
+        if file_name.endswith('.xls'):
+            cases.append(('xls:%s' % file_name[:-4], [os.path.join(XLS_PATH, file_name)]))
+    for name in RULES_DATA:
+        module = __import__('test_data.bngl_rules.rules_%s_data' % name, fromlist=['DATA'])
+        inputs = set()
+        for data in module.DATA:
+            inputs.update(data.keys())
+        cases.append(('rules:%s' % name, sorted(inputs)))
+    return cases
+
+def run_case(args):
+    """
+    Compiles all inputs repeat times.
+    Returns {'total': s, 'stages': {stage: s}, 'peak_rss_kb': kB}
+    with the best times.
+    """
+    inputs, repeat = args
+    result = {'total': None, 'stages': {}}
+    for _ in range(repeat):
+        PROFILER.enable()
+        start = time.time()
+        for inp in inputs:
+            Compiler(inp).translate(True, True)
+        total = time.time() - start
+        PROFILER.disable()
+        if result['total'] is None or total < result['total']:
+            result['total'] = total
+        for name in PROFILER.span_names:
+            seconds = PROFILER.spans[name][1]
+            if name not in result['stages'] or seconds < result['stages'][name]:
+                result['stages'][name] = seconds
+    result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+def run_cases(cases, repeat):
+    """Runs every case in a new process. Returns {case name: result}."""
+    results = {}
+    for name, inputs in cases:
+        pool = multiprocessing.Pool(1, maxtasksperchild=1)
+        try:
+            results[name] = pool.apply(run_case, ((inputs, repeat),))
+        finally:
+            pool.close()
+            pool.join()
+    return results
+
+def compare(results, baseline, threshold, min_time):
+    """
+    Returns list of (case, measure, baseline value, new value)
+    for measures (total, stage, peak_rss_kb) more than threshold above the baseline.
+    Cases and stages not present in the baseline are skipped.
+    """
+    regressions = []
+    for case in sorted(results):
+        if case not in baseline:
+            continue
+        old, new = baseline[case], results[case]
+        measures = [('total', old['total'], new['total'])]
+        for stage in sorted(new['stages']):
+            if stage in old['stages'] and old['stages'][stage] >= min_time:
+                measures.append((stage, old['stages'][stage], new['stages'][stage]))
+        if 'peak_rss_kb' in old:
+            measures.append(('peak_rss_kb', old['peak_rss_kb'], new['peak_rss_kb']))
+        for measure, old_value, new_value in measures:
+            if new_value > old_value * (1 + threshold):
+                regressions.append((case, measure, old_value, new_value))
+    return regressions
+
+def print_results(results, baseline):
+    """Prints table with results (and baseline values when known)."""
+    print '%-38s %-32s %12s %12s %8s' % ('case', 'measure', 'value', 'baseline', 'ratio')
+    for case in sorted(results):
+        new = results[case]
+        old = baseline.get(case, {'stages': {}})
+        rows = [('total', new['total'], old.get('total'))]
+        rows += [(stage, new['stages'][stage], old['stages'].get(stage)) \
+            for stage in sorted(new['stages'])]
+        rows.append(('peak_rss_kb', new['peak_rss_kb'], old.get('peak_rss_kb')))
+        for measure, value, old_value in rows:
+            if old_value:
+                print '%-38s %-32s %12.4f %12.4f %8.2f' % (case, measure, value, \
+                    old_value, float(value) / old_value)
+            else:
+                print '%-38s %-32s %12.4f %12s %8s' % (case, measure, value, '-', '-')
+
+def main():
+    """Runs the suite, saves or compares baseline."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', nargs='+', default=None, \
+        help='Case names (default: all), e.g. xls:Tiger_et_al_TableS1 rules:basic.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', \
+        help='Save results as the baseline (cases not run are kept).')
+    parser.add_argument('--threshold', type=float, default=0.2, \
+        help='Allowed increase as fraction of the baseline (default: 0.2).')
+    parser.add_argument('--min-time', type=float, default=0.01, \
+        help='Stages shorter in the baseline are not compared (default: 0.01 s).')
+    parser.add_argument('--output', default=None, help='Write results to JSON file.')
+    args = parser.parse_args()
+
+    cases = get_cases()
+    if args.cases:
+        known = dict(cases)
+        unknown = [name for name in args.cases if name not in known]
+        if unknown:
+            parser.error('unknown cases: %s (known: %s)' % (', '.join(unknown), \
+                ', '.join([name for name, inputs in cases])))
+        cases = [(name, known[name]) for name in args.cases]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        baseline = json.load(open(args.baseline))
+    results = run_cases(cases, args.repeat)
+    print_results(results, baseline)
+    if args.output:
+        json.dump(results, open(args.output, 'w'), indent=4, sort_keys=True)
+
+    if args.save:
+        baseline.update(results)
+        json.dump(baseline, open(args.baseline, 'w'), indent=4, sort_keys=True)
+        print 'baseline saved: %s' % args.baseline
+        return 0
+    if not baseline:
+        print 'no baseline: %s (use --save)' % args.baseline
+        return 0
+    regressions = compare(results, baseline, args.threshold, args.min_time)
+    for case, measure, old_value, new_value in regressions:
+        print 'REGRESSION %s %s: %.4f ---> %.4f' % (case, measure, old_value, new_value)
+    if regressions:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+
+"""
+Synthetic rxncon models (quick text format, see parse_text)
+for scaling studies and a scaling report.
+
+generate_model builds a model with:
+- molecules      - number of molecules M0, M1 ...,
+- reactions      - number of reactions (ppi and P+, half each),
+- contingencies  - contingencies per reaction
+                   (states of the reactants produced by other reactions),
+- k_fraction     - fraction of K+/K- among them (the rest is ! / x),
+- bool_fraction  - fraction of reactions with a boolean contingency,
+- bool_depth     - nesting depth of booleans (1: single AND/OR),
+- or_width       - number of OR branches on each level,
+- scaffold       - number of partners bound to one Scaffold molecule,
+                   reactions of the partners require the whole complex
+                   (0: no scaffold).
+The model is the same for the same arguments and seed.
+
+The report compiles models (Compiler.translate) changing one knob
+at a time (other knobs keep default values) and prints compile time
+and number of rules. --json writes the results, --plot writes
+one figure (a row with time and rules for each knob)
+when matplotlib is installed.
+
+Usage:
+python benchmarks/synthetic.py --print [--reactions 100 ...]
+python benchmarks/synthetic.py [--knobs reactions or_width] [--seed 1]
+                               [--json scaling.json] [--plot scaling.png]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rxnconcompiler.compiler import Compiler
+from rxnconcompiler.util.profiling import PROFILER
+
+DEFAULTS = {'molecules': 20, 'reactions': 40, 'contingencies': 1, 'k_fraction': 0.5, \
+    'bool_fraction': 0.2, 'bool_depth': 1, 'or_width': 2, 'scaffold': 0}
+
+# values used in the report, one knob changes, the others have DEFAULTS.
+SWEEP = {'molecules': [10, 20, 40, 80], 'reactions': [20, 40, 80, 160], \
+    'contingencies': [0, 1, 2, 3], 'k_fraction': [0.0, 0.25, 0.5, 1.0], \
+    'bool_fraction': [0.0, 0.2, 0.5, 1.0], 'bool_depth': [1, 2, 3], \
+    'or_width': [1, 2, 3, 4], 'scaffold': [0, 2, 4, 6]}
+
+
+def get_reactions(rand, molecules, reactions):
+    """
+    Returns list of (reaction string, left, right, product state string).
+    Half ppi (different pairs), half P+ (kinase != target).
+    """
+    names = ['M%i' % index for index in range(molecules)]
+    pairs = [(first, second) for index, first in enumerate(names) \
+        for second in names[index + 1:]]
+    rand.shuffle(pairs)
+    ppi = pairs[:reactions - reactions / 2]
+    result = []
+    for left, right in ppi:
+        result.append(('%s_ppi_%s' % (left, right), left, right, '%s--%s' % (left, right)))
+    for _ in range(reactions / 2):
+        kinase, target = rand.sample(names, 2)
+        result.append(('%s_P+_%s' % (kinase, target), kinase, target, '%s-{P}' % target))
+    return result
+
+def get_states(reactions):
+    """Returns {molecule: [states of the molecule produced by reactions]}."""
+    states = {}
+    for name, left, right, state in reactions:
+        molecules = [right] if state.endswith('-{P}') else [left, right]
+        for mol in molecules:
+            if state not in states.setdefault(mol, []):
+                states[mol].append(state)
+    return states
+
+def get_boolean(rand, name, states, depth, or_width, lines):
+    """
+    Adds lines of boolean <name> (nested to depth)
+    with states of the reactant.
+    OR of or_width branches, each branch AND of a state
+    and the boolean one level deeper (two states on the last level).
+    """
+    for index in range(or_width):
+        branch = '%s.%i' % (name, index)
+        lines.append('<%s>; OR <%s>' % (name, branch))
+        if depth > 1:
+            lines.append('<%s>; AND %s' % (branch, rand.choice(states)))
+            lines.append('<%s>; AND <%s.x>' % (branch, branch))
+            get_boolean(rand, '%s.x' % branch, states, depth - 1, or_width, lines)
+        else:
+            for state in rand.sample(states, min(2, len(states))):
+                lines.append('<%s>; AND %s' % (branch, state))
+
+def generate_model(seed=0, molecules=20, reactions=40, contingencies=1, k_fraction=0.5, \
+    bool_fraction=0.2, bool_depth=1, or_width=2, scaffold=0):
+    """Returns rxncon quick text of a synthetic model."""
+    rand = random.Random(seed)
+    molecules = max(molecules, 2)
+    reactions = min(reactions, molecules * (molecules - 1))
+    all_reactions = get_reactions(rand, molecules, reactions)
+    partners = ['M%i' % index for index in range(min(scaffold, molecules))]
+    for partner in partners:
+        all_reactions.append(('Scaffold_ppi_%s' % partner, 'Scaffold', partner, \
+            'Scaffold--%s' % partner))
+    states = get_states(all_reactions)
+
+    lines = [reaction[0] for reaction in all_reactions]
+    for index, (name, left, right, product) in enumerate(all_reactions):
+        if left == 'Scaffold':
+            continue
+        if left in partners and right not in partners:
+            lines.append('%s; ! <Scaffold%i>' % (name, index))
+            for partner in partners:
+                lines.append('<Scaffold%i>; AND Scaffold--%s' % (index, partner))
+        elif rand.random() < bool_fraction:
+            own = [state for state in states.get(left, []) \
+                if state != product and 'Scaffold' not in state]
+            if own:
+                lines.append('%s; ! <B%i>' % (name, index))
+                get_boolean(rand, 'B%i' % index, own, bool_depth, or_width, lines)
+        candidates = [state for state in states.get(left, []) + states.get(right, []) \
+            if state != product and 'Scaffold' not in state]
+        candidates = sorted(set(candidates))
+        for state in rand.sample(candidates, min(contingencies, len(candidates))):
+            if rand.random() < k_fraction:
+                ctype = rand.choice(['K+', 'K-'])
+            else:
+                ctype = rand.choice(['!', 'x'])
+            lines.append('%s; %s %s' % (name, ctype, state))
+    return '\n'.join(lines)
+
+def measure(text):
+    """Returns (compile time, number of rules) for the model."""
+    PROFILER.enable()
+    start = time.time()
+    Compiler(text).translate()
+    elapsed = time.time() - start
+    PROFILER.disable()
+    return elapsed, PROFILER.counters.get('rules', 0)
+
+def run_report(knobs, seed):
+    """Returns {knob: [(value, lines, seconds, rules)]}."""
+    result = {}
+    for knob in knobs:
+        result[knob] = []
+        for value in SWEEP[knob]:
+            kwargs = dict(DEFAULTS)
+            kwargs[knob] = value
+            text = generate_model(seed, **kwargs)
+            seconds, rules = measure(text)
+            result[knob].append((value, len(text.split('\n')), seconds, rules))
+    return result
+
+def plot_report(result, file_name):
+    """Writes plots of time and rules for each knob (needs matplotlib)."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print 'matplotlib is not installed, no plot.'
+        return
+    knobs = sorted(result)
+    figure, axes = plt.subplots(len(knobs), 2, figsize=(10, 3 * len(knobs)), squeeze=False)
+    for row, knob in enumerate(knobs):
+        values = [item[0] for item in result[knob]]
+        axes[row][0].plot(values, [item[2] for item in result[knob]], 'o-')
+        axes[row][0].set_xlabel(knob)
+        axes[row][0].set_ylabel('compile time [s]')
+        axes[row][1].plot(values, [item[3] for item in result[knob]], 'o-')
+        axes[row][1].set_xlabel(knob)
+        axes[row][1].set_ylabel('rules')
+    figure.tight_layout()
+    figure.savefig(file_name)
+
+def main():
+    """Prints a model or the scaling report."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--print', dest='print_model', action='store_true', \
+        help='Print the model for given knobs instead of the report.')
+    for knob in sorted(DEFAULTS):
+        parser.add_argument('--%s' % knob, type=type(DEFAULTS[knob]), default=DEFAULTS[knob])
+    parser.add_argument('--knobs', nargs='+', default=sorted(SWEEP), choices=sorted(SWEEP), \
+        help='Knobs changed in the report (default: all).')
+    parser.add_argument('--json', default=None, help='Write report to JSON file.')
+    parser.add_argument('--plot', default=None, help='Write plots to file (matplotlib).')
+    args = parser.parse_args()
+
+    if args.print_model:
+        kwargs = dict((knob, getattr(args, knob)) for knob in DEFAULTS)
+        print generate_model(args.seed, **kwargs)
+        return
+    result = run_report(args.knobs, args.seed)
+    print '%-14s %8s %8s %10s %8s' % ('knob', 'value', 'lines', 'time[s]', 'rules')
+    for knob in args.knobs:
+        for value, lines, seconds, rules in result[knob]:
+            print '%-14s %8s %8i %10.4f %8i' % (knob, value, lines, seconds, rules)
+    if args.json:
+        json.dump(result, open(args.json, 'w'), indent=4, sort_keys=True)
+    if args.plot:
+        plot_report(result, args.plot)
+
+if __name__ == '__main__':
+    main()
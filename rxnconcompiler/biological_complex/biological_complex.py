@@ -4,6 +4,9 @@
 Module biological_complex.py
 
 Classes:
+MoleculeList: list of molecules in a complex 
+              with index name --> molecules.
+
 BiologicalComplex: Contans Molecule[s].
                    Molecules have particular states.
                    Based on Molecules composition and their states enables to obtain 
@@ -19,18 +22,113 @@ ComplexPool: Stors all (positive) complexes in the system.
 import copy
 from rxnconcompiler.contingency.contingency import Contingency
 from rxnconcompiler.molecule.molecule import Molecule
+from rxnconcompiler.util.profiling import PROFILER
 
 #KR: please complete docstrings
 
-class BiologicalComplex:
+class MoleculeList(list):
+    """
+    List of molecules (BiologicalComplex.molecules).
+    Keeps an index: molecule name --> molecules (in the list order),
+    updated on every change of the list.
+    Name of a molecule inside a complex should be changed 
+    with BiologicalComplex.rename_molecule (or reindex called).
+    """
+    def __init__(self, mols=()):
+        list.__init__(self, mols)
+        self.reindex()
+
+    def __reduce__(self):
+        """Copy and pickle as a list (index is rebuilt)."""
+        return (self.__class__, (list(self),))
+
+    def reindex(self):
+        """Builds the index from scratch."""
+        self.index = {}
+        for mol in self:
+            self.index.setdefault(mol.name, []).append(mol)
+
+    def get_by_name(self, name):
+        """Returns molecules with given name (in the list order)."""
+        return [mol for mol in self.index.get(name, []) if mol.name == name]
+
+    def __contains__(self, mol):
+        """Molecules are equal only when they have the same name."""
+        for item in self.index.get(mol.name, []):
+            if item is mol or item == mol:
+                return True
+        return False
+
+    def append(self, mol):
+        list.append(self, mol)
+        self.index.setdefault(mol.name, []).append(mol)
+
+    def extend(self, mols):
+        for mol in mols:
+            self.append(mol)
+
+    def __iadd__(self, mols):
+        self.extend(mols)
+        return self
+
+    def insert(self, position, mol):
+        list.insert(self, position, mol)
+        self.reindex()
+
+    def remove(self, mol):
+        list.remove(self, mol)
+        self.reindex()
+
+    def pop(self, *args):
+        mol = list.pop(self, *args)
+        self.reindex()
+        return mol
+
+    def __setitem__(self, key, value):
+        list.__setitem__(self, key, value)
+        self.reindex()
+
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self.reindex()
+
+    def __setslice__(self, i, j, mols):
+        list.__setslice__(self, i, j, mols)
+        self.reindex()
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self.reindex()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self.reindex()
+
+    def reverse(self):
+        list.reverse(self)
+        self.reindex()
+
+
+class BiologicalComplex(object):
     """"""
     def __init__(self):
-        self.molecules = []
+        self.molecules = MoleculeList()
         self.side = None #: indicate where complex appears: L, R, LR
         self.input_conditions = [] # defines that e.g. complex exists only when Start, Osmostress ...
         self.is_positive = True
         self.is_modifier = False # indicates that complex does not change during the reaction
 
+    def _get_molecules(self):
+        return self._molecules
+
+    def _set_molecules(self, mols):
+        if not isinstance(mols, MoleculeList):
+            mols = MoleculeList(mols)
+        self._molecules = mols
+
+    molecules = property(_get_molecules, _set_molecules, \
+        doc="MoleculeList (any list assigned is converted).")
+
     def __repr__(self):
         mols = ', '.join(sorted([mol.name for mol in self.molecules]))
         return 'Complex: ' + mols
@@ -80,6 +178,9 @@ class BiologicalComplex:
         adjacent to the molecule with the given name 
         (and optionally id).
         """
+        # bonds are kept in Molecule.binding_partners 
+        # and can be changed outside the complex, 
+        # therefore partners are not stored (see partners_getter).
         result = []
         mol = self.get_molecules(mol_name, mid)[0]
         component = mol.get_component()
@@ -88,6 +189,18 @@ class BiologicalComplex:
             result += self.get_molecules(partner.name, partner.cid)
         return result
 
+    def partners_getter(self):
+        """
+        Returns get_partners function that remembers results.
+        Used within a single graph query (complex does not change then).
+        """
+        known = {}
+        def get_partners(mol_name, mid=None):
+            if (mol_name, mid) not in known:
+                known[(mol_name, mid)] = self.get_partners(mol_name, mid)
+            return known[(mol_name, mid)]
+        return get_partners
+
     def get_branches(self, mol_name, mid=None):
         """
         Returns a list of all possible paths 
@@ -95,14 +208,15 @@ class BiologicalComplex:
         in a tree rooted at the given molecule.
         (paths represented as lists of molecules)
         """
+        get_partners = self.partners_getter()
         result = []
         stack = []
-        for mol in self.get_partners(mol_name, mid):
+        for mol in get_partners(mol_name, mid):
             stack.append([mol])
 
         while stack:
             branch = stack.pop()
-            mols = self.get_partners(branch[-1].name, branch[-1].mid)
+            mols = get_partners(branch[-1].name, branch[-1].mid)
             if len(mols) == 1: # one node - the one we came from
                 result.append(branch)
             else:
@@ -118,15 +232,16 @@ class BiologicalComplex:
         Returns a list of molecules for each 
         subgraph originating from the given molecule.
         """
+        get_partners = self.partners_getter()
         #KR: is it used?
         result = {}
         stack = []
-        for mol in self.get_partners(mol_name, mid):
+        for mol in get_partners(mol_name, mid):
             result[(mol.name, mol.mid)] = [mol]
             stack.append([mol])
         while stack:
             branch = stack.pop()          
-            mols = self.get_partners(branch[-1].name, branch[-1].mid)
+            mols = get_partners(branch[-1].name, branch[-1].mid)
             if len(mols) > 1:
                 for mol in mols:
                     if len(branch) == 1 and mol.name != mol_name:
@@ -145,6 +260,7 @@ class BiologicalComplex:
         molecules' mid must match as well.
         The paths are returned sorted by length (ascending).
         """
+        get_partners = self.partners_getter()
         #KR: eventually, a method that returns a single path
         #    between two exact nodes might be useful.
         if mol1 not in self.molecules or mol2 not in self.molecules:
@@ -152,14 +268,14 @@ class BiologicalComplex:
 
         result = []
         stack = []
-        for mol in self.get_partners(mol1.name, mol1.mid):
+        for mol in get_partners(mol1.name, mol1.mid):
             if mol == mol2: # matches mid here, but below not
                 result.append([mol])
             else:
                 stack.append([mol])
         while stack:
             branch = stack.pop()
-            mols = self.get_partners(branch[-1].name, branch[-1].mid)
+            mols = get_partners(branch[-1].name, branch[-1].mid)
             if len(mols) == 1:
                 pass
                 #KR: if len(mols) != 1: 
@@ -185,15 +301,82 @@ class BiologicalComplex:
         """
         Returns the shortest path between two molecules
         that comes first alphabetically.
+
+        Same result as the first path from get_paths 
+        (sorted by length and then by str) but found breadth-first, 
+        without building all paths:
+        - layers of (molecule, name of the previous molecule) are built 
+          until a layer reaches mol2 (same moves as in get_paths),
+        - layers are filtered to these that lead to mol2 in the remaining steps,
+        - path is build step by step taking the alphabetically first name.
         """
-        all_paths = self.get_paths(mol1, mol2)
-        if not all_paths:
+        if mol1 not in self.molecules or mol2 not in self.molecules:
             return []
-        length = len(all_paths[0])
-        result = [path for path in all_paths if len(path) == length]
-        result = sorted(result, key=lambda x: str(x))
-        return result[0]
-        
+        get_partners = self.partners_getter()
+
+        def next_steps(node, previous):
+            """Returns (molecule, is_mol2) for moves allowed in get_paths."""
+            mols = get_partners(node.name, node.mid)
+            if previous is not None:
+                if len(mols) == 1:
+                    return []
+                mols = [mol for mol in mols if mol.name != previous]
+            return [(mol, mol == mol2) for mol in mols]
+
+        # layers[i]: {(name, mid, previous name): molecule} reached in i steps.
+        start = (mol1.name, mol1.mid, None)
+        layers = [{start: mol1}]
+        seen = set()
+        while True:
+            layer = {}
+            found = False
+            for key, node in layers[-1].items():
+                for mol, is_end in next_steps(node, key[2]):
+                    if is_end:
+                        found = True
+                    else:
+                        layer.setdefault((mol.name, mol.mid, node.name), mol)
+            if found:
+                break
+            signature = frozenset(layer.keys())
+            if not layer or signature in seen:
+                return []
+            seen.add(signature)
+            layers.append(layer)
+
+        # keep only nodes from which mol2 is reached in the remaining steps.
+        good = [None] * len(layers)
+        good[-1] = set([key for key, node in layers[-1].items() \
+            if [1 for mol, is_end in next_steps(node, key[2]) if is_end]])
+        for index in range(len(layers) - 2, 0, -1):
+            good[index] = set()
+            for key, node in layers[index].items():
+                for mol, is_end in next_steps(node, key[2]):
+                    if not is_end and (mol.name, mol.mid, node.name) in good[index + 1]:
+                        good[index].add(key)
+                        break
+
+        # alphabetically first path ('A' < 'AB' as in str(path)).
+        path = [mol1]
+        frontier = [(start, mol1)]
+        for index in range(1, len(layers) + 1):
+            steps = []
+            for key, node in frontier:
+                for mol, is_end in next_steps(node, key[2]):
+                    if index == len(layers):
+                        if is_end:
+                            steps.append((None, mol))
+                    elif not is_end:
+                        new_key = (mol.name, mol.mid, node.name)
+                        if new_key in good[index]:
+                            steps.append((new_key, mol))
+            name = min([mol.name for new_key, mol in steps], key=lambda x: x + ',')
+            frontier = []
+            for step in steps:
+                if step[1].name == name and step not in frontier:
+                    frontier.append(step)
+            path.append(frontier[0][1])
+        return path
 
     def clone(self):
         """
@@ -202,16 +385,71 @@ class BiologicalComplex:
         @rtype:  BiologicalComplex
         @return: identical complex
         """
+        if PROFILER.enabled:
+            PROFILER.count('clones.complex')
         new = BiologicalComplex()
         temp = []
         for mol in self.molecules:
             temp.append(mol.clone())
         new.molecules = temp
         #new.molecules = copy.deepcopy(self.molecules)
-        new.side = copy.deepcopy(self.side)
-        new.input_condition = copy.deepcopy(self.input_conditions)
+        new.side = self.side
+        new.input_condition = copy.copy(self.input_conditions)
         return new
 
+    def exact_clone(self, memo=None):
+        """
+        Creates a new instance of BiologicalComplex 
+        with all attributes of the origin 
+        (clone sets is_positive, input_conditions ... to default).
+        Molecules are cloned with the same _id.
+
+        memo - dict {id(molecule): clone} shared by complexes 
+               cloned together (e.g. all reaction.substrat_complexes), 
+               so molecules shared by the complexes stay shared in the clones.
+        """
+        if PROFILER.enabled:
+            PROFILER.count('clones.complex')
+        if memo is None:
+            memo = {}
+        new = copy.copy(self)
+        temp = []
+        for mol in self.molecules:
+            if id(mol) not in memo:
+                memo[id(mol)] = mol.clone(same_id=True)
+            temp.append(memo[id(mol)])
+        new.molecules = temp
+        new.input_conditions = copy.copy(self.input_conditions)
+        return new
+
+    def get_canonical_key(self):
+        """
+        Returns a key that describes everything used to create 
+        BNGL string of the complex (BnglTranslator.get_complex_str):
+        side and molecules in BNGL order (sorted by name) with mid and states
+        (state string, sid, loc, not_modifier). 
+        Bond numbering (get_bonds) depends only on this order and the states,
+        so complexes with the same key have the same BNGL string.
+        Key is a flat tuple (cheap to hash).
+        """
+        result = [self.side]
+        append = result.append
+        for mol in sorted(self.molecules, key=lambda mol: mol.name):
+            append(mol.name)
+            append(mol.mid)
+            if mol.localisation:
+                append(str(mol.localisation))
+                append(mol.localisation.loc)
+                append(mol.localisation.not_modifier)
+            for tag, states in [('m', mol.modifications), ('s', mol.modification_sites), \
+                ('p', mol.binding_partners), ('b', mol.binding_sites)]:
+                append(tag)
+                for state in states:
+                    append(str(state))
+                    append(state.sid)
+                    append(state.not_modifier)
+        return tuple(result)
+
     def get_bonds(self):
         """
         Returns a dictionare with bonds prepared 
@@ -230,18 +468,30 @@ class BiologicalComplex:
                 mol_state.append((mol, state))
         
         # get pairs molecule-state & molecule-state
+        # ms joins the first (oldest) unpaired pair with the same state.
+        # Unpaired pairs are kept in buckets: states can be equal
+        # only when they have the same component names (State.__eq__).
+        # For few bonds a single bucket is faster.
         pairs = []
+        unpaired = {} # {component names: [pairs with single molecule-state]}
+        few = len(mol_state) <= 16
+        key = None
         while mol_state:
             ms = mol_state.pop()
-            done = False
-            for p in pairs:
-                if len(p) == 1:
-                   if p[0][1] == ms[1]:  # state is the same
-                        if not done and (ms[1].homodimer or p[0][0].name != ms[0].name):
-                            p.append(ms)
-                            done = True
-            if not done:
+            if not few:
+                key = ms[1].state_str
+                if ms[1].components:
+                    key = frozenset([comp.name for comp in ms[1].components])
+            bucket = unpaired.setdefault(key, [])
+            for p in bucket:
+                if p[0][1] == ms[1]:  # state is the same
+                    if ms[1].homodimer or p[0][0].name != ms[0].name:
+                        p.append(ms)
+                        bucket.remove(p)
+                        break
+            else:
                 pairs.append([ms])
+                bucket.append(pairs[-1])
 
         # get bonds numbers
         bonds = {}
@@ -267,11 +517,10 @@ class BiologicalComplex:
         - _id (not neccessary) - uniq id of Molecule object.
         """
         result = []
-        for mol in self.molecules:
-            if mol.name == name:
-                if not mid or not mol.mid or (mid and mid == mol.mid):
-                    if not _id or (_id and _id == mol._id):
-                        result.append(mol)      
+        for mol in self.molecules.get_by_name(name):
+            if not mid or not mol.mid or (mid and mid == mol.mid):
+                if not _id or (_id and _id == mol._id):
+                    result.append(mol)      
         return result
 
     def get_molecules_on_state_condition(self, name, state=None, mid=None, _id=None):
@@ -295,11 +544,19 @@ class BiologicalComplex:
         is present in complex.molecules.
         Returns False or True
         """
-        all_mols = [(mol.name, mol.mid) for mol in self.molecules]
-        if (name, mid) in all_mols: 
-            return True
+        for mol in self.molecules.get_by_name(name):
+            if mol.mid == mid:
+                return True
         return False
 
+    def rename_molecule(self, mol, name):
+        """
+        Changes name of the molecule (e.g. A ---> AmRNA)
+        and updates molecules index.
+        """
+        mol.name = name
+        self.molecules.reindex()
+
 
     def add_state(self, state):
         """
@@ -403,6 +660,21 @@ class AlternativeComplexes(list):
         new.input_condition = self.input_condition
         return new
 
+    def exact_clone(self):
+        """
+        Clones complexes inside with BiologicalComplex.exact_clone.
+        Complexes and molecules shared within the origin stay shared.
+        """
+        new = AlternativeComplexes(self.name)
+        memo = {}
+        for compl in self:
+            if id(compl) not in memo:
+                memo[id(compl)] = compl.exact_clone(memo)
+            new.add_complex(memo[id(compl)])
+        new.ctype = self.ctype
+        new.input_condition = self.input_condition
+        return new
+
 
 class ComplexPool(dict):
     """
@@ -11,6 +11,8 @@ Adds complexes to reaction:
 Befor: reaction.substrate_complexes is empty.
 After: reaction.substrate_complexes contain one or two complexes.
 
+Function count_required_complexes - number of reactions after applying complexes.
+
 Input: ReactionContainer object, complexes (AC or [AC, AC] or []).
        AC - AlternativeComplexes (created by ComplexBuilder).
        1 boolean contingency == 1 AC object
@@ -31,15 +33,37 @@ from biological_complex import BiologicalComplex
 from complex_builder import ComplexBuilder
 from rxnconcompiler.util.util import product
 
+def count_required_complexes(reaction_container, alter_complex, cache=None):
+    """
+    Returns number of required complexes for AlternativeComplexes 
+    (number of reactions in the container after apply_complexes).
+
+    Without cache the number is calculated from positive complexes 
+    (ComplexBuilder.count_required_complexes), nothing is built.
+    With cache (RequiredComplexesCache) required complexes are built 
+    once and kept, so apply_complexes uses them again.
+    """
+    applicator = ComplexApplicator(reaction_container, None)
+    root = applicator.get_root_molecules(alter_complex.get_first_non_empty())[0]
+    if cache is None:
+        return max(1, applicator.builder.count_required_complexes(alter_complex, root))
+    return max(1, cache.count_required_complexes(alter_complex, root, \
+        lambda: applicator._prepare_alter_complex(alter_complex.clone())))
+
+
 class ComplexApplicator:
     """
     Interface between AlternativeComplex objects and ReactionContainer object.
     """
-    def __init__(self, reaction_container, complexes):
-        """"""
+    def __init__(self, reaction_container, complexes, cache=None):
+        """
+        cache - RequiredComplexesCache (optional) shared 
+                by all containers in the compilation.
+        """
         #print complexes
         self.reaction_container = reaction_container        
         self.builder = ComplexBuilder()
+        self.cache = cache
         if not complexes:
             self.complexes = []
         else:
@@ -66,6 +90,17 @@ class ComplexApplicator:
         #print 'Root', root
         com = self.builder.build_required_complexes(alter_complex, root)
         return com
+
+    def _get_required_complexes(self, alter_complex):
+        """
+        Returns required complexes for AlternativeComplexes from ComplexPool.
+        Uses cache when available (the complexes are cloned and built only once).
+        """
+        if self.cache is None:
+            return self._prepare_alter_complex(alter_complex.clone())
+        root = self.get_root_molecules(alter_complex.get_first_non_empty())[0]
+        return self.cache.get_required_complexes(alter_complex, root, \
+            lambda: self._prepare_alter_complex(alter_complex.clone()))
        
     def prepare_complexes_to_apply(self, input_complexes):
         """
@@ -77,8 +112,7 @@ class ComplexApplicator:
         """
         if 'AlternativeComplexes' in str(input_complexes.__class__):
             # one boolean contingency
-            input_complexes = input_complexes.clone()
-            return self._prepare_alter_complex(input_complexes)
+            return self._get_required_complexes(input_complexes)
         else:
             # two boolean contingencies
             alter = []
@@ -41,6 +41,15 @@ How contingencies with Input states inside boolean are treated?
 - input_conditions parameter is set to a Contingency for liable complexes.
 - it is done at the end of the process.
 (- later in the flow when applying complexes on reaction it will change reaction rate.) 
+
+
+----------------------
+RequiredComplexesCache
+----------------------
+Required complexes depend only on the boolean (positive complexes),
+the root molecule and the contingency type. Many reactions use the same boolean,
+therefore required complexes are built once per compilation 
+(Rxncon object) and each reaction gets a copy.
 """
 
 from biological_complex import BiologicalComplex, \
@@ -176,6 +185,41 @@ class ComplexBuilder:
 
         return required_complexes
 
+    def count_required_complexes(self, positive_complexes, root):
+        """
+        Returns number of complexes build_required_complexes would build
+        without building them.
+
+        Complex i (in order of positive_complexes) has n_i negative 
+        complexes (one for each of its interaction states, 
+        see build_negative_complexes), so:
+        !   : 1 + n1 + n1*n2 + ... + n1*...*n(m-1)
+        x   : n1*...*nm
+        K+/K-: both
+        Input condition adds one complex to ! with OR and x with AND.
+        """
+        complexes = [comp for comp in positive_complexes \
+            if comp.molecules or comp.input_conditions]
+        positive = 0
+        negative = 1
+        for comp in complexes:
+            positive += negative
+            negative *= len(self.get_states_from_complex(comp, root))
+        if not complexes:
+            negative = 0
+        input_cont = positive_complexes.input_condition
+        if positive_complexes.ctype == '!':
+            if input_cont and input_cont.ctype == 'or':
+                return positive + 1
+            return positive
+        elif positive_complexes.ctype == 'x':
+            if input_cont and input_cont.ctype == 'and':
+                return negative + 1
+            return negative
+        elif 'k' in positive_complexes.ctype:
+            return positive + negative
+        return 0
+
     def build_positive_complexes_from_boolean(self, bool_cont):
         """
         Builds positive complexes from boolean (containing children) contingency <cont>.
@@ -362,3 +406,59 @@ class ComplexBuilder:
                     new_root = bond.get_partner(mol.get_component())
                     new_roots.append(new_root)
         return result, new_roots
+
+
+class RequiredComplexesCache:
+    """
+    Keeps required complexes built by ComplexBuilder.build_required_complexes.
+    Key: (boolean name, root molecule name, root molecule mid, contingency type).
+    Returns copies, because complexes are changed when applied on reactions.
+    Counts hits and misses.
+    """
+    def __init__(self):
+        self.required = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.required)
+
+    def __repr__(self):
+        return 'RequiredComplexesCache: %i hits, %i misses, %i entries' % \
+            (self.hits, self.misses, len(self))
+
+    def get_key(self, positive_complexes, root):
+        """Returns key for AlternativeComplexes and root Molecule."""
+        return (positive_complexes.name, root.name, root.mid, positive_complexes.ctype)
+
+    def get_required_complexes(self, positive_complexes, root, build):
+        """
+        Returns copy of required complexes.
+        Calls build (function without arguments) when they are not known yet.
+
+        Copy is made with exact_clone, so it is the same as a fresh build:
+        it keeps all complex attributes (is_positive, input_conditions ...)
+        and molecules shared between the required complexes.
+        """
+        return self.get_built(positive_complexes, root, build).exact_clone()
+
+    def count_required_complexes(self, positive_complexes, root, build):
+        """
+        Returns number of required complexes (without a copy).
+        Calls build when they are not known yet.
+        """
+        return len(self.get_built(positive_complexes, root, build))
+
+    def get_built(self, positive_complexes, root, build):
+        """Returns kept required complexes, builds them when not known yet."""
+        key = self.get_key(positive_complexes, root)
+        if key in self.required:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.required[key] = build()
+        return self.required[key]
+
+    def get_stats(self):
+        """Returns dict with hits, misses and number of entries."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
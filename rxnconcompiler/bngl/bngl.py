@@ -11,6 +11,7 @@ Bngl - main class from bngl.
 
 from bngl_output import BnglOutput
 from rule_factory import RuleFactory
+from rxnconcompiler.util.profiling import PROFILER
 
 class Bngl:
     """
@@ -32,13 +33,25 @@ class Bngl:
         self.reaction_pool = reaction_pool  # list of ReactionContainer objects.
         self.molecule_pool = molecules  # all molecules in the system.
         self.contingency_pool = contingencies
-        rule_factory = RuleFactory(self.reaction_pool, self.contingency_pool)
+        with PROFILER.span('rule_factory'):
+            rule_factory = RuleFactory(self.reaction_pool, self.contingency_pool)
         self.rule_pool = rule_factory.rule_pool
         self.warnings = warnings
+        self.local_functions = False # K+/K- rules as local functions (see BnglOutput).
 
     def get_src(self):
         """
         Returns BNGL source code as a string.
         """
-        output = BnglOutput(self.rule_pool, self.molecule_pool, self.warnings)
-        return output.get_src() 
\ No newline at end of file
+        output = BnglOutput(self.rule_pool, self.molecule_pool, self.warnings, self.local_functions)
+        with PROFILER.span('bngl_output'):
+            return output.get_src()
+
+    def write_to(self, fileobj):
+        """
+        Writes BNGL source code to the file object
+        (without creating the whole string).
+        """
+        output = BnglOutput(self.rule_pool, self.molecule_pool, self.warnings, self.local_functions)
+        with PROFILER.span('bngl_output'):
+            output.write_to(fileobj) 
\ No newline at end of file
@@ -4,15 +4,74 @@
 Module bngl_output.py
 
 Classes:
+ComplexStrCache - LRU cache of complex strings 
+                  (key: BiologicalComplex.get_canonical_key).
 BnglTranslator - producess strings from rule/rxncon objects
                  (complex, molecule, species, rule, rule header, reaction header).
 BnglOutput - producess sections of bngl file. 
+LocalRule - single rule with a local function rate 
+            written instead of rules made for K+/K- contingencies.
 """
 
 # TODO: Refactor get_molecule_str and get_complex_str ---> CODE DUPLICATION!!!
 
 import re
 from rxnconcompiler.molecule.component import Component
+from rxnconcompiler.reaction.rate import get_switch_function
+from rxnconcompiler.util.profiling import PROFILER
+
+
+class ComplexStrCache:
+    """
+    Keeps BNGL strings of complexes (BnglTranslator.get_complex_str).
+    Key: BiologicalComplex.get_canonical_key.
+    When there are maxsize strings, 
+    a quarter of least recently used strings is removed.
+    Counts hits and misses.
+    """
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.strings = {} # {key: [last use, string]}
+        self.counter = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __repr__(self):
+        return 'ComplexStrCache: %i hits, %i misses, %i entries' % \
+            (self.hits, self.misses, len(self))
+
+    def get_complex_str(self, compl, build):
+        """
+        Returns BNGL string of the complex.
+        Calls build (function with complex as argument) 
+        when string is not known yet.
+        """
+        self.counter += 1
+        key = compl.get_canonical_key()
+        entry = self.strings.get(key)
+        if entry:
+            self.hits += 1
+            entry[0] = self.counter
+            return entry[1]
+        self.misses += 1
+        if len(self.strings) >= self.maxsize:
+            self.remove_least_used()
+        result = build(compl)
+        self.strings[key] = [self.counter, result]
+        return result
+
+    def remove_least_used(self):
+        """Removes a quarter (at least one) of least recently used strings."""
+        keys = sorted(self.strings, key=lambda key: self.strings[key][0])
+        for key in keys[:max(1, len(keys) / 4)]:
+            del self.strings[key]
+
+    def get_stats(self):
+        """Returns dict with hits, misses and number of entries."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
 
 
 class BnglTranslator:
@@ -27,11 +86,20 @@ class BnglTranslator:
     (regardles whether these are sites and actual modifications)
     - then binding domains are sorted automatically 
     (regardles bound or not). 
+
+    Complex strings are cached (ComplexStrCache), 
+    rules share many identical complexes.
     """
     def __init__(self):
-        pass
+        self.complex_cache = ComplexStrCache()
 
     def get_complex_str(self, compl):
+        """
+        Returns complex string for BiologicalComplex object.
+        """
+        return self.complex_cache.get_complex_str(compl, self.build_complex_str)
+
+    def build_complex_str(self, compl):
         """
         Produces complex string out of BiologicalComplex object.
         """
@@ -286,18 +354,28 @@ class BnglTranslator:
     def get_rule_str(self, rule):
         """
         """    
-        reactants = []
-        for compl in sorted(rule.reaction.substrat_complexes, key=lambda comp: comp.side):
-            #sorted(range(len(aa)), key=lambda a: aa[a])
-            reactants.append(self.get_complex_str(compl))
-        products = []
-        for compl in sorted(rule.reaction.product_complexes, key=lambda comp: comp.side):
-            products.append(self.get_complex_str(compl))
-        reactant_str = ' + '.join(reactants)
-        product_str = ' + '.join(products)
+        reactant_str = self.get_side_str(rule.reaction.substrat_complexes)
+        product_str = self.get_side_str(rule.reaction.product_complexes)
         rate_str = ', '.join(rule.rates)
         return "%s %s %s    %s\n" % (reactant_str, rule.arrow, product_str, rate_str)
 
+    def get_side_str(self, complexes, tagged=None, tag='x'):
+        """
+        Returns complexes (sorted by side) joined with +.
+        Molecules with name tagged get the tag (e.g. B(a~P)%x).
+        """
+        result = []
+        for compl in sorted(complexes, key=lambda comp: comp.side):
+            compl_str = self.get_complex_str(compl)
+            if tagged:
+                molecules = compl_str.split('.')
+                for index, mol in enumerate(molecules):
+                    if mol.split('(')[0] == re.sub('[-/]', '', tagged):
+                        molecules[index] = '%s%%%s' % (mol, tag)
+                compl_str = '.'.join(molecules)
+            result.append(compl_str)
+        return ' + '.join(result)
+
     def get_reqs_str(self, cont_list):
         """"""
         present = lambda cont: 'False' if cont.ctype =='x' else 'True' 
@@ -320,20 +398,193 @@ Indicate which phosphorylation should be used in contingency by adding a domain
 .\n" % (cont.state.components[0].name) 
             for reaction in warnings.get_problem_reaction_str():
                 result += "# WARNING: Contingencies can not be applied on reaction: %s.\n" % reaction
+            if warnings.rule_budget:
+                result += "# WARNING: %s\n" % warnings.rule_budget
         return result
 
+class LocalRule:
+    """
+    Rules of a RuleContainer made for K+/K- contingencies 
+    written as a single rule (two for reversible reactions) 
+    with a local function rate (see rate.get_switch_function).
+
+    It is possible when:
+    - there are 2^k rules, one for each combination of k states 
+      (optional requirements, present / not present),
+    - all k states are modifications of one molecule, 
+      which is present once on the tagged side(s) of the rule,
+    - rules are the same when these states are removed,
+    - rates are simple names (no Input functions),
+    - a species can not contain a second copy of the molecule
+      (its name is in single_copy, see BnglOutput.get_single_copy_molecules).
+    The tagged molecule stands for the whole species 
+    when the observables are counted (Molecules observables 
+    count every copy in the species), therefore the last condition.
+    """
+    def __init__(self, rule_container, translator, single_copy):
+        self.rule_container = rule_container
+        self.translator = translator
+        self.single_copy = single_copy
+        self.rules = list(rule_container)
+        self.states = []
+        self.observables = [] # (name, pattern)
+        self.functions = []   # function lines
+        self.rule_lines = []
+
+    @property
+    def saved(self):
+        """Number of rules saved."""
+        return len(self.rules) - len(self.rule_lines)
+
+    def get_values(self):
+        """
+        Sets self.states (modification states from optional requirements).
+        Returns list of tuples of booleans (state present or not)
+        one for each rule or None when rules can not be joined.
+        """
+        states = {}
+        rule_values = []
+        for rule in self.rules:
+            if not rule.header:
+                return None
+            values = {}
+            for cont in rule.specific_reqs:
+                values[str(cont.state)] = cont.ctype != 'x'
+                states[str(cont.state)] = cont.state
+            rule_values.append(values)
+        names = sorted(states.keys())
+        if not names or len(self.rules) != 2 ** len(names):
+            return None
+        result = []
+        for values in rule_values:
+            if sorted(values.keys()) != names:
+                return None
+            result.append(tuple([values[name] for name in names]))
+        if len(set(result)) != len(result):
+            return None
+        self.states = [states[name] for name in names]
+        return result
+
+    def check_states(self):
+        """
+        Checks whether states are modifications of a single molecule
+        other than the state changed in the reaction.
+        """
+        sp_state = self.rule_container.sp_state
+        names = set([state.components[0].name for state in self.states])
+        for state in self.states:
+            if state.type != 'Covalent Modification' or str(state) == str(sp_state):
+                return False
+        return len(names) == 1
+
+    def get_stripped_reaction(self, reaction):
+        """
+        Returns copy of the reaction without self.states
+        (compared as strings, State == does not compare domains).
+        """
+        states = set([str(state) for state in self.states])
+        reaction = reaction.clone()
+        for compl in reaction.substrat_complexes + reaction.product_complexes:
+            for mol in compl.molecules:
+                mol.modifications = [st for st in mol.modifications if str(st) not in states]
+                mol.modification_sites = [st for st in mol.modification_sites if str(st) not in states]
+        return reaction
+
+    def count_molecules(self, complexes, name):
+        """Returns number of molecules with given name."""
+        return len([mol for compl in complexes for mol in compl.molecules if mol.name == name])
+
+    def get_observable(self, state):
+        """Returns observable (name, pattern) for modification state."""
+        domain = state.components[0].domain
+        pattern = re.sub('[-/]', '', '%s(%s~%s)' % (state.components[0].name, domain, state.modifier))
+        name = re.sub('[\W_]+', '_', '%s_%s_%s' % (state.components[0].name, domain, state.modifier))
+        return name.strip('_'), pattern
+
+    def create(self):
+        """
+        Creates observables, functions and rule lines.
+        Returns False when rules can not be joined.
+        """
+        values = self.get_values()
+        if not values or not self.check_states():
+            return False
+        for rule in self.rules:
+            for rate in rule.rates:
+                if not re.match('^\w+$', rate):
+                    return False
+        name = self.states[0].components[0].name
+        if name not in self.single_copy:
+            return False
+        sides = set()
+        for rule in self.rules:
+            reaction = self.get_stripped_reaction(rule.reaction)
+            sides.add((self.translator.get_side_str(reaction.substrat_complexes), \
+                self.translator.get_side_str(reaction.product_complexes)))
+        if len(sides) != 1:
+            return False
+        reversible = self.rules[0].arrow == '<->'
+        if self.count_molecules(reaction.substrat_complexes, name) != 1:
+            return False
+        if reversible and self.count_molecules(reaction.product_complexes, name) != 1:
+            return False
+        if reversible and len(self.rules) < 4:
+            return False
+
+        self.observables = [self.get_observable(state) for state in self.states]
+        obs_names = [obs[0] for obs in self.observables]
+        reactants, products = sides.pop()
+        rid = self.rule_container.rid
+        if reversible:
+            forward = dict((value, rule.rates[0]) for value, rule in zip(values, self.rules))
+            reverse = dict((value, rule.rates[1]) for value, rule in zip(values, self.rules))
+            self.functions = ['ff%s(x) = %s\n' % (rid, get_switch_function(obs_names, forward)), \
+                'fr%s(x) = %s\n' % (rid, get_switch_function(obs_names, reverse))]
+            self.rule_lines = ['%s -> %s    ff%s(x)\n' % (self.translator.get_side_str( \
+                reaction.substrat_complexes, name), products, rid), \
+                '%s -> %s    fr%s(x)\n' % (self.translator.get_side_str( \
+                reaction.product_complexes, name), reactants, rid)]
+        else:
+            rates = dict((value, rule.rates[0]) for value, rule in zip(values, self.rules))
+            self.functions = ['f%s(x) = %s\n' % (rid, get_switch_function(obs_names, rates))]
+            self.rule_lines = ['%s -> %s    f%s(x)\n' % (self.translator.get_side_str( \
+                reaction.substrat_complexes, name), products, rid)]
+        return True
+
+    def get_header(self):
+        """Returns comment with states and number of saved rules."""
+        return '# Local function: %s (%i rules -> %i, %i saved)\n' % \
+            (', '.join([str(state) for state in self.states]), \
+            len(self.rules), len(self.rule_lines), self.saved)
+
+
 class BnglOutput:
     """
     BioNetGenOutput object creates all sections for BNGL file.
     Uses rule and molecules generated by BioNetGen. 
+
+    Sections are produced by generators (iter_... functions) 
+    that yield the text piece by piece:
+    write_to streams the whole BNGL file to a file object, 
+    get_src joins it into one string,
+    create_..._section functions keep single sections as strings (..._txt).
+
+    With local_functions rules made for K+/K- contingencies 
+    are written as single rules with local function rates 
+    when it is possible (LocalRule), saved rules are listed 
+    in reaction headers and in get_saved_rules. The functions section 
+    is written only when at least one rule is joined (conditions 
+    of LocalRule are strict, most real models have no such rules).
     """
-    def __init__(self, rule_pool, molecule_pool, warnings=None):
+    def __init__(self, rule_pool, molecule_pool, warnings=None, local_functions=False):
         self.rule_pool  = rule_pool
         self.molecules = molecule_pool.get_system_molecules().values()
         self.translator = BnglTranslator()
         self.rates = []
         self.max_stoich = 4
         self.warnings = warnings
+        self.local_functions = local_functions
+        self.local_rules = None
 
     def create_sections_txt(self):
         self.create_rules_section()
@@ -343,79 +594,236 @@ class BnglOutput:
         self.create_action()
         self.create_worning_section()
 
+    def iter_stripped(self, pieces):
+        """
+        Yields given pieces of text so that together 
+        they are the same as ''.join(pieces).strip().
+        Only whitespace at the end is kept back.
+        """
+        started = False
+        pending = ''
+        for piece in pieces:
+            if not started:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                started = True
+            stripped = piece.rstrip()
+            if stripped:
+                yield pending + stripped
+                pending = piece[len(stripped):]
+            else:
+                pending += piece
+
+    def iter_section(self, name, pieces):
+        """Yields one section (see format_string)."""
+        yield 'begin %s\n' % name
+        for piece in self.iter_stripped(pieces):
+            yield piece
+        yield '\nend %s\n\n' % name
+
     def format_string(self, name, value):
         """Formats one section string."""
         return 'begin %s\n%s\nend %s\n\n' %(name, value.strip(), name)
 
+    def iter_model(self):
+        """Yields all sections of the model."""
+        sections = [self.iter_section('parameters', self.iter_parameters()), \
+            self.iter_section('molecule types', self.iter_molecule_types()), \
+            self.iter_section('seed species', self.iter_seed_species()), \
+            self.iter_section('observables', self.iter_observables())]
+        if self.get_local_rules():
+            sections.append(self.iter_section('functions', self.iter_functions()))
+        sections.append(self.iter_section('reaction rules', self.iter_rules()))
+        for section in sections:
+            for piece in section:
+                yield piece
+
+    def iter_src(self):
+        """Yields BNGL source code piece by piece."""
+        yield self.translator.get_warning_str(self.warnings)
+        for piece in self.iter_section('model', self.iter_model()):
+            yield piece
+        yield self.get_action_str().strip()
+
+    def write_to(self, fileobj):
+        """
+        Writes BNGL source code to the file object.
+        Rules are written one by one, whole file is never kept in memory.
+        """
+        for piece in self.iter_src():
+            fileobj.write(piece)
+
     def get_src(self):
         """Returns BNGL source code as a string."""
-        self.observables_txt = self.format_string('observables', '')
-        self.create_sections_txt()
-        model = '%s%s%s%s%s' %(self.parameters_txt, self.molecules_txt, self.species_txt, self.observables_txt, self.rules_txt)
-        bngl_text = self.format_string('model', model) + self.action_txt.strip()
-        bngl_text = self.worning_txt + bngl_text
-        return bngl_text
-
-    def format_string(self, name, value):
-        """Formats one section string."""
-        return 'begin %s\n%s\nend %s\n\n' %(name, value.strip(), name)
+        return ''.join(self.iter_src())
 
     def create_worning_section(self):
         """"""
         self.worning_txt = self.translator.get_warning_str(self.warnings)
 
+    def iter_molecule_types(self):
+        """Yields lines of molecule types section."""
+        for mol in sorted(self.molecules, key=lambda molecule: molecule.name):
+            yield self.translator.get_molecule_str(mol) + '\n'
+
     def create_molecule_type_section(self):
         """"""
-        result = ""
+        self.molecules_txt = ''.join(self.iter_section('molecule types', self.iter_molecule_types()))
+
+    def iter_seed_species(self):
+        """Yields lines of seed species section."""
         for mol in sorted(self.molecules, key=lambda molecule: molecule.name):
-            mol_str = self.translator.get_molecule_str(mol)
-            result += mol_str + '\n'
-        self.molecules_txt = self.format_string('molecule types', result)
+            yield "%-90s 100\n" % self.translator.get_species_str(mol)
 
     def create_seed_species_section(self):
         """"""
-        result = ""
-        for mol in sorted(self.molecules, key=lambda molecule: molecule.name):
-            result += "%-90s 100\n" % self.translator.get_species_str(mol)
-        self.species_txt = self.format_string('seed species', result)
+        self.species_txt = ''.join(self.iter_section('seed species', self.iter_seed_species()))
 
-    def create_rules_section(self):
-        """"""
-        result = ""
-        for rule_container in sorted(self.rule_pool, key=lambda rcont: rcont.rid):
-            result += self.translator.get_reaction_header(rule_container)
+    def get_local_rules(self):
+        """
+        Returns dict reaction name: LocalRule 
+        for rule containers that can be written with local functions.
+        Empty when local_functions is not set.
+        """
+        if self.local_rules is None:
+            self.local_rules = {}
+            if self.local_functions:
+                single_copy = self.get_single_copy_molecules()
+                for rule_container in self.rule_pool:
+                    local_rule = LocalRule(rule_container, self.translator, single_copy)
+                    if local_rule.create():
+                        self.local_rules[rule_container.reaction_name] = local_rule
+        return self.local_rules
+
+    def get_single_copy_molecules(self):
+        """
+        Returns set of names of molecules that are present 
+        at most once in any species.
+
+        Graph: molecules are nodes, association states (with domains) are edges.
+        A species is a tree of bonds and every bond uses 
+        a different domain of a molecule, so a second copy of a molecule 
+        in a species needs a homodimer, two states between the same 
+        molecules or a cycle. Molecules in connected parts of the graph 
+        that are trees (edges = nodes - 1) are present at most once.
+        """
+        edges = {}
+        for mol in self.molecules:
+            for state in mol.binding_sites + mol.binding_partners:
+                if state.type == 'Association':
+                    key = tuple(sorted([str(comp) for comp in state.components]))
+                    edges[key] = [comp.name for comp in state.components]
+        neighbours = dict((mol.name, []) for mol in self.molecules)
+        for first, second in edges.values():
+            neighbours.setdefault(first, []).append(second)
+            neighbours.setdefault(second, []).append(first)
+        result = set()
+        done = set()
+        for name in neighbours:
+            if name in done:
+                continue
+            part = set([name])
+            stack = [name]
+            while stack:
+                for partner in neighbours[stack.pop()]:
+                    if partner not in part:
+                        part.add(partner)
+                        stack.append(partner)
+            done.update(part)
+            part_edges = sum([len(neighbours[node]) for node in part]) / 2
+            homodimer = [node for node in part if node in neighbours[node]]
+            if not homodimer and part_edges == len(part) - 1:
+                result.update(part)
+        return result
+
+    def get_saved_rules(self):
+        """Returns dict reaction id: number of rules saved by local functions."""
+        return dict((local_rule.rule_container.rid, local_rule.saved) \
+            for local_rule in self.get_local_rules().values())
+
+    def iter_observables(self):
+        """Yields lines of observables section (used by local functions)."""
+        used = set()
+        for rule_container in self.rule_pool:
+            local_rule = self.get_local_rules().get(rule_container.reaction_name)
+            if local_rule:
+                for name, pattern in local_rule.observables:
+                    if name not in used:
+                        used.add(name)
+                        yield 'Molecules %s %s\n' % (name, pattern)
+
+    def iter_functions(self):
+        """Yields lines of functions section (local functions)."""
+        for rule_container in self.rule_pool:
+            local_rule = self.get_local_rules().get(rule_container.reaction_name)
+            if local_rule:
+                for function in local_rule.functions:
+                    yield function
+
+    def iter_rules(self):
+        """Yields reaction headers, rule headers and rules."""
+        for rule_container in self.rule_pool:
+            yield self.translator.get_reaction_header(rule_container)
+            local_rule = self.get_local_rules().get(rule_container.reaction_name)
+            if local_rule:
+                yield local_rule.get_header()
+                for line in local_rule.rule_lines:
+                    yield line
+                for rule in rule_container:
+                    self.rates += rule.rates
+                PROFILER.count('rules', len(local_rule.rule_lines))
+                continue
             for rule in rule_container:
                 if rule.header:
-
-                    result += self.translator.get_rule_header(rule)
-                result += self.translator.get_rule_str(rule)
+                    yield self.translator.get_rule_header(rule)
+                yield self.translator.get_rule_str(rule)
                 self.rates += rule.rates 
-        self.rules_txt = self.format_string('reaction rules', result)
+            PROFILER.count('rules', len(rule_container))
+        if PROFILER.enabled:
+            PROFILER.set_stats('complex_str_cache', self.translator.complex_cache.get_stats())
 
-    def create_parameters_section(self):
+    def create_rules_section(self):
         """"""
+        self.rules_txt = ''.join(self.iter_section('reaction rules', self.iter_rules()))
+
+    def iter_parameters(self):
+        """
+        Yields lines of parameters section: 
+        input parameters (k_...) first, then normal parameters.
+        """
         special_rates = {}
         normal_rates = {}
-        special_param_str = "# input parameters\n"
-        normal_param_str = "# normal parameters\n"
-        for rule_container in sorted(self.rule_pool, key=lambda rcont: rcont.rid):
-            for rule in rule_container:
-                for rate in sorted(rule.rate_values.keys()):
+        normal_param_lines = ["# normal parameters\n"]
+        for rule_container in self.rule_pool:
+            for rate_obj in rule_container.iter_rates():
+                rate_values = rate_obj.get_rate_values()
+                for rate in sorted(rate_values.keys()):
                     if rate.startswith('k_'):
-                        special_rates[rate] = rule.rate_values[rate]
+                        special_rates[rate] = rate_values[rate]
                     else:
-                        if rate not in normal_rates.keys():
-                            normal_param_str += "%s %s\n" % (rate, rule.rate_values[rate])
-                            normal_rates[rate] = rule.rate_values[rate]
+                        if rate not in normal_rates:
+                            normal_param_lines.append("%s %s\n" % (rate, rate_values[rate]))
+                            normal_rates[rate] = rate_values[rate]
+        yield "# input parameters\n"
         for rate in special_rates.keys():
-            special_param_str += "%s %s\n" % (rate, special_rates[rate])
-        self.parameters_txt = self.format_string('parameters', special_param_str + normal_param_str.strip())
+            yield "%s %s\n" % (rate, special_rates[rate])
+        for piece in self.iter_stripped(normal_param_lines):
+            yield piece
+
+    def create_parameters_section(self):
+        """"""
+        self.parameters_txt = ''.join(self.iter_section('parameters', self.iter_parameters()))
         #result = ""
         #for rate in self.rates:
         #    result += "%s 1\n" % rate
         #self.parameters_txt = self.format_string('parameters', result)
 
+    def get_action_str(self):
+        """Returns actions (generate_network)."""
+        return "generate_network({overwrite=>1,max_stoich=>{%s}});" % \
+            ','.join(['%s=>%s' % (mol.name, self.max_stoich) for mol in sorted(self.molecules, key=lambda molecule: molecule.name)])
+
     def create_action(self):
         """"""
-        self.action_txt = "generate_network({overwrite=>1,max_stoich=>{%s}});" % \
-            ','.join(['%s=>%s' % (mol.name, self.max_stoich) for mol in sorted(self.molecules, key=lambda molecule: molecule.name)])
+        self.action_txt = self.get_action_str()
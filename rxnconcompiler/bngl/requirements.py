@@ -7,11 +7,131 @@ Class RequirementNode       - class that generates and stores requirements
 Class RequirementsGenerator - class that generates requirements from contingencies 
                               for single reaction.
 Class RequirementsFactory   - class that produces RequirementsPool objects                        
+
+Function minimise_requirements - removes impossible and redundant 
+                                 requirement lists.
+
+Minimisation affects only get_requirements output 
+(RequirementsFactory and its stats). Rules are built from boolean 
+contingencies by ComplexBuilder and ComplexApplicator, 
+RuleFactory uses RequirementsGenerator only for the contingency 
+header string, so compiled models are not changed by it.
 """
 
 import re
 from rxnconcompiler.contingency.contingency_factory import ContingencyWrapper, ContingencyFactory
 from rxnconcompiler.util.util import product, flatten
+from rxnconcompiler.molecule.state import StateTable
+
+
+def get_literal(req):
+    """
+    Returns (state string, ctype) for ContingencyWrapper.
+    e.g. ('A_[bd]-{P}', '!')
+    """
+    return str(req.contingency.state), req.get_ctype()
+
+def get_masks(req_list, state_table):
+    """
+    Returns StateTable (present, absent) masks 
+    for the list of ContingencyWrapper objects.
+    """
+    present = 0
+    absent = 0
+    for req in req_list:
+        bit = 1 << state_table.get_bit(req.contingency.state)
+        if req.get_ctype() == 'x':
+            absent |= bit
+        else:
+            present |= bit
+    return present, absent
+
+def is_contradictory(req_list):
+    """
+    Checks whether the same state is both required 
+    and excluded (! and x) in the list of ContingencyWrapper objects.
+    """
+    signs = {}
+    for req in req_list:
+        state, sign = get_literal(req)
+        if signs.setdefault(state, sign) != sign:
+            return True
+    return False
+
+def minimise_requirements(req_lists, stats=None, state_table=None):
+    """
+    Minimises requirement lists (lists of ContingencyWrapper objects,
+    each list is one alternative - one rule):
+    - requirements repeated in a list are removed,
+    - lists where a state is both ! and x are removed (contradictory),
+    - two lists that differ only in ! / x of one state are merged 
+      into one list without this state (merged):
+      [X, ! A] + [X, x A] ---> [X],
+    - lists that contain all requirements of another list are removed 
+      (subsumed): [X] + [X, Y] ---> [X].
+    Merging and removing are repeated until nothing changes.
+    Order of lists and of requirements in lists is kept.
+    Lists are compared as StateTable (present, absent) bit masks.
+
+    stats - dict, numbers of removed lists are added to 
+            'contradictory', 'merged' and 'subsumed'.
+    state_table - StateTable, by default a new one is created.
+    """
+    if stats is None:
+        stats = {}
+    if state_table is None:
+        state_table = StateTable()
+    for key in ['contradictory', 'merged', 'subsumed']:
+        stats.setdefault(key, 0)
+    cubes = []
+    for req_list in req_lists:
+        masks = get_masks(req_list, state_table)
+        if state_table.is_contradictory(*masks):
+            stats['contradictory'] += 1
+            continue
+        literals = set()
+        reqs = []
+        for req in req_list:
+            if get_literal(req) not in literals:
+                literals.add(get_literal(req))
+                reqs.append(req)
+        cubes.append((masks, reqs))
+
+    changed = True
+    while changed:
+        changed = False
+        # subsumed lists
+        kept = []
+        for masks, reqs in cubes:
+            if [1 for kept_masks, kept_reqs in kept if state_table.is_subset(kept_masks, masks)]:
+                stats['subsumed'] += 1
+                continue
+            general = [index for index, (kept_masks, kept_reqs) in enumerate(kept) \
+                if state_table.is_subset(masks, kept_masks)]
+            if general:
+                stats['subsumed'] += len(general)
+                kept[general[0]] = (masks, reqs)
+                kept = [cube for index, cube in enumerate(kept) if index not in general[1:]]
+            else:
+                kept.append((masks, reqs))
+        cubes = kept
+        # merged lists
+        for first in range(len(cubes)):
+            (present, absent), reqs = cubes[first]
+            for second in range(first + 1, len(cubes)):
+                (other_present, other_absent), other_reqs = cubes[second]
+                bit = present ^ other_present
+                if bit and bit & (bit - 1) == 0 and bit == absent ^ other_absent:
+                    state = str(state_table.get_states(bit)[0])
+                    reqs = [req for req in reqs if get_literal(req)[0] != state]
+                    cubes[first] = ((present & ~bit, absent & ~bit), reqs)
+                    del cubes[second]
+                    stats['merged'] += 1
+                    changed = True
+                    break
+            if changed:
+                break
+    return [reqs for masks, reqs in cubes]
 
 
 class RequirementsPool(dict):
@@ -32,6 +152,7 @@ class RequirementNode:
     """
     def __init__(self):
         self.positive = [[]]
+        self.contradictory = 0 # combinations removed in get_and_positive
 
     def __repr__(self):
         """String with number of positive, negative and total requirements."""
@@ -69,7 +190,13 @@ class RequirementNode:
         """
         all_pos = [node.positive for node in nodes]
         result = reduce(product, all_pos)
-        self.positive = [flatten(x) for x in result]
+        self.positive = []
+        for req_list in result:
+            req_list = flatten(req_list)
+            if is_contradictory(req_list):
+                self.contradictory += 1
+            else:
+                self.positive.append(req_list)
         
     def get_leaf(self, node):
         """
@@ -90,11 +217,19 @@ class RequirementsGenerator:
 
     Input: contingency root node
     Deals with !, x, boolean contingencies, ignores K+, K-, 0, ?
+
+    Requirements are minimised (minimise_requirements), 
+    stats keeps numbers of requirement lists before (generated) 
+    and after (requirements) minimisation and how many were removed,
+    pruned - contradictory combinations removed while lists were
+    generated (in AND nodes), they are not counted in generated.
     """
-    def __init__(self, root_node):
+    def __init__(self, root_node, state_table=None):
         self.root = root_node       
         self.requirements = []
         self.nodes_dict = {}
+        self.stats = {}
+        self.state_table = state_table
         self._create_node_dict(self.root)
 
     def __str__(self):
@@ -168,14 +303,21 @@ class RequirementsGenerator:
                 or cont.ctype == 'none' or not cont.ctype:
                 req_node.get_and_positive(child_nodes)
         
-    def get_requirements(self):
+    def get_requirements(self, minimise=True):
         """
         Creates the final list of requirements.
         It is a list of lists where each list responds to one rule.
         When reaction has no contingencies it is equal [[]].
+        When all requirement lists are contradictory it is [].
         """
         self.requirements2nodes(self.root)
-        for req_list in self.nodes_dict[self.root].positive:
+        positive = self.nodes_dict[self.root].positive
+        pruned = sum([node.contradictory for node in self.nodes_dict.values()])
+        self.stats = {'generated': len(positive), 'pruned': pruned}
+        if minimise:
+            positive = minimise_requirements(positive, self.stats, self.state_table)
+        self.stats['requirements'] = len(positive)
+        for req_list in positive:
             temp = []
             for req in req_list:
                 temp.append(req.get_contingency())
@@ -190,18 +332,34 @@ class RequirementsFactory:
     def __init__(self, xls_tables):
         self.xls_tables = xls_tables
         self.contingencies = ContingencyFactory(self.xls_tables).parse_contingencies()
+        self.stats = {}
+        self.state_table = StateTable()
         self.requirements = self.generate_requirements()
 
     def generate_requirements(self):
         """
         Prepares dictionary with requirements.
+        Stats of RequirementsGenerators are kept in self.stats (reaction: stats).
         """
         reqs = RequirementsPool()
         for reaction in self.contingencies.keys():
-            req_gen = RequirementsGenerator(self.contingencies[reaction])
+            req_gen = RequirementsGenerator(self.contingencies[reaction], self.state_table)
             reqs[reaction] = req_gen.get_requirements()
+            self.stats[reaction] = req_gen.stats
         return reqs
 
+    def get_stats(self):
+        """
+        Returns minimisation stats summed for all reactions:
+        pruned, generated, contradictory, merged, subsumed, requirements.
+        """
+        result = dict((key, 0) for key in \
+            ['pruned', 'generated', 'contradictory', 'merged', 'subsumed', 'requirements'])
+        for stats in self.stats.values():
+            for key in stats:
+                result[key] += stats[key]
+        return result
+
     def get_requirements_dict(self):
         """
         Prepares dictionary with requirement lists
@@ -11,28 +11,24 @@ To remove? Do we want to make rules and reactions different.
 Classes:
 RulePool
 RuleContainer
+FactorisedRuleContainer - rules made when iterated (for FactorisedReactions)
 Rule         
 """
 
 from rxnconcompiler.molecule.component import Component
+from rxnconcompiler.reaction.reaction_container import OrderedPool
 
 
-class RulePool(dict):
+class RulePool(OrderedPool):
     """
     RulePool object is a dictionary that stores all 
     RuleContainer objects for one system.
+    Iterates RuleContainers sorted by reaction id.
 
     Key: reaction string.
     Value: RuleContainer.
     """
 
-    def __init__(self):
-        pass
-
-    def __iter__(self):
-        all_rules = sorted(self.values(), key=lambda r: r.rid)
-        return iter(all_rules)
-
 class RuleContainer(list):
     def __init__(self, reaction_container):
         self.reactions = reaction_container
@@ -46,6 +42,11 @@ class RuleContainer(list):
     def add_rule(self, rule):
         self.append(rule)
 
+    def iter_rates(self):
+        """Yields Rate objects of the rules."""
+        for rule in self:
+            yield rule.reaction.rate
+
     def get_name(self):
         """
         @rtype: string
@@ -54,6 +55,34 @@ class RuleContainer(list):
         return '%s %s %s' % (react.left_reactant.name, react.rtype, react.right_reactant.name)
 
 
+class FactorisedRuleContainer(RuleContainer):
+    """
+    RuleContainer for FactorisedReactions.
+    Rules are not kept: each one is made when iterated 
+    from a reaction built by FactorisedReactions 
+    (with specific requirements), so only one rule 
+    of the container exists at a time.
+    """
+    def __init__(self, reaction_container, state_table):
+        RuleContainer.__init__(self, reaction_container)
+        self.state_table = state_table
+
+    def __len__(self):
+        return len(self.reactions)
+
+    def __iter__(self):
+        for reaction in self.reactions:
+            rule = Rule(reaction)
+            rule.header = True
+            rule.specific_reqs = reaction.get_specific_contingencies(self.common_reqs, self.state_table)
+            yield rule
+
+    def iter_rates(self):
+        """Yields Rate objects of the rules (reactions are not built)."""
+        for index in range(len(self.reactions)):
+            yield self.reactions.get_rate(index).rate
+
+
 class Rule:
     def __init__(self, reaction):
         self.reaction = reaction
@@ -6,13 +6,17 @@ Module rule_factory.py
 Contains: RuleFactory class.
 
 Creates RulePool from reaction_pool and contingency_pool
+(FactorisedReactions get FactorisedRuleContainer, 
+their rules are made when written).
 
 Not neccesary?
 """
 
-from rule import RulePool, RuleContainer, Rule
+from rule import RulePool, RuleContainer, FactorisedRuleContainer, Rule
+from rxnconcompiler.contingency.contingency_applicator import FactorisedReactions
 from requirements import RequirementsGenerator
 from rxnconcompiler.molecule.component import Component
+from rxnconcompiler.molecule.state import StateTable
 
 class RuleFactory:
     """"""
@@ -20,20 +24,27 @@ class RuleFactory:
         self.reaction_pool = reaction_pool
         self.contingency_pool = contingency_pool
         self.rule_pool = RulePool()
+        self.state_table = StateTable()
         self.generate_rules()
 
     def generate_rules(self):
         """"""
         for reaction_container in self.reaction_pool:
-            rule_container =  RuleContainer(reaction_container)
+            if isinstance(reaction_container, FactorisedReactions):
+                rule_container = FactorisedRuleContainer(reaction_container, self.state_table)
+            else:
+                rule_container =  RuleContainer(reaction_container)
             rule_container.sp_state = reaction_container.sp_state
-            common_cont = reaction_container.get_common_contingencies()
+            common_cont = reaction_container.get_common_contingencies(self.state_table)
             rule_container.common_reqs = common_cont
             if self.contingency_pool.has_key(reaction_container.name):
-                gen = RequirementsGenerator(self.contingency_pool[reaction_container.name])
+                gen = RequirementsGenerator(self.contingency_pool[reaction_container.name], self.state_table)
                 rule_container.contingencies = gen
             else:
                 rule_container.contingencies = None
+            if isinstance(reaction_container, FactorisedReactions):
+                self.rule_pool[reaction_container.name] = rule_container
+                continue
             # add source and product states and reqs change name.
             header = True if len(reaction_container) > 1 else False
             for reaction in reaction_container:
@@ -42,5 +53,5 @@ class RuleFactory:
                 # add specific reqs and cont.
                 rule_container.add_rule(rule)
                 if header:
-                    rule.specific_reqs = reaction.get_specific_contingencies(common_cont)
+                    rule.specific_reqs = reaction.get_specific_contingencies(common_cont, self.state_table)
             self.rule_pool[reaction_container.name] = rule_container
@@ -1,45 +1,151 @@
 #!/usr/bin/env python
 
 """
-Class Compiler: translates any rxncon language input 
+Class Compiler: translates any rxncon language input
                 (json, string, dict, xls, txt) into BNGL.
+
+Function filter_reactions: restricts xls_tables to given reaction ids.
 """
 
+import json
 from parser.rxncon_parser import parse_rxncon
 from rxncon import Rxncon
 from bngl.bngl import Bngl
+from bngl.bngl_output import BnglOutput
+from rxnconcompiler.util.profiling import PROFILER
+from rxnconcompiler.molecule.state import clear_state_keys
+
+
+def filter_reactions(xls_tables, id_list=None):
+    """
+    Filters reactions in xls_tables (xls_tables[reaction_list])
+    if id_list empty returns whole xls_tables,
+    else xls_tables[reaction_list] containsindicated reactions.
+    """
+    if not id_list:
+        return xls_tables
+    temp = []
+    id_list = [str(rid) for rid in id_list]
+    for reaction in xls_tables['reaction_list']:
+        if str(reaction['ReactionID']) in id_list:
+            temp.append(reaction)
+    new_xls = {}
+    new_xls['reaction_list'] = temp
+    new_xls['reaction_definition'] = xls_tables['reaction_definition']
+    new_xls['contingency_list'] = xls_tables['contingency_list']
+    return new_xls
+
 
 class Compiler:
     """
     Compiler object translates given rxncon input (xls file or quick text)
     into BioNetGen source code (BNGL file).
 
+    It is a single compilation session: the input is parsed once
+    (in the constructor) and all outputs (bngl, rules and parameters,
+    rxncon string, json) are produced from the same xls_tables.
+
     TODO: rename to RxnconCompiler (Copiler not specific)
-    TODO: add functions for translation into other formats
-    TODO: apply filters
     TODO: write any output write_bngl ---> write_output
     """
-    def __init__(self, input_data):
+    def __init__(self, input_data, reaction_ids=None, workers=None, factorise_k=False, local_functions=False, \
+        max_rules=None, budget_action='error'):
         """
         Keeps single xls object.
+        When reaction_ids are given only these reactions are kept.
+        When workers > 1 reactions are processed in parallel,
+        factorise_k builds K+/K- reactions one by one
+        (see Rxncon.run_process).
+        local_functions writes rules made for K+/K- contingencies 
+        as single rules with local function rates (see BnglOutput).
+        max_rules - budget of rules checked before reactions are processed,
+        budget_action - 'error' (RuleBudgetError) or 'warn' (see Rxncon.run_process).
+        State keys interned by previous compilations are dropped.
         """
-        self.xls_tables = parse_rxncon(input_data)
+        clear_state_keys()
+        with PROFILER.span('parse'):
+            self.xls_tables = filter_reactions(parse_rxncon(input_data), reaction_ids)
+        self.workers = workers
+        self.factorise_k = factorise_k
+        self.local_functions = local_functions
+        self.max_rules = max_rules
+        self.budget_action = budget_action
 
-    def translate(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True): 
+    def filter(self, reaction_ids=None):
         """
-        Translates Rxncon data into bngl string.
-        Uses Rxncon and Bngl objects.
+        Returns Compiler for the given reactions only.
+        The input is not parsed again.
+        """
+        if not reaction_ids:
+            return self
+        return Compiler(self.xls_tables, reaction_ids, self.workers, \
+            self.factorise_k, self.local_functions, self.max_rules, self.budget_action)
+
+    def run_rxncon(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True):
+        """
+        Returns Rxncon object after run_process.
         """
         rxncon = Rxncon(self.xls_tables)
-        rxncon.run_process(add_translation, add_missing_reactions, add_complexes, add_contingencies)
+        rxncon.run_process(add_translation, add_missing_reactions, add_complexes, add_contingencies, \
+            self.workers, self.factorise_k, self.max_rules, self.budget_action)
+        return rxncon
+
+    def get_bngl(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True):
+        """
+        Returns Bngl object (rxncon reactions translated into rules).
+        """
+        rxncon = self.run_rxncon(add_translation, add_missing_reactions, add_complexes, add_contingencies)
         bngl = Bngl(rxncon.reaction_pool, \
             rxncon.molecule_pool, rxncon.contingency_pool, rxncon.war)
+        bngl.local_functions = self.local_functions
+        return bngl
+
+    def translate(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True):
+        """
+        Translates Rxncon data into bngl string.
+        Uses Rxncon and Bngl objects.
+        """
+        bngl = self.get_bngl(add_translation, add_missing_reactions, add_complexes, add_contingencies)
         bngl_src = bngl.get_src()
         return bngl_src
 
+    def write_to(self, fileobj, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True):
+        """
+        Translates Rxncon data and writes bngl code to the file object.
+        Output is streamed (see BnglOutput.write_to).
+        """
+        bngl = self.get_bngl(add_translation, add_missing_reactions, add_complexes, add_contingencies)
+        bngl.write_to(fileobj)
+
+    def get_rules_and_parameters(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True):
+        """
+        Returns parameters section and rules section (tuple of strings).
+        """
+        bngl = self.get_bngl(add_translation, add_missing_reactions, add_complexes, add_contingencies)
+        output = BnglOutput(bngl.rule_pool, bngl.molecule_pool, bngl.warnings, self.local_functions)
+        output.create_sections_txt()
+        return output.parameters_txt, output.rules_txt
+
+    def get_rxncon(self):
+        """
+        Returns data as rxncon string (quick format).
+        """
+        return str(Rxncon(self.xls_tables))
+
+    def get_json(self, table=None):
+        """
+        Returns json string with all xls_tables
+        or only with the given table (e.g. 'reaction_list').
+        """
+        if table:
+            return json.dumps({table: self.xls_tables[table]}, indent=4, sort_keys=True)
+        return json.dumps(self.xls_tables, indent=4, sort_keys=True)
+
     def write_bngl(self, bngl_src, output_path):
         """
         Writes bngl string to file.
+        To write big models without creating the string use write_to.
         """
         output_file = open(output_path, 'w')
         output_file.write(bngl_src)
+        output_file.close()
@@ -7,13 +7,17 @@ Composite Design Pattern.
 
 import copy
 
-class Contingency:
+class Contingency(object):
     """
     Contingency object is a data structure for rxncon contingency.
     It contain information about target reaction, type of contingency,
     and state that influences the target reaction. 
     Every contingency may have children.
     """
+    __slots__ = ['target_reaction', 'ctype', 'state', 'children', \
+        'inherited_ctype', '_repr', '_repr_src', '_hash']
+    changes = 0 # number of add_child calls, tells caches that trees changed.
+
     def __init__(self, target_reaction=None, ctype=None, state=None):
         """
         @param target_reaction: A_ppi_B, <Bool>
@@ -39,11 +43,16 @@ class Contingency:
         self.state = state
         self.children = []
         self.inherited_ctype = None
-
+        self._repr = None # cached by __repr__ with ctype and state it is made of.
 
     def __repr__(self):
         """Representation of contingency: ctype state, e.g. ! A--B"""
-        return "%s %s" % (self.ctype, self.state)
+        if self._repr is None or self._repr_src[0] is not self.ctype \
+            or self._repr_src[1] is not self.state:
+            self._repr = "%s %s" % (self.ctype, self.state)
+            self._repr_src = (self.ctype, self.state)
+            self._hash = hash(str(self._repr))
+        return self._repr
 
     def __eq__(self, other):
         """
@@ -58,7 +67,8 @@ class Contingency:
 
     def __hash__(self):
         """Anables set operstion."""
-        return str(self).__hash__()
+        repr(self)
+        return self._hash
 
     @property 
     def has_children(self):
@@ -79,45 +89,47 @@ class Contingency:
 
         <MM> has 3 leafs
         """
-        if not node:
-            node = self
         result = 0
-        if not node.has_children:
-            return 0 
-        for child in node.children:
-            if not child.has_children:
-                result += 1
-            else: 
-                result += self.count_leafs(child)
+        for leaf in self.iter_leafs(node):
+            result += 1
         return result
 
     def get_leafs(self, node = None):
         """
         Returns all leaf contingencies.
         """
-        if not node:
-            node = self
-        result = []
-        if not node.has_children:
-            return [] 
-        for child in node.children:
-            if not child.has_children:
-                result += [child]
-            else: 
-                result += self.get_leafs(child)
-        return result
+        return list(self.iter_leafs(node))
 
     def get_children(self, node=None):
         """
         Returns all children - leafs and booleans.
         """
-        result = []
+        return list(self.iter_children(node))
+
+    def iter_children(self, node=None):
+        """
+        Yields all children - leafs and booleans,
+        each parent before its children (without recursion).
+        """
         if not node:
-            node = self            
-        for child in node.children:
-                result += [child]
-                result += self.get_children(child)
-        return result
+            node = self
+        stack = [iter(node.children)]
+        while stack:
+            for child in stack[-1]:
+                yield child
+                if child.children:
+                    stack.append(iter(child.children))
+                break
+            else:
+                stack.pop()
+
+    def iter_leafs(self, node=None):
+        """
+        Yields all leaf contingencies in order of get_children.
+        """
+        for child in self.iter_children(node):
+            if not child.children:
+                yield child
 
     def add_child(self, contingency):
         """
@@ -128,6 +140,7 @@ class Contingency:
         else:
             contingency.inherited_ctype = self.ctype
         self.children.append(contingency)
+        Contingency.changes += 1
         
     def is_parent(self, contingency):
         """
@@ -27,12 +27,20 @@ and updating the rate for the new one.
 How rate is updated for K+/K-:
 - 
 
+FactorisedReactions keeps reactions with K+/K- contingencies
+as base reactions and a list of modifiers (K+/K- contingencies)
+and builds the 2^k alternative reactions one by one when needed
+(they are not kept).
+
 TODO: How to apply cont like A_P+_B; A--B
 """
 
+import copy_reg
 from contingency_factory import ContingencyWrapper
 from rxnconcompiler.molecule.molecule import Molecule
 from rxnconcompiler.biological_complex.biological_complex import BiologicalComplex
+from rxnconcompiler.reaction.reaction_container import ReactionContainer
+from rxnconcompiler.molecule.state import StateTable
 
 
 class ContingencyApplicator():
@@ -246,7 +254,33 @@ class ContingencyApplicator():
         for compl in reaction.substrat_complexes:
             self.apply_on_complex(compl, cont)
 
-    def apply_input_on_container(self, container, cont):
+    def apply_required_on_reaction(self, reaction, cont):
+        """
+        Applys x or ! contingency (no Input) on a single reaction.
+        """
+        if cont.state.type == 'Association' and cont.ctype == '!':
+            self.apply_positive_association(reaction, cont)
+        elif cont.state.type == "Intraprotein" and cont.ctype == '!':
+            self.apply_positive_intraprotein(reaction,cont)
+        else:
+            self.apply_on_reaction(reaction, cont)
+
+    def apply_factorised(self, container, contingencies):
+        """
+        Applys contingencies on a container like apply_on_container
+        but without cloning reactions for each K+/K- contingency.
+
+        Contingencies before the first K+/K- one are applied 
+        on the container. If there is a K+/K- contingency 
+        returns FactorisedReactions that builds reactions 
+        of the container (otherwise None). 
+        """
+        for index, cont in enumerate(contingencies):
+            if cont.state.type != 'Input' and 'k' in cont.ctype:
+                return FactorisedReactions(container, contingencies[index:], self)
+            self.apply_on_container(container, cont)
+
+    def apply_input_on_container(self, container, cont, highest_subrate=None):
         """
         Applys all input contingencies.
         Input contingency is applied by changing reaction rate 
@@ -262,9 +296,13 @@ class ContingencyApplicator():
         - k1*(1-k_Input)                 ---> function for x [Input]
         - k1_1*(1-k_Input)+k1_2*k_Input  ---> for K+/K- and all reversed reactions  
           (complex must be able to dissociate even when input is not present an more)
+
+        highest_subrate - used instead of container.highest_subrate when given
+                          (FactorisedReactions updates one reaction at a time).
         """
         # establish new ids for rates - num1, num2
-        highest_subrate = container.highest_subrate  # int
+        if highest_subrate is None:
+            highest_subrate = container.highest_subrate  # int
         if highest_subrate == 0:
             num1 = '%s_1' % container.rid
             num2 = '%s_2' % container.rid
@@ -353,12 +391,7 @@ class ContingencyApplicator():
 
         elif cont.ctype in ['x', '!']:
             for reaction in container:
-                if cont.state.type == 'Association' and cont.ctype == '!':
-                    self.apply_positive_association(reaction, cont)
-                elif cont.state.type == "Intraprotein" and cont.ctype == '!':
-                    self.apply_positive_intraprotein(reaction,cont)
-                else:
-                    self.apply_on_reaction(reaction, cont)
+                self.apply_required_on_reaction(reaction, cont)
           
         elif 'k' in cont.ctype:
             #rate_dict = self.prepare_rates_dict()
@@ -401,4 +434,191 @@ class ContingencyApplicator():
                 self.apply_on_reaction(reaction, neg_cont)               
                 container.add_reaction(reaction)
                 new_rate_ids = self.get_rate_ids(reaction, container, subrate, False)
-                reaction.rate.update_name(new_rate_ids[0], new_rate_ids[1])
\ No newline at end of file
+                reaction.rate.update_name(new_rate_ids[0], new_rate_ids[1])
+
+
+class RateVariant(object):
+    """
+    Rate of one reaction built by FactorisedReactions.
+    Stands for the reaction when rates are updated
+    (ReactionContainer.add_reaction, highest_subrate, 
+    ContingencyApplicator.apply_input_on_container, get_rate_ids).
+    """
+    __slots__ = ['rid', 'rate', 'definition']
+
+    def __init__(self, rate, definition):
+        self.rid = None
+        self.rate = rate
+        self.definition = definition
+
+
+class FactorisedReactions(ReactionContainer):
+    """
+    ReactionContainer with K+/K- contingencies
+    kept as base reactions and a list of binary modifiers.
+    Each modifier (K+/K- contingency) is applied 
+    as positive (! for K+) or negative (x for K+) contingency, 
+    so there are len(base) * 2^k reactions.
+
+    Reactions are not kept: each one is built (and run) 
+    when it is needed (iteration, [index]) and dropped by the caller,
+    in the order and with the rids and rates given by 
+    ContingencyApplicator.apply_on_container:
+    index = base index + len(base) * bits 
+    (bit j set ---> negative version of modifier j).
+
+    Rate ids of a new K+/K- variant depend on the highest 
+    subrate of the whole container (highest_subrate). 
+    For every base reaction the variant with all modifiers 
+    negative has the highest ids (ids only grow or are replaced 
+    by the same value for all variants), so subrates of all steps 
+    are calculated once on len(base) variants (get_subrates).
+    """
+    def __init__(self, container, contingencies, applicator):
+        """
+        container     - ReactionContainer, its reactions are the base.
+        contingencies - contingencies to apply, the first one is K+/K-.
+        applicator    - ContingencyApplicator.
+        """
+        ReactionContainer.__init__(self)
+        self.name = container.name
+        self.rid = container.rid
+        self.rtype = container.rtype
+        self.base = list(container)
+        self.applicator = applicator
+        self.steps = [] # (contingency, bit, positive, negative)
+        self.modifiers = []
+        for cont in contingencies:
+            if cont.state.type != 'Input' and 'k' in cont.ctype:
+                self.steps.append((cont, len(self.modifiers), \
+                    ContingencyWrapper(cont, 'positive').get_contingency(), \
+                    ContingencyWrapper(cont, 'negative').get_contingency()))
+                self.modifiers.append(cont)
+            else:
+                self.steps.append((cont, None, None, None))
+        self.subrates = self.get_subrates()
+
+    def __repr__(self):
+        return "FactorisedReactions for %s: %i reactions" % (self.name, len(self))
+
+    def __len__(self):
+        return len(self.base) * 2 ** len(self.modifiers)
+
+    def __reduce__(self):
+        """Pickles attributes only (not iterated reactions), used by Rxncon.run_parallel."""
+        return (copy_reg.__newobj__, (FactorisedReactions,), self.__dict__)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        """Returns new Reaction object with given index after run_reaction."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('reaction index out of range')
+        reaction = self.get_reaction(index)
+        reaction.run_reaction()
+        return reaction
+
+    def run_reactions(self):
+        """
+        Builds and runs every reaction once, so the applicator 
+        records warnings (not applied contingencies). 
+        Later reactions are built without warnings. 
+        Reactions are not kept.
+        """
+        for reaction in self:
+            pass
+        self.applicator = ContingencyApplicator()
+
+    def get_single(self, variant):
+        """Returns ReactionContainer with the rid of this one and a single variant."""
+        single = ReactionContainer()
+        single.rid = self.rid
+        single.append(variant)
+        return single
+
+    def update_rate(self, variant, subrate, positive):
+        """Updates rate ids of RateVariant for K+/K- step (like apply_on_container)."""
+        new_ids = self.applicator.get_rate_ids(variant, self.get_single(variant), subrate, positive)
+        variant.rate.update_name(new_ids[0], new_ids[1])
+
+    def get_subrates(self):
+        """
+        Returns highest_subrate of the container before each step 
+        calculated on the variants with all modifiers negative
+        (one for each base reaction).
+        """
+        variants = ReactionContainer()
+        variants.rid = self.rid
+        for reaction in self.base:
+            variants.append(RateVariant(reaction.rate.clone(), reaction.definition))
+        result = []
+        for cont, bit, positive, negative in self.steps:
+            subrate = variants.highest_subrate
+            result.append(subrate)
+            if cont.state.type == 'Input':
+                self.applicator.apply_input_on_container(variants, cont, subrate)
+            elif bit is not None:
+                for variant in variants:
+                    self.update_rate(variant, subrate, False)
+        return result
+
+    def get_rate(self, index):
+        """
+        Returns RateVariant of the reaction with given index
+        (rate updated like in apply_on_container, reaction is not built).
+        """
+        base = self.base[index % len(self.base)]
+        bits = index // len(self.base)
+        variant = RateVariant(base.rate.clone(), base.definition)
+        for (cont, bit, positive, negative), subrate in zip(self.steps, self.subrates):
+            if cont.state.type == 'Input':
+                self.applicator.apply_input_on_container(self.get_single(variant), cont, subrate)
+            elif bit is not None:
+                self.update_rate(variant, subrate, not bits >> bit & 1)
+        variant.rid = '%s_%i' % (self.rid, index + 1)
+        return variant
+
+    def get_reaction(self, index):
+        """
+        Returns new Reaction object with given index (not run).
+        """
+        reaction = self.base[index % len(self.base)].clone()
+        bits = index // len(self.base)
+        for cont, bit, positive, negative in self.steps:
+            if cont.state.type == 'Input':
+                continue
+            elif bit is None:
+                if cont.ctype in ['x', '!']:
+                    self.applicator.apply_required_on_reaction(reaction, cont)
+            elif bits >> bit & 1:
+                self.applicator.apply_on_reaction(reaction, negative)
+            elif cont.state.type == 'Association':
+                self.applicator.apply_positive_association(reaction, positive)
+            else:
+                self.applicator.apply_on_reaction(reaction, positive)
+        variant = self.get_rate(index)
+        reaction.rid = variant.rid
+        reaction.rate = variant.rate
+        return reaction
+
+    def get_common_contingencies(self, state_table=None):
+        """
+        Like ReactionContainer.get_common_contingencies,
+        reactions are built one by one (only their masks are kept).
+        """
+        if state_table is None:
+            state_table = StateTable()
+        first = None
+        for reaction in self:
+            cont_list = reaction.get_contingencies()
+            masks = state_table.get_masks(cont_list)
+            if first is None:
+                first = cont_list
+                present, absent = masks
+            else:
+                present, absent = state_table.get_common_masks([(present, absent), masks])
+        return state_table.select(first, present, absent)
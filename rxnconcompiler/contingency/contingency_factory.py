@@ -12,6 +12,7 @@ ContingencyFactory   - parses contingencies from xls to a tree.
 
 from contingency import Contingency
 from rxnconcompiler.molecule.state import get_state, Component
+from rxnconcompiler.util.rxncon_errors import RxnconParserError
 
 
 class ContingencyWrapper:
@@ -64,7 +65,85 @@ class ContingencyPool(dict):
     """
     def __init__(self):
         dict.__init__(self)
-        pass
+        self.reset_leafs()
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.reset_leafs()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.reset_leafs()
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.reset_leafs()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, *args):
+        self.reset_leafs()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.reset_leafs()
+        return dict.popitem(self)
+
+    def clear(self):
+        dict.clear(self)
+        self.reset_leafs()
+
+    def reset_leafs(self):
+        """Drops leafs cached by get_leafs."""
+        self._leafs = None
+        self._leaf_index = None
+        self._ctype_index = None
+        self._leaf_changes = None
+        self._leaf_roots = None
+
+    def get_leafs(self):
+        """
+        Returns list of leaf contingencies of all roots
+        (in order of roots and Contingency.get_leafs). 
+
+        Built when first needed and kept until a contingency 
+        gets a new child (Contingency.changes) or a root 
+        is added, replaced or removed. 
+        """
+        if self._leafs is None or self._leaf_changes != Contingency.changes \
+            or self._leaf_roots != len(self):
+            self._leafs = []
+            self._leaf_index = {}
+            self._ctype_index = {}
+            for root in self.values():
+                for leaf in root.iter_leafs():
+                    self._leafs.append(leaf)
+                    self._leaf_index.setdefault(leaf.state.type, []).append(leaf)
+                    for ctype in set([leaf.ctype, leaf.inherited_ctype]):
+                        if ctype:
+                            key = (leaf.state.type, ctype)
+                            self._ctype_index.setdefault(key, []).append(leaf)
+            self._leaf_changes = Contingency.changes
+            self._leaf_roots = len(self)
+        return self._leafs
+
+    def get_leaf_index(self):
+        """
+        Returns dict state type: leaf contingencies (as in get_leafs).
+        """
+        self.get_leafs()
+        return self._leaf_index
+
+    def get_ctype_index(self):
+        """
+        Returns dict (state type, ctype): leaf contingencies (as in get_leafs).
+        A leaf is under its ctype and its inherited_ctype.
+        """
+        self.get_leafs()
+        return self._ctype_index
 
     def get_all_booleans(self):
         """
@@ -72,8 +151,7 @@ class ContingencyPool(dict):
         """
         result =  []
         for root in self.values():
-            leafs = root.get_children()
-            for leaf in leafs:
+            for leaf in root.iter_children():
                 if leaf.state.type == 'Boolean':
                     result.append(leaf)
         return result
@@ -99,6 +177,7 @@ class ContingencyPool(dict):
             for child in root.children:
                 if cont == child:
                     root.children.remove(cont)
+        self.reset_leafs()
 
     def get_required_states(self):
         """
@@ -112,12 +191,10 @@ class ContingencyPool(dict):
         @todo:   what about ! <OR> are all states required? 
         """
         result = []
-        for root in self.values():
-            children = root.get_leafs()
-            for cont in children:
-                if cont.ctype in ['!', 'k+', 'k-', 'x'] or cont.inherited_ctype in ['!', 'k+', 'k-', 'x']:
-                    if cont.state.type in ['Association', 'Covalent Modification', 'Relocalisation', 'Intraprotein']:
-                        result.append(cont.state)
+        for cont in self.get_leafs():
+            if cont.ctype in ['!', 'k+', 'k-', 'x'] or cont.inherited_ctype in ['!', 'k+', 'k-', 'x']:
+                if cont.state.type in ['Association', 'Covalent Modification', 'Relocalisation', 'Intraprotein']:
+                    result.append(cont.state)
         return set(result)
 
     def get_kind_contingencies(self, kind):
@@ -126,13 +203,10 @@ class ContingencyPool(dict):
 
         Used when updating contingencies.
         """
+        index = self.get_ctype_index()
         result = []
-        for root in self.values():
-            children = root.get_leafs()
-            for cont in children:
-                if cont.ctype in ['!', 'k+', 'k-'] or cont.inherited_ctype in ['!', 'k+', 'k-']:
-                    if cont.state.type in [kind]:
-                        result.append(cont)
+        for ctype in ['!', 'k+', 'k-']:
+            result += index.get((kind, ctype), [])
         return set(result)
 
     def get_modification_contingencies(self):
@@ -179,58 +253,124 @@ class ContingencyFactory(dict):
         dict.__init__(self)
         self.xls_tables = xls_tables
         self.pool = ContingencyPool()
+        self.boolean_index = {} # boolean name (<MM>): boolean contingencies with this name
         
     def parse_contingencies(self):
         """
         Returns a ContingencyPool object.
         It is a dict that holds all top nodes contingencies of a reaction.
         Key - reaction string. Value - list of contingencies. 
-        """
-        # Could be recurrent because of boolean nodes
-        # (we cannot add child if the parent is not there)
-        # but then we have risk that we have infinite loop 
-        # if the parent does not exist.
-        # For now we have parse_later but it may not be sufficient in all cases.
-        parse_later = []
-        complexes = []
-
-        for row in self.xls_tables['contingency_list']:      
-            result = self.parse_contingency(row)
-            if result and result[0] == 'no parent':
-                parse_later.append(result[1])
-            elif result and result[0] == 'complex':
-                complexes.append(result[1])
-        # children for booleans for which there was no parent in first round
-        for row in parse_later:
-            self.parse_contingency(row)
-
-        #self.parse_complexes(complexes)
+
+        Rows with a boolean target (<MM>; AND B-{P}) are grouped 
+        by boolean name and added after all rows were read, 
+        booleans in order of nesting (parents first) 
+        so rows can come in any order. 
+        Children of a boolean that is never used are skipped.
+        """
+        boolean_rows = {}
+        names = []
+        for row in self.xls_tables['contingency_list']:
+            cont = self.parse_contingency(row)
+            reaction = row['Target']
+            if reaction.startswith('<'):
+                if reaction not in boolean_rows:
+                    boolean_rows[reaction] = []
+                    names.append(reaction)
+                boolean_rows[reaction].append(cont)
+            else:
+                self.pool.setdefault(reaction, Contingency(reaction))        
+                self.pool[reaction].add_child(cont)
+                self.add_to_index(cont)
+
+        for name in self.sort_booleans(names, boolean_rows):
+            parents = self.find_parent(name)
+            if not parents:
+                continue
+            for cont in boolean_rows[name]:
+                for parent in parents:
+                    if cont not in parent.children:
+                        parent.add_child(cont)
+                self.add_to_index(cont)
         return self.pool
 
     def parse_contingency(self, row):
         """
-        Parses single contingency from row.
-        If it is not possible - parent is not yet there returns row.
+        Creates contingency from a single row.
         """
         reaction = row['Target']
-
         ctype = row['Contingency']
         if '--' in ctype:
             sid = ctype 
         else:
             sid = None
         state = get_state(row['Modifier'], sid)
-        cont = self.create_contingency(reaction, ctype, state)
-        if not reaction.startswith('<'):
-            self.pool.setdefault(reaction, Contingency(reaction))        
-            self.pool[reaction].add_child(cont)
-        elif reaction.startswith('<'):
-            parents  = self.find_parent(cont)
-            if not parents:
-                return 'no parent', row
-            for parent in parents:
-                if cont not in parent.children:
-                    parent.add_child(cont)
+        return self.create_contingency(reaction, ctype, state)
+
+    def add_to_index(self, cont):
+        """
+        Adds boolean contingency to boolean_index 
+        (other contingencies are skipped).
+        """
+        if cont.state.type == 'Boolean':
+            parents = self.boolean_index.setdefault(str(cont.state), [])
+            if cont not in parents:
+                parents.append(cont)
+
+    def sort_booleans(self, names, boolean_rows):
+        """
+        Returns boolean names sorted so that a boolean comes 
+        after all booleans that contain it (topological order).
+        Ties keep the order of the first row of a boolean.
+
+        Raises RxnconParserError when booleans contain each other.
+        """
+        children = {}
+        indegree = dict((name, 0) for name in names)
+        for name in names:
+            children[name] = []
+            for cont in boolean_rows[name]:
+                child = str(cont.state)
+                if cont.state.type == 'Boolean' and child in indegree:
+                    children[name].append(child)
+                    indegree[child] += 1
+
+        result = []
+        ready = [name for name in names if indegree[name] == 0]
+        while ready:
+            name = ready.pop(0)
+            result.append(name)
+            for child in children[name]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+
+        if len(result) < len(names):
+            raise RxnconParserError('Cycle in boolean contingencies: %s' % \
+                ' -> '.join(self.find_cycle(names, children, indegree)))
+        return result
+
+    def find_cycle(self, names, children, indegree):
+        """
+        Returns list of boolean names that make a cycle
+        (starting from the first name in names, repeated at the end).
+        Uses booleans left by sort_booleans (indegree > 0), 
+        each of them has a parent among them.
+        """
+        parents = {}
+        for name in children:
+            for child in children[name]:
+                if indegree[name] > 0 and indegree[child] > 0:
+                    parents.setdefault(child, name)
+        name = [name for name in names if indegree[name] > 0][0]
+        path = []
+        while name not in path:
+            path.append(name)
+            name = parents[name]
+        cycle = path[path.index(name):]
+        cycle.reverse()
+        first = cycle.index(min(cycle, key=names.index))
+        cycle = cycle[first:] + cycle[:first]
+        return cycle + [cycle[0]]
 
     def get_components_from_reaction(self, reaction_string):
         """
@@ -249,38 +389,15 @@ class ContingencyFactory(dict):
             component2 = Component(react[2])
         return component1, component2
 
-    def find_parent(self, contingency):
+    def find_parent(self, name):
         """
-        Returns a parent (BooleanContingency object)
-        for given contingency.
+        Returns a list of parents (boolean contingencies)
+        for contingencies with given target (boolean name).
         """
-        bools = []
-        for reaction in self.pool:
-            bools += self.get_booleans(self.pool[reaction].children)
-        parents = []
-        for cont in bools:
-            if cont.is_parent(contingency):
-                parents.append(cont)
-        if parents:
-            return parents 
+        if name in self.boolean_index:
+            return self.boolean_index[name] 
         return None   
 
-    def get_booleans(self, cont_list):
-        """
-        Returns a list of all BooleanContingencies 
-        from given list of contingencies.
-        It uses recurrence to check 
-        whether there are any booleans among children 
-        of the boolean that has been already found.
-        """
-        bools = []
-        for cont in cont_list:
-            if cont.state.type == 'Boolean':
-                bools.append(cont)
-                if cont.children:
-                    bools += self.get_booleans(cont.children)
-        return bools
-
     def create_contingency(self, target_reaction, ctype, state):
         """
         Creates Contingency objects.
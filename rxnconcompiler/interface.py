@@ -3,22 +3,43 @@
 """
 Module rxnconCompiler_interface containes 
 functions from Compiler used in the GUI.
+
+Each function accepts raw input (xls/txt/json/dict) or a Compiler.
+Passing a Compiler lets several outputs share one parsed input.
 """
 
+import sys
 import argparse
-import json
-from rxncon import Rxncon
 from compiler import Compiler
-from bngl.bngl_output import BnglOutput
-from bngl.bngl import Bngl
+from rxnconcompiler.util.profiling import PROFILER
+from rxnconcompiler.util.rxncon_errors import RuleBudgetError
+from rxnconcompiler.parser.parse_cache import set_parse_cache, DEFAULT_MAX_SIZE
+
+def get_compiler(inp, reaction_ids=None, workers=None):
+    """
+    Returns Compiler (compilation session) for given input.
+    inp can be an already existing Compiler,
+    then the input is not parsed again.
+    """
+    if isinstance(inp, Compiler):
+        comp = inp.filter(reaction_ids)
+        if workers:
+            comp.workers = workers
+        return comp
+    return Compiler(inp, reaction_ids, workers)
+
+def write_output(text, file_name):
+    """Writes text to file."""
+    f = open(file_name, 'w')
+    f.write(text)
+    f.close()
 
 def parse(rxncon_input):
     """
     returns dict
-    gets xls/txt/dict
+    gets xls/txt/dict/Compiler
     """
-    comp = Compiler(rxncon_input)
-    return comp.xls_tables
+    return get_compiler(rxncon_input).xls_tables
 
 def filter_reactions(xls_tables, id_list=None):
     """
@@ -26,103 +47,75 @@ def filter_reactions(xls_tables, id_list=None):
     if id_list empty returns whole xls_tables,
     else xls_tables[reaction_list] containsindicated reactions.
     """
-    comp = Compiler(xls_tables)
-    xls_tables = comp.xls_tables
-    if not id_list:
-        return xls_tables
-    temp = []
-    id_list = [str(rid) for rid in id_list]
-    for reaction in xls_tables['reaction_list']:
-        if str(reaction['ReactionID']) in id_list:
-            temp.append(reaction)
-    new_xls = {}
-    new_xls['reaction_list'] = temp
-    new_xls['reaction_definition'] = xls_tables['reaction_definition']
-    new_xls['contingency_list'] = xls_tables['contingency_list']
-    return new_xls
-
-
-def get_bngl(inp, reaction_ids=None, max_stoich=4, file_name=None):
+    return get_compiler(xls_tables, id_list).xls_tables
+
+
+def get_bngl(inp, reaction_ids=None, max_stoich=4, file_name=None, workers=None, local_functions=False, \
+    max_rules=None, budget_action='error'):
     """
     Returns BNGL code for given xls_tables.
+    When file_name given BNGL code is streamed to the file.
+    workers - number of processes used to process reactions.
+    local_functions - K+/K- contingencies as local functions
+                      instead of separate rules (when possible).
+    max_rules - estimated number of rules is checked before reactions 
+                are processed, when it is bigger RuleBudgetError is raised
+                (budget_action 'error') or a warning is added ('warn').
     """
-    comp = Compiler(inp)
-    xls_tables = comp.xls_tables
-    xls_tables = filter_reactions(xls_tables, reaction_ids)
+    compiler = get_compiler(inp, reaction_ids, workers)
+    if local_functions:
+        compiler.local_functions = True
+    if max_rules is not None:
+        compiler.max_rules = max_rules
+        compiler.budget_action = budget_action
     if not file_name:
-        return Compiler(xls_tables).translate(True, True, True, True)
-    f = open(file_name, 'w')
-    f.write(Compiler(xls_tables).translate(True, True, True, True))
-    f.close()
+        return compiler.translate(True, True, True, True)
+    output_file = open(file_name, 'w')
+    compiler.write_to(output_file, True, True, True, True)
+    output_file.close()
 
 def get_rxncon(inp, file_name=None):
     """
     Returns data as rxncon string. 
     """
+    rxncon_str = get_compiler(inp).get_rxncon()
     if not file_name:
-        return str(Rxncon(inp))
-    f = open(file_name, 'w')
-    f.write(str(Rxncon(inp)))
-    f.close()
+        return rxncon_str
+    write_output(rxncon_str, file_name)
 
 def get_json_reactions(inp, file_name=None):
     """Returns rxncon dict as a json string."""
-    comp = Compiler(inp)
-    reactions = json.dumps({'reaction_list': comp.xls_tables['reaction_list']}, indent=4, sort_keys=True)
+    reactions = get_compiler(inp).get_json('reaction_list')
     if file_name:
-        f = open(file_name, 'w')
-        f.write(reactions)
-        f.close()
+        write_output(reactions, file_name)
     return reactions    
 
 def get_json_contingencies(inp, file_name=None):
     """Returns contingency list as json """
-    comp = Compiler(inp)
-    cont = json.dumps({'contingency_list': comp.xls_tables['contingency_list']}, indent=4, sort_keys=True)
+    cont = get_compiler(inp).get_json('contingency_list')
     if file_name:
-        f = open(file_name, 'w')
-        f.write(cont)
-        f.close()
+        write_output(cont, file_name)
     return cont
 
 def get_json_definitions(inp, file_name=None):
-    comp = Compiler(inp)
-    definitions = json.dumps({'reaction_definition': comp.xls_tables['reaction_definition']}, indent=4, sort_keys=True)
+    definitions = get_compiler(inp).get_json('reaction_definition')
     if file_name:
-        f = open(file_name, 'w')
-        f.write(definitions)
-        f.close()
+        write_output(definitions, file_name)
     return definitions
 
 def get_json(inp, file_name=None):
     """Returns json format for rxncon"""
-    comp = Compiler(inp)
-    rxn = json.dumps(comp.xls_tables, indent=4, sort_keys=True)
+    rxn = get_compiler(inp).get_json()
     if file_name:
-        f = open(file_name, 'w')
-        f.write(rxn)
-        f.close()
+        write_output(rxn, file_name)
     return rxn    
 
     
-def get_bngl_reactions(inp, reaction_ids=None):
+def get_bngl_reactions(inp, reaction_ids=None, workers=None):
     """
     Returns rules secion and parameters section.
     """
-    # xls_tables
-    comp = Compiler(inp)
-    xls_tables = comp.xls_tables
-    xls_tables = filter_reactions(xls_tables, reaction_ids)
-    # Rxncon
-    rxncon = Rxncon(xls_tables)
-    rxncon.run_process(True, True, True, True)
-    # Bngl
-    bngl = Bngl(rxncon.reaction_pool, \
-            rxncon.molecule_pool, rxncon.contingency_pool, rxncon.war)
-    # BnglOutput
-    output = BnglOutput(bngl.rule_pool, bngl.molecule_pool, bngl.warnings)
-    output.create_sections_txt()
-    return output.parameters_txt, output.rules_txt
+    return get_compiler(inp, reaction_ids, workers).get_rules_and_parameters(True, True, True, True)
 
 
         
@@ -145,8 +138,29 @@ def main():
     parser.add_argument('--rxncon', dest='mode', action='store_const', \
         const='rxncon', default='bngl', \
         help='Indicate the output type as rxncon (default: bngl).')
+    parser.add_argument("-w", "--workers", type=int, default=None, \
+        help="Number of processes used to process reactions (default: 1).")
+    parser.add_argument("--local-functions", action='store_true', \
+        help="Write K+/K- contingencies as local functions instead of separate rules.")
+    parser.add_argument("--max-rules", type=int, default=None, \
+        help="Stop when the estimated number of rules is bigger.")
+    parser.add_argument("--budget-warn", dest='budget_action', action='store_const', \
+        const='warn', default='error', \
+        help="Only add a warning when --max-rules is exceeded.")
+    parser.add_argument("--parse-cache", default=None, \
+        help="Directory for parsed xls files (repeated parsing of the same file is skipped).")
+    parser.add_argument("--parse-cache-size", type=int, default=DEFAULT_MAX_SIZE / (1024 * 1024), \
+        help="Maximal size of the parse cache in MB (default: %(default)s).")
+    parser.add_argument("--profile", action='store_true', \
+        help="Print time of compilation stages and counters.")
+    parser.add_argument("--profile-json", default=None, \
+        help="Path to the file for profile data in json (implies --profile).")
     args = parser.parse_args()
 
+    if args.profile or args.profile_json:
+        PROFILER.enable()
+    if args.parse_cache:
+        set_parse_cache(args.parse_cache, args.parse_cache_size * 1024 * 1024)
     if args.rxncon_input:
         output_file = args.output or 'rxnconcompiler.output'        
         if args.mode == 'json':
@@ -154,7 +168,16 @@ def main():
         elif args.mode == 'rxncon':
             get_rxncon(args.rxncon_input, output_file)
         elif args.mode == 'bngl':
-            get_bngl(args.rxncon_input, None, args.max_stoich, output_file)
+            try:
+                get_bngl(args.rxncon_input, None, args.max_stoich, output_file, args.workers, \
+                    args.local_functions, args.max_rules, args.budget_action)
+            except RuleBudgetError, error:
+                parser.exit(1, 'ERROR: %s\n' % error)
+    if PROFILER.enabled:
+        PROFILER.disable()
+        sys.stderr.write(PROFILER.get_table())
+        if args.profile_json:
+            write_output(PROFILER.to_json(), args.profile_json)
 
 if __name__ == '__main__':
     main()
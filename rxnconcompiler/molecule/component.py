@@ -6,11 +6,13 @@ Class Component    - cleaps information about name, domain and id.
 
 from domain_factory import DomainFactory
 
-class Component:
+class Component(object):
     """
     Component object keeps informations about name, domain and id.
     It is used in State. 
     """
+    __slots__ = ['name', 'domain', 'cid', 'second_domain']
+
     def __init__(self, name, domain=None, cid=None):
         self.name = name.strip()
         self.domain = domain
@@ -46,6 +48,16 @@ class Component:
                 return 1
         else: return 0        
 
+    def __deepcopy__(self, memo):
+        """Returns new Component (all attributes are strings)."""
+        new = Component.__new__(Component)
+        memo[id(self)] = new
+        new.name = self.name
+        new.domain = self.domain
+        new.cid = self.cid
+        new.second_domain = self.second_domain
+        return new
+
     def exact_compare(self, other):
         """
         Checks not only name (__cmp__) but also domain.
@@ -19,14 +19,22 @@ Each molecule gets its own internal id.
 Molecules in the complex are unique,
 even when they have the same name.
 """
-def id_gen():
-    counter = 1
+def id_gen(counter=1):
     while True:
         yield counter
         counter += 1
 
 get_id = id_gen()
 
+def reset_id(counter):
+    """
+    Restarts internal ids from counter.
+    Used by parallel run_process to give each 
+    ReactionContainer its own range of ids.
+    """
+    global get_id
+    get_id = id_gen(counter)
+
 class MoleculePool(list):
     """
     MoleculePool object is a list of all reactants.
@@ -45,20 +53,26 @@ class MoleculePool(list):
         will be represented as one molecule with domains from both reactions.
 
         molecule_name: MoleculeInstance
+
+        Merged when called - molecules in the pool (reactants) 
+        change after they are added (reactions, contingencies).
+        Contingencies already merged for a name are kept in a set (as strings).
         """
         temp = {}
+        seen = {}
         for mol in self:
-            
             conts = mol.get_contingencies()
-
-
-            if mol.name in temp.keys():
+            if mol.name in temp:
                 conts_in = temp[mol.name]
+                keys_in = seen[mol.name]
                 for cont in conts:
-                    if str(cont) not in [str(x) for x in conts_in]:
-                        temp[mol.name].append(cont)
+                    key = str(cont)
+                    if key not in keys_in:
+                        keys_in.add(key)
+                        conts_in.append(cont)
             else:
-                temp[mol.name] = mol.get_contingencies()
+                temp[mol.name] = conts
+                seen[mol.name] = set([str(cont) for cont in conts])
 
         result = {}
         for mol in temp.keys():
@@ -70,13 +84,17 @@ class MoleculePool(list):
 
 
 
-class Molecule:
+class Molecule(object):
     """
     Keeps data about a single molecule and its state.
     Molecule objects can be added.
     States can be added and removed to Molecule (e.g. add_bond, ...).
     Information about states, contingencies and domains can be obtained.
     """
+    __slots__ = ['name', '_id', 'binding_partners', 'binding_sites', \
+        'modifications', 'modification_sites', 'localisation', 'mid', \
+        'alternative_localisations', 'is_reactant']
+
     def __init__(self, name):
         """
         Molecule holds information about:
@@ -175,11 +193,19 @@ class Molecule:
         print "Modification sites: %s" % str(self.modification_sites)
         # print "Localisation:       %s" % str(self.localisation) 
 
-    def clone(self):
+    def clone(self, same_id=False):
         """
         Clones itself.
         E.g. returns another instance of itself
         which can be modified without modifing the origin.
+
+        State objects are shared with the origin (they do not change 
+        when molecule changes, lists of states are copied).
+        Code that changes a State of a cloned molecule
+        needs to copy it first (see Relocalisation.run_reaction).
+
+        same_id - when True clone keeps _id of the origin
+                  (exact copy, used when cloning reactions).
         """
         #KR: this copying means we're in performance hell.
         #    As long as the MAPK runs OK --> no problem.
@@ -189,16 +215,20 @@ class Molecule:
         #       performance isssues of other methods,
         #       does it really?
 
-        name = copy.deepcopy(self.name)
-        new = Molecule(name)
-        new.binding_partners = copy.deepcopy(self.binding_partners) 
-        new.binding_sites = copy.deepcopy(self.binding_sites)
-        new.modifications = copy.deepcopy(self.modifications) 
-        new.modification_sites = copy.deepcopy(self.modification_sites) 
-        new.localisation = copy.deepcopy(self.localisation)   
-        new.mid = copy.deepcopy(self.mid)  
-        new.alternative_localisations = copy.deepcopy(self.alternative_localisations)
-        new.is_reactant = copy.deepcopy(self.is_reactant)
+        if same_id:
+            new = Molecule.__new__(Molecule)
+            new.name = self.name
+            new._id = self._id
+        else:
+            new = Molecule(self.name)
+        new.binding_partners = list(self.binding_partners) 
+        new.binding_sites = list(self.binding_sites)
+        new.modifications = list(self.modifications) 
+        new.modification_sites = list(self.modification_sites) 
+        new.localisation = self.localisation
+        new.mid = self.mid
+        new.alternative_localisations = list(self.alternative_localisations)
+        new.is_reactant = self.is_reactant
         return new
 
     def get_contingencies(self):
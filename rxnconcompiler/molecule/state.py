@@ -3,6 +3,32 @@
 """
 Class State        - represents states.
 Class StateFactory - produces State object out of sa tring. 
+Class StateTable   - numbers states, sets of contingencies become bit masks.
+
+Function intern_key       - returns the single instance of a state key.
+Function clear_state_keys - empties STATE_KEYS.
+
+State keys:
+Every state has a canonical key - its string representation 
+(e.g. A_[AssocB]--B_[AssocA]). It is computed once and kept 
+in the state together with its hash, so str, hash and == 
+do not format the state again. Keys are interned in STATE_KEYS, 
+equal keys are the same string object (compared with is).
+STATE_KEYS is emptied when a Compiler is created, so a long-lived 
+process keeps keys of one compilation only (== still holds between 
+states of different compilations, only the is shortcut is lost).
+The key is dropped when an attribute used in it is set 
+(KEY_ATTRIBUTES). Components are not watched: they are changed 
+only by StateFactory, before the state is used.
+
+State table:
+StateTable gives every distinct state key one bit. A list of 
+! / x contingencies is a pair of ints (present, absent),
+so intersection, difference and contradiction checks 
+are bitwise operations: 
+present & absent != 0 ---> contradiction,
+(present1 & ~present2) | (absent1 & ~absent2) == 0 ---> 1 is a subset of 2.
+One table is kept for the whole BNGL generation (RuleFactory).
 """
 
 import re
@@ -10,7 +36,23 @@ import copy
 from domain_factory import DomainFactory
 from component import Component
 
-class State:
+STATE_KEYS = {}
+KEY_ATTRIBUTES = ['components', 'state_str', 'type', 'modifier', 'sid']
+
+
+def intern_key(key):
+    """
+    Returns the instance of key kept in STATE_KEYS.
+    Adds key when it is not there yet.
+    """
+    return STATE_KEYS.setdefault(key, key)
+
+def clear_state_keys():
+    """Empties STATE_KEYS (called for every new Compiler)."""
+    STATE_KEYS.clear()
+
+
+class State(object):
     """
     State object keeps information about state of 0, 1 or 2 components.
     E.g. 
@@ -29,6 +71,9 @@ class State:
     - Polymer
     - Component
     """
+    __slots__ = ['components', 'state_str', 'type', 'sid', 'modifier', \
+        'not_modifier', 'loc', 'homodimer', '_key', '_hash', '_sorted_components']
+
     def __init__(self):
         self.components = []
         self.state_str = ''
@@ -39,8 +84,29 @@ class State:
         self.not_modifier = None #: valid only for covalent modification (always U) and Relocalisation (substrate localisation).
         self.loc = False # only for localisation, distinguishes between products and substrates.
         self.homodimer = False # only for asocciation, when A--A
+
+    def __setattr__(self, name, value):
+        """Drops cached key when attribute used in the key changes."""
+        object.__setattr__(self, name, value)
+        if name in KEY_ATTRIBUTES:
+            object.__setattr__(self, '_key', None)
        
     def __repr__(self):
+        if self._key is None:
+            self.set_key()
+        return self._key
+
+    def set_key(self):
+        """
+        Computes canonical key of the state (see module doc),
+        its hash and components sorted by name (used in __eq__).
+        """
+        self._key = intern_key(self.get_key_str())
+        self._hash = hash(str(self._key))
+        self._sorted_components = sorted(self.components, key=lambda comp: comp.name)
+
+    def get_key_str(self):
+        """Returns string representation of the state."""
         if self.type == 'Intraprotein':
             return '%s_[%s]--[%s]' % (self.components[0].name, \
                 self.components[0].domain, self.components[0].second_domain)
@@ -55,8 +121,16 @@ class State:
         Compares states only in respect to component names.
         To include domains in comparison use hash function.
         """
+        if self is other:
+            return True
+        if self._key is None:
+            self.set_key()
+        if other._key is None:
+            other.set_key()
+        if self._key is other._key and self.sid == other.sid:
+            return True
         if self.components:
-            if sorted(self.components, key=lambda comp: comp.name) == sorted(other.components, key=lambda comp: comp.name):
+            if self._sorted_components == other._sorted_components:
                 return True
             else:
                 return False
@@ -72,7 +146,9 @@ class State:
         and having sets of states.
         """
         #return (str(self) + str(self.sid)).__hash__()
-        return (str(self)).__hash__()
+        if self._key is None:
+            self.set_key()
+        return self._hash
 
     def has_component(self, component):
         """
@@ -129,6 +205,19 @@ class State:
         new.not_modifier = self.not_modifier
         return new
 
+    def __deepcopy__(self, memo):
+        """
+        Exact copy (with loc and homodimer), components are copied.
+        (copy.deepcopy of a class with __slots__ is slow).
+        """
+        new = State.__new__(State)
+        memo[id(self)] = new
+        for name in State.__slots__:
+            if hasattr(self, name):
+                object.__setattr__(new, name, getattr(self, name))
+        new.components = copy.deepcopy(self.components, memo)
+        return new
+
     def has_bd_domain(self):
         """
         Checks whether 'bd' is a name of any domain in the state.
@@ -139,6 +228,84 @@ class State:
         return False
 
 
+class StateTable:
+    """
+    Assigns an integer (bit) to each distinct state.
+    States are identified by their key (str), 
+    bits are assigned in the order states are seen.
+    """
+    def __init__(self):
+        self.bits = {}   # state key: bit number
+        self.states = [] # bit number: state
+
+    def __len__(self):
+        return len(self.states)
+
+    def get_bit(self, state):
+        """Returns bit number of the state, adds the state when new."""
+        key = str(state)
+        if key not in self.bits:
+            self.bits[key] = len(self.states)
+            self.states.append(state)
+        return self.bits[key]
+
+    def get_mask(self, states):
+        """Returns int with bits of given states set."""
+        mask = 0
+        for state in states:
+            mask |= 1 << self.get_bit(state)
+        return mask
+
+    def get_masks(self, contingencies):
+        """
+        Returns (present, absent) masks for a list of contingencies.
+        x contingencies are absent, all other present.
+        """
+        present = 0
+        absent = 0
+        for cont in contingencies:
+            if cont.ctype == 'x':
+                absent |= 1 << self.get_bit(cont.state)
+            else:
+                present |= 1 << self.get_bit(cont.state)
+        return present, absent
+
+    def get_common_masks(self, masks):
+        """Returns (present, absent) common for all given mask pairs."""
+        present, absent = masks[0]
+        for other_present, other_absent in masks[1:]:
+            present &= other_present
+            absent &= other_absent
+        return present, absent
+
+    def select(self, contingencies, present, absent):
+        """
+        Returns contingencies (keeping the order) 
+        which bits are set in present (! contingencies) 
+        or absent (x contingencies).
+        """
+        result = []
+        for cont in contingencies:
+            mask = absent if cont.ctype == 'x' else present
+            if mask & (1 << self.get_bit(cont.state)):
+                result.append(cont)
+        return result
+
+    def get_states(self, mask):
+        """Returns list of states which bits are set in the mask."""
+        return [self.states[bit] for bit in range(len(self.states)) if mask & (1 << bit)]
+
+    @staticmethod
+    def is_contradictory(present, absent):
+        """Checks whether any state is both present and absent."""
+        return present & absent != 0
+
+    @staticmethod
+    def is_subset(first, second):
+        """Checks whether (present, absent) first is contained in second."""
+        return (first[0] & ~second[0]) | (first[1] & ~second[1]) == 0
+
+
 class StateFactory:
     """
     StateFactory object producess State object based on a string.
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+"""
+Module parse_cache.py - on-disk cache of parsed xls files.
+
+Class ParseCache - directory with parsed xls_tables.
+
+Functions:
+set_parse_cache - turns the cache used by parse_xls on (directory) or off (None).
+get_parse_cache - returns the cache used by parse_xls (None when off).
+
+Entries are xls_tables dicts in cPickle files (<key>.pickle).
+Key: sha1 of the file content and PARSER_VERSION
+(increase PARSER_VERSION when parse_xls produces different tables).
+When files are bigger than max_size together, least recently used
+files are removed (a hit updates the modification time of the file).
+"""
+
+import os
+import hashlib
+import tempfile
+import cPickle
+
+PARSER_VERSION = '1'
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024 # bytes
+EXTENSION = '.pickle'
+
+_CACHE = [None]
+
+
+class ParseCache:
+    """
+    Keeps parsed xls_tables in a directory.
+    Counts hits and misses.
+    """
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __repr__(self):
+        return 'ParseCache: %s, %i hits, %i misses' % (self.directory, self.hits, self.misses)
+
+    def get_key(self, file_path):
+        """Returns key for the file (sha1 of content and parser version)."""
+        sha = hashlib.sha1(PARSER_VERSION + '\0')
+        f = open(file_path, 'rb')
+        try:
+            for block in iter(lambda: f.read(1024 * 1024), ''):
+                sha.update(block)
+        finally:
+            f.close()
+        return sha.hexdigest()
+
+    def get_path(self, key):
+        """Returns path of the entry file."""
+        return os.path.join(self.directory, key + EXTENSION)
+
+    def get(self, key):
+        """
+        Returns xls_tables for the key or None.
+        Entries that can not be read are removed.
+        """
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            f = open(path, 'rb')
+            try:
+                result = cPickle.load(f)
+            finally:
+                f.close()
+            os.utime(path, None)
+        except Exception:
+            self.remove(path)
+            return None
+        return result
+
+    def put(self, key, xls_tables):
+        """Writes xls_tables (whole file or nothing) and removes old entries."""
+        handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        f = os.fdopen(handle, 'wb')
+        try:
+            cPickle.dump(xls_tables, f, cPickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        os.rename(temp_path, self.get_path(key))
+        self.evict()
+
+    def get_entries(self):
+        """Returns list of (modification time, size, path) of entries, oldest first."""
+        result = []
+        for name in os.listdir(self.directory):
+            if name.endswith(EXTENSION):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, path))
+        return sorted(result)
+
+    def evict(self):
+        """Removes least recently used entries until they fit in max_size."""
+        entries = self.get_entries()
+        size = sum([entry[1] for entry in entries])
+        # the newest entry is kept even when it is bigger than max_size.
+        for mtime, entry_size, path in entries[:-1]:
+            if size <= self.max_size:
+                break
+            self.remove(path)
+            size -= entry_size
+
+    def remove(self, path):
+        """Removes entry file (it may be removed already by another process)."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def parse(self, file_path, parse):
+        """
+        Returns xls_tables for the file.
+        Calls parse (function with file_path as argument)
+        when the file is not in the cache.
+        """
+        key = self.get_key(file_path)
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = parse(file_path)
+        self.put(key, result)
+        return result
+
+    def get_stats(self):
+        """Returns dict with hits, misses, number of entries and their size."""
+        entries = self.get_entries()
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(entries), \
+            'bytes': sum([entry[1] for entry in entries])}
+
+
+def set_parse_cache(directory, max_size=DEFAULT_MAX_SIZE):
+    """
+    Turns on the cache used by parse_xls (directory is created when needed).
+    None turns it off. Returns the ParseCache object (or None).
+    """
+    if directory is None:
+        _CACHE[0] = None
+    else:
+        _CACHE[0] = ParseCache(directory, max_size)
+    return _CACHE[0]
+
+def get_parse_cache():
+    """Returns ParseCache used by parse_xls (None when it is off)."""
+    return _CACHE[0]
@@ -9,7 +9,7 @@ Returns rxncon json dictionary.
 Contains functions
 
 parse_text  
-parse_xls
+parse_xls  - uses ParseCache when it is on (see parse_cache.py)
 parse_json
 parse_rxncon - recognise input, can parse:
                xls, string, string from file, 
@@ -21,6 +21,8 @@ import os
 import json
 import xlrd
 from rxnconcompiler.util.rxncon_errors import RxnconParserError
+from rxnconcompiler.parser.parse_cache import get_parse_cache
+from rxnconcompiler.util.profiling import PROFILER
 from rxnconcompiler.definitions.default_definition import DEFAULT_DEFINITION
 
 
@@ -183,6 +185,21 @@ def parse_text(rxncon_text):
 
 
 def parse_xls(file_path):
+    """
+    Returns xls_tables of the xls file.
+    When the parse cache is on (set_parse_cache) tables of a file
+    with the same content are read from the cache (without xlrd).
+    """
+    cache = get_parse_cache()
+    if cache is not None:
+        xls_tables = cache.parse(file_path, read_xls)
+        if PROFILER.enabled:
+            PROFILER.set_stats('parse_cache', cache.get_stats())
+        return xls_tables
+    return read_xls(file_path)
+
+def read_xls(file_path):
+    """Reads xls file with xlrd. Returns xls_tables."""
     try:
         xl = readexcel(file_path)
     except:
@@ -69,10 +69,40 @@ B. Input rates:
    - rate letter (k)
    - underscor
    - Input name  
+
+-----------------------------
+K+/K- rates as local functions:
+-----------------------------
+In BnglOutput local functions mode all reactions made for K+/K- 
+contingencies (k1_1, k1_2, ...) are written as a single rule.
+Its rate is a local function (get_switch_function) 
+that picks one of the rates depending on the states 
+of the tagged molecule, e.g. 
+f1(x) = if(B_bd_P(x)>0,k1_1,k1_2)
 """
 
 import re
 
+
+def get_switch_function(observables, rates, tag='x'):
+    """
+    Returns local function body that picks one of the rates 
+    depending on observables evaluated for the tagged species.
+
+    observables - list of observable names.
+    rates       - dict: tuple of booleans (observable present or not,
+                  one for each observable) ---> rate name.
+    e.g.
+    ['B_bd_P'], {(True,): 'k1_1', (False,): 'k1_2'} 
+    ---> if(B_bd_P(x)>0,k1_1,k1_2)
+    """
+    def build(values):
+        if len(values) == len(observables):
+            return rates[tuple(values)]
+        return 'if(%s(%s)>0,%s,%s)' % (observables[len(values)], tag, \
+            build(values + [True]), build(values + [False]))
+    return build([])
+
 class Rate:
     """
     Object Rate keeps info about rates for a single reaction.
@@ -124,6 +154,16 @@ class Rate:
             self.rrate = 'kr%s' % reaction.rid # reverse rate
             self._rate_names = [self.frate, self.rrate] # e.g. [kf1_1, kr1_1, k_start]
 
+    def clone(self):
+        """Returns new Rate with the same rates."""
+        new = Rate()
+        new.rate = self.rate
+        new.frate = self.frate
+        new.rrate = self.rrate
+        new._rate_names = list(self._rate_names)
+        new._special_rate_names = list(self._special_rate_names)
+        return new
+
     def get_rates_for_reaction(self):
         """
         Returns rate names (or functions) as a list of strings.
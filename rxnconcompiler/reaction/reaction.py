@@ -14,10 +14,11 @@ MODIFIER - a participant of a reaction that doesn't change
 """
 
 import copy
-from rxnconcompiler.molecule.state import get_state
+from rxnconcompiler.molecule.state import get_state, StateTable
 from rxnconcompiler.molecule.molecule import Molecule
 from rxnconcompiler.biological_complex.biological_complex import BiologicalComplex
 from rxnconcompiler.contingency.contingency import Contingency
+from rxnconcompiler.util.profiling import PROFILER
 
 #TODO: should modifiers be the same object 
 #      in the reaction (no substrat and product)?
@@ -27,7 +28,7 @@ from rxnconcompiler.contingency.contingency import Contingency
 #      subtypes inside that behave in a different way? Add classes?
 
 
-class Reaction:
+class Reaction(object):
     """
     Abstract class for rxncon reactions.
     Concrete classes are: Interaction, Modification, SyntDeg, Relocalisation.
@@ -36,6 +37,10 @@ class Reaction:
     right_reactant:
     substrate_complexes:
     """
+    __slots__ = ['name', 'rid', 'rtype', 'definition', 'left_reactant', \
+        'right_reactant', 'substrat_complexes', 'product_complexes', \
+        'conditions', 'to_change', 'to_change_pt', 'rate']
+
     def __init__(self):
         self.name = None
         self.rid = None
@@ -81,21 +86,40 @@ class Reaction:
         pass
 
     def clone(self):
-        """Returns new instance."""
+        """
+        Returns new instance.
+        Complexes are cloned (exact_clone), State objects are shared.
+        """
+        if PROFILER.enabled:
+            PROFILER.count('clones.reaction')
         new = self.__class__()
-        new.name = copy.deepcopy(self.name)
-        new.rid = copy.deepcopy(self.rid)
+        new.name = self.name
+        new.rid = self.rid
         new.rtype = self.rtype
         new.definition = self.definition
         new.left_reactant = self.left_reactant #None # RxnconMolecule object
         new.right_reactant = self.right_reactant #None # RxnconMolecule object
-        new.substrat_complexes = copy.deepcopy(self.substrat_complexes)
-        new.product_complexes = copy.deepcopy(self.product_complexes)
-        new.conditions = copy.deepcopy(self.conditions)
-        new.to_change = copy.deepcopy(self.to_change)
-        new.rate = copy.deepcopy(self.rate)
+        new.substrat_complexes = self.clone_complexes(self.substrat_complexes)
+        new.product_complexes = self.clone_complexes(self.product_complexes)
+        new.conditions = copy.copy(self.conditions)
+        new.to_change = self.to_change
+        if self.rate:
+            new.rate = self.rate.clone()
         return new
 
+    def clone_complexes(self, complexes):
+        """
+        Returns list with clones of given complexes. 
+        Complexes and molecules shared in the list stay shared.
+        """
+        memo = {}
+        result = []
+        for compl in complexes:
+            if id(compl) not in memo:
+                memo[id(compl)] = compl.exact_clone(memo)
+            result.append(memo[id(compl)])
+        return result
+
     def get_domain(self):
         """Function specific for each type of reaction."""
         pass
@@ -114,23 +138,35 @@ class Reaction:
 
     def get_contingencies(self):
         """
-        Returns contingencies list.
+        Returns contingencies list (in order of substrate complexes).
         Contingencies define a context for a given reaction. 
         """
         result = []
         for compl in self.substrat_complexes:
             result += compl.get_contingencies()
         scont = Contingency(None, 'x', self.get_sp_state())
-        result = set(result)
-        result = result - set([scont])
+        # duplicates are removed, order of complexes is kept.
+        seen = set([scont])
+        unique = []
         for cont in result:
+            if cont not in seen:
+                seen.add(cont)
+                unique.append(cont)
+        for cont in unique:
             cont.target_reaction = self.name
-        return list(result)
+        return unique
 
-    def get_specific_contingencies(self, common_cont):
-        """"""
-        all_cont = set(self.get_contingencies())
-        return list(all_cont - set(common_cont))
+    def get_specific_contingencies(self, common_cont, state_table=None):
+        """
+        Returns contingencies of the reaction 
+        that are not in common_cont (compared as StateTable bit masks).
+        """
+        if state_table is None:
+            state_table = StateTable()
+        all_cont = self.get_contingencies()
+        present, absent = state_table.get_masks(all_cont)
+        common_present, common_absent = state_table.get_masks(common_cont)
+        return state_table.select(all_cont, present & ~common_present, absent & ~common_absent)
 
     def get_substrate_complex(self, side):
         """
@@ -207,6 +243,8 @@ class Reaction:
 
 class Interaction(Reaction):
     """"""
+    __slots__ = []
+
     def run_ipi_reaction(self):
         """
         Creates product_complexes.
@@ -246,6 +284,8 @@ class Interaction(Reaction):
 
 class Modification(Reaction):
     """"""
+    __slots__ = []
+
     def get_modifier(self):
         """
         Returns complex that doesn't change during reaction.
@@ -357,6 +397,8 @@ class SyntDeg(Reaction):
     trsl (translation)
     deg (degradation)
     """
+    __slots__ = []
+
     def get_modifier(self):
         """
         Returns complex that doesn't change during reaction:
@@ -379,7 +421,7 @@ class SyntDeg(Reaction):
         if self.rtype == 'trsc':
             rcomp = self.get_substrate_complex('R')
             self.substrat_complexes.remove(rcomp)
-            rcomp.molecules[0].name += 'mRNA' 
+            rcomp.rename_molecule(rcomp.molecules[0], rcomp.molecules[0].name + 'mRNA')
             rcomp.side = 'Z'
             self.product_complexes += self.substrat_complexes
             self.product_complexes.append(rcomp)
@@ -388,7 +430,7 @@ class SyntDeg(Reaction):
             rcomp = self.get_substrate_complex('R')
             self.substrat_complexes.remove(rcomp)
             new_comp = rcomp.clone()
-            new_comp.molecules[0].name += 'mRNA' 
+            new_comp.rename_molecule(new_comp.molecules[0], new_comp.molecules[0].name + 'mRNA')
             rcomp.side = 'Z'
             self.substrat_complexes.append(new_comp)
             self.product_complexes.append(new_comp) 
@@ -411,6 +453,8 @@ class SyntDeg(Reaction):
 
 class Relocalisation(Reaction):
     """"""
+    __slots__ = []
+
     def get_modifier(self):
         """
         Returns complex that doesn't change during reaction:
@@ -435,6 +479,8 @@ class Relocalisation(Reaction):
         srcomp = self.get_substrate_complex('LR') or self.get_substrate_complex('R')        
         prcomp = srcomp.clone()
         prmol = prcomp.get_molecules(rmol.name, rmol.mid)[0]
+        # state is shared with the substrate molecule (see Molecule.clone).
+        prmol.localisation = copy.copy(prmol.localisation)
         prmol.localisation.loc = True
         self.product_complexes.append(prcomp)
         if len(self.substrat_complexes) > 1:
@@ -8,10 +8,26 @@ Class ReactionContainer(list) - container for alternative reactions
                                 (e.g. reaction that has boolean, 
                                 complex or K+/K- contingencies).
                                 Stores one ore more Reaction objects.
+Class OrderedPool(dict)       - dictionary of containers iterated in order 
+                                of reaction ids (base for ReactionPool and RulePool).
 Class ReactionPool(dict)      - dictionary for all ReactionContainers 
                                 present in the system. 
+
+Function rid_key - numeric key for reaction id.
 """
 
+from rxnconcompiler.molecule.state import StateTable
+
+
+def rid_key(rid):
+    """
+    Returns key for sorting reaction ids numerically:
+    3 ---> (3,), '12_2' ---> (12, 2)
+    (as strings '12' < '3').
+    """
+    return tuple([int(part) for part in str(rid).split('_')])
+
+
 class ReactionContainer(list):
     """
     Container for alternative reactions as one reaction can happen
@@ -107,21 +123,27 @@ class ReactionContainer(list):
         else:
             return None
 
-    def get_common_contingencies(self):
+    def get_common_contingencies(self, state_table=None):
         """
         Requirements common for all reactions in the container.
+        Contingencies are compared as StateTable bit masks.
 
+        @type state_table:  StateTable
+        @param state_table: table shared by all containers, 
+                            by default a new one is created.
         @rtype:  list of Contingency objects.
         @return: intersection of contingencies (context) 
-                 read from all reaction object.
+                 read from all reaction object
+                 (in the order of the first reaction).
         """
-        all_cont = []
-        for reaction in self:
-            all_cont.append(set(reaction.get_contingencies()))
-        if len(all_cont) > 0:
-            return list(all_cont[0].intersection(*all_cont))
-        else:
+        if len(self) == 0:
             return []
+        if state_table is None:
+            state_table = StateTable()
+        all_cont = [reaction.get_contingencies() for reaction in self]
+        masks = [state_table.get_masks(cont_list) for cont_list in all_cont]
+        present, absent = state_table.get_common_masks(masks)
+        return state_table.select(all_cont[0], present, absent)
 
     def get_modifier(self):
         """
@@ -162,28 +184,85 @@ class ReactionContainer(list):
             self.pop()    
 
 
-class ReactionPool(dict):
+class OrderedPool(dict):
     """
-    Contains all ReactionContainers for the system.
+    Dictionary of containers (name: container).
+    Iteration gives containers sorted by reaction id (rid_key), 
+    containers with the same id stay in dictionary order.
+    The order is kept until the pool changes (reset_indexes),
+    containers must not change their rid inside the pool.
     """
     def __init__(self):
         dict.__init__(self)
+        self.reset_indexes()
+
+    def reset_indexes(self):
+        """Drops the order (computed again when needed)."""
+        self._ordered = None
+
+    def __setitem__(self, name, container):
+        dict.__setitem__(self, name, container)
+        self.reset_indexes()
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self.reset_indexes()
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.reset_indexes()
+
+    def pop(self, *args):
+        self.reset_indexes()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.reset_indexes()
+        return dict.popitem(self)
+
+    def setdefault(self, name, container=None):
+        self.reset_indexes()
+        return dict.setdefault(self, name, container)
+
+    def clear(self):
+        dict.clear(self)
+        self.reset_indexes()
+
+    def get_ordered(self):
+        """Returns list of containers sorted by reaction id."""
+        if self._ordered is None:
+            self._ordered = sorted(self.values(), key=lambda r: rid_key(r.rid))
+        return self._ordered
 
     def __iter__(self):
         """
         Allows to iter reactions sorted by id.
         """
-        all_reactions = sorted(self.values(), key=lambda r: r.rid)
-        return iter(all_reactions)
+        return iter(self.get_ordered())
+
+
+class ReactionPool(OrderedPool):
+    """
+    Contains all ReactionContainers for the system.
+
+    Product contingencies of containers and indexes of product 
+    and source/product states are built when first needed 
+    and dropped when containers are added, replaced or removed 
+    (reset_indexes). Reactions inside containers do not change 
+    their source/product state.
+    """
+    def reset_indexes(self):
+        """Drops order, product contingencies and state indexes."""
+        OrderedPool.reset_indexes(self)
+        self._products = None
+        self._product_index = None
+        self._sp_index = None
 
     def get_highest_id(self):
         """
         Return the highest id of the containers present.
         """
-        ids = []
-        for cont in self:
-            ids.append(int(cont.rid))
-        return max(ids)
+        return int(self.get_ordered()[-1].rid)
 
     def update_pool(self, second_pool):
         """Adds reactions from another pool."""
@@ -191,16 +270,55 @@ class ReactionPool(dict):
         for container in second_pool.values():
             counter += 1
             container.update_rid(counter)
+        second_pool.reset_indexes()
         self.update(second_pool)
 
+    def get_products(self):
+        """
+        @return: product contingencies of all containers 
+                 (in order of self.values(), None for empty container).
+        @rtype:  list
+        """
+        if self._products is None:
+            self._products = [react_cont.product_contingency for react_cont in self.values()]
+        return self._products
+
+    def get_product_index(self):
+        """
+        @return: product contingencies (in order of get_product_contingencies) 
+                 by molecule name, state type and modifier.
+        @rtype:  dict {(name, type, modifier): [Contingency, ...]}
+        """
+        if self._product_index is None:
+            self._product_index = {}
+            for cont in self.get_product_contingencies():
+                if cont.state and cont.state.components:
+                    key = (cont.state.components[0].name, cont.state.type, cont.state.modifier)
+                    self._product_index.setdefault(key, []).append(cont)
+        return self._product_index
+
+    def get_sp_index(self):
+        """
+        @return: source/product states of containers (in order of ids) 
+                 by molecule name and state type.
+        @rtype:  dict {(name, type): [State, ...]}
+        """
+        if self._sp_index is None:
+            self._sp_index = {}
+            for container in self:
+                state = container.sp_state
+                if state and state.components:
+                    key = (state.components[0].name, state.type)
+                    self._sp_index.setdefault(key, []).append(state)
+        return self._sp_index
+
     def get_product_states(self):
         """
         @return: states that are produced in the reactions
         @rtype:  set
         """
         result = []
-        for react_cont in self.values():
-            product_cont = react_cont.product_contingency
+        for product_cont in self.get_products():
             if product_cont and product_cont.ctype == '!':
                 result.append(product_cont.state)
         return set(result)
@@ -213,8 +331,7 @@ class ReactionPool(dict):
         @rtype:  set.
         """
         result = []
-        for react_cont in self.values():
-            product_cont = react_cont.product_contingency
+        for product_cont in self.get_products():
             if product_cont:
                 result.append(product_cont)
         return set(result)
@@ -225,8 +342,7 @@ class ReactionPool(dict):
         E.g. in P-, Ub- GAP reactions.
         """
         result = []
-        for react_cont in self.values():
-            product_cont = react_cont.product_contingency
+        for product_cont in self.get_products():
             if product_cont and product_cont.ctype == 'x':
                 result.append(product_cont.state)
         return set(result)
@@ -239,12 +355,10 @@ class ReactionPool(dict):
         Used when exchenging default bd domain in contingency.
         """
         result = []
-        products = self.get_product_contingencies()
-        for cont in products:
-            if cont.ctype == '!' and cont.state and cont.state.type == 'Covalent Modification':
-                if cont.state.components[0].name == state.components[0].name:
-                    if cont.state.modifier == state.modifier:
-                        result.append(cont.state)
+        key = (state.components[0].name, 'Covalent Modification', state.modifier)
+        for cont in self.get_product_index().get(key, []):
+            if cont.ctype == '!':
+                result.append(cont.state)
         return result 
 
     def find_relocalisation_product(self, state):
@@ -253,9 +367,7 @@ class ReactionPool(dict):
         Returns a list of relocalisation states that have given mol name.
         """
         result = []
-        for container in self:
-            product = container.sp_state
-            if product.type == 'Relocalisation':
-                if product.components[0] == state.components[0]:
-                    result.append(product)
-        return result
\ No newline at end of file
+        for product in self.get_sp_index().get((state.components[0].name, 'Relocalisation'), []):
+            if product.components[0] == state.components[0]:
+                result.append(product)
+        return result
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""
+Module rule_estimator.py
+
+Class RuleEstimator - predicts number of reactions (rules)
+                      before contingencies are applied.
+
+Each ReactionContainer gives one rule for each reaction in it.
+Number of reactions in a container:
+- boolean contingency: number of required complexes, otherwise 1,
+- each K+/K- contingency (not Input) doubles the reactions
+  (Input states change rates only).
+
+Required complexes are counted in one of two modes:
+- default: calculated from the positive complexes of the boolean
+  (ComplexBuilder.count_required_complexes), nothing is cloned or built,
+  so the budget is checked before the expensive part,
+- exact=True: built (ComplexBuilder.build_required_complexes) 
+  once and kept in RequiredComplexesCache, so run_process uses them again.
+Both give the number of reactions of Rxncon.run_process
+(without missing reactions that are added later); the default
+mode follows the formula of build_required_complexes, 
+exact mode counts what is really built.
+"""
+
+from rxnconcompiler.biological_complex.complex_applicator import count_required_complexes
+from rxnconcompiler.biological_complex.complex_builder import RequiredComplexesCache
+from rxnconcompiler.util.rxncon_errors import RuleBudgetError
+
+
+class RuleEstimator:
+    """
+    Estimates reactions for all containers in Rxncon object.
+    Must be used before Rxncon.run_process 
+    (with the same add_complexes and add_contingencies).
+    exact - build required complexes instead of calculating their number.
+    """
+    def __init__(self, rxncon, add_complexes=True, add_contingencies=True, exact=False):
+        self.rxncon = rxncon
+        self.add_complexes = add_complexes
+        self.add_contingencies = add_contingencies
+        self.cache = None
+        if exact:
+            self.cache = rxncon.complex_cache
+            if self.cache is None:
+                self.cache = RequiredComplexesCache()
+        self.estimates = None
+
+    def count_k(self, container):
+        """Returns number of K+/K- contingencies that double reactions."""
+        result = 0
+        if self.rxncon.contingency_pool.has_key(container.name):
+            for cont in self.rxncon.contingency_pool[container.name].children:
+                if cont.children == [] and 'k' in cont.ctype and cont.state.type != 'Input':
+                    result += 1
+        return result
+
+    def estimate_container(self, container):
+        """Returns number of reactions the container will have."""
+        reactions = 1
+        if self.add_complexes:
+            complexes = self.rxncon.get_complexes(container.name)
+            if complexes:
+                reactions = count_required_complexes(container, complexes, self.cache)
+        if self.add_contingencies:
+            reactions *= 2 ** self.count_k(container)
+        return reactions
+
+    def get_estimates(self):
+        """Returns list of (container name, reactions) in reaction pool order."""
+        if self.estimates is None:
+            self.estimates = [(container.name, self.estimate_container(container)) \
+                for container in self.rxncon.reaction_pool]
+        return self.estimates
+
+    def get_total(self):
+        """Returns estimated number of rules."""
+        return sum([reactions for name, reactions in self.get_estimates()])
+
+    def check_budget(self, max_rules, action='error'):
+        """
+        Compares estimated number of rules with max_rules.
+        action 'error' - raises RuleBudgetError when budget is exceeded,
+        action 'warn'  - returns message (None when budget is not exceeded).
+        Message lists containers with most reactions.
+        """
+        total = self.get_total()
+        if max_rules is None or total <= max_rules:
+            return None
+        largest = sorted(self.get_estimates(), key=lambda item: -item[1])[:5]
+        message = 'Estimated %i rules exceed the budget of %i rules (largest: %s).' % \
+            (total, max_rules, ', '.join(['%s %i' % item for item in largest]))
+        if action == 'error':
+            raise RuleBudgetError(message)
+        return message
@@ -73,13 +73,18 @@ Classes:
 - main:          defines CLI - Commend Line Interface.
 """
 
+import multiprocessing
 from util.warnings import RxnconWarnings 
+from util.rxncon_errors import RxnconError
+from rxnconcompiler.molecule import molecule
+from rxnconcompiler.util.profiling import PROFILER
 from molecule.domain_factory import DomainFactory
 from biological_complex.biological_complex import ComplexPool
 from biological_complex.complex_applicator import ComplexApplicator
-from biological_complex.complex_builder import ComplexBuilder 
+from biological_complex.complex_builder import ComplexBuilder, RequiredComplexesCache
 from contingency.contingency_applicator import ContingencyApplicator
 from contingency.contingency_factory import ContingencyFactory
+from reaction.rule_estimator import RuleEstimator
 from reaction.reaction_factory import ReactionFactory
 from parser.rxncon_parser import parse_rxncon
 
@@ -119,18 +124,31 @@ class Rxncon:
                           (which contains all contingencies assign to this reaction).
         ComplexPool - dict of all complexes (defined as children-containing contingencies with '<>').
                       '<name>': AlternativeComplexes (which contains BiologicalComplex objects).
+        RequiredComplexesCache - required complexes built for booleans 
+                                 (shared by all reactions that use the boolean).
         """
         self.war = RxnconWarnings()
         self.df = DomainFactory()
-        self.xls_tables = parse_rxncon(xls_tables)
-        reaction_factory = ReactionFactory(self.xls_tables)
+        if type(xls_tables) == dict:
+            # already parsed (e.g. by Compiler, which records the parse span).
+            self.xls_tables = xls_tables
+        else:
+            with PROFILER.span('parse'):
+                self.xls_tables = parse_rxncon(xls_tables)
+        with PROFILER.span('reaction_factory'):
+            reaction_factory = ReactionFactory(self.xls_tables)
         self.molecule_pool = reaction_factory.molecule_pool
         self.reaction_pool = reaction_factory.reaction_pool
-        contingency_factory = ContingencyFactory(self.xls_tables)
-        self.contingency_pool = contingency_factory.parse_contingencies()
+        with PROFILER.span('contingency_factory'):
+            contingency_factory = ContingencyFactory(self.xls_tables)
+            self.contingency_pool = contingency_factory.parse_contingencies()
         self.complex_pool = ComplexPool()
-        self.create_complexes()
-        self.update_contingencies()
+        self.complex_cache = RequiredComplexesCache()
+        self.factorise_k = False
+        with PROFILER.span('create_complexes'):
+            self.create_complexes()
+        with PROFILER.span('update_contingencies'):
+            self.update_contingencies()
 
     def __repr__(self):
         """
@@ -144,8 +162,7 @@ class Rxncon:
             result += reaction[1]
             if self.contingency_pool.has_key(reaction[1]):
                 cont_root = self.contingency_pool[reaction[1]]
-                all_cont = cont_root.get_children()
-                for cont in all_cont:
+                for cont in cont_root.iter_children():
                     later = []
                     if cont.ctype in ['or', 'and'] or '--' in cont.ctype:
                         later.append(cont)
@@ -165,6 +182,7 @@ class Rxncon:
             builder = ComplexBuilder()
             alter_comp = builder.build_positive_complexes_from_boolean(bool_cont)
             self.complex_pool[str(bool_cont.state)] = alter_comp
+            PROFILER.count('complexes_built', len(alter_comp))
 
     def get_requirements_dict(self):
         """
@@ -199,6 +217,10 @@ class Rxncon:
         """
         Applys non-boolean contingencies.
         0, ? are ignored
+
+        When factorise_k is set K+/K- contingencies are not applied 
+        on the container, FactorisedReactions is returned instead 
+        (None when there are no K+/K- contingencies).
         """
         contingencies = []
         if self.contingency_pool.has_key(container.name):
@@ -206,6 +228,8 @@ class Rxncon:
                 if cont.children == []:
                     contingencies.append(cont)
         cap = ContingencyApplicator(self.war)
+        if self.factorise_k:
+            return cap.apply_factorised(container, contingencies)
         for cont in contingencies:            
             cap.apply_on_container(container, cont)
 
@@ -278,7 +302,7 @@ class Rxncon:
         # Add appropriate reaction_factory
         pass
 
-    def run_process(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True):
+    def run_process(self, add_translation=False, add_missing_reactions=False, add_complexes=True, add_contingencies=True, workers=None, factorise_k=False, max_rules=None, budget_action='error'):
         """
         Transforms table into objects.
         Groups the information that belong together.
@@ -288,31 +312,139 @@ class Rxncon:
         add_missing_reactions: when True looks for required states that are not produced and adds proper reactions.
         add_complexes: when True applys boolean contingencies.
         add_contingencies: when True applys non-boolean contingencies.
+        workers: when more than 1 containers are processed 
+                 in parallel by that many processes (see run_parallel).
+        factorise_k: when True containers with K+/K- contingencies are replaced 
+                     by FactorisedReactions: reactions are built one by one 
+                     when needed (e.g. when rules are written) and not kept.
+        max_rules: when given number of rules is estimated (RuleEstimator) 
+                   before reactions are processed. When it is bigger: 
+                   budget_action 'error' raises RuleBudgetError, 
+                   'warn' adds warning (war.rule_budget) and continues.
         """
+        self.factorise_k = factorise_k
         #print 'Contingencies', self.contingency_pool['Ste11_[KD]_P+_Ste7_[AL(T363)]'].children[1].children
-        self.war.calculate_missing_states(self.reaction_pool, self.contingency_pool)
-        if add_missing_reactions:
-            self.add_missing_reactions(list(self.war.not_in_products))
+        with PROFILER.span('missing_states'):
+            self.war.calculate_missing_states(self.reaction_pool, self.contingency_pool)
+            if add_missing_reactions:
+                self.add_missing_reactions(list(self.war.not_in_products))
         if add_translation:
             self.add_translation()
-
-        for react_container in self.reaction_pool:
-            # initially container has one reaction 
-            # (changes after running the process because of OR and K+/K-)
-            complexes = []
-            if add_complexes:
-                complexes = self.get_complexes(react_container.name) 
-            ComplexApplicator(react_container, complexes).apply_complexes() 
-
-            # after applying complexes we may have more reactions in a single container.
-            if add_contingencies:
-                self.apply_contingencies(react_container)
-
-            # single contingency is applied for all reactions. If K+/K- reactions are dubbled.
-            self.update_reactions()
-            for reaction in react_container:
-                reaction.run_reaction()
-
+        if max_rules is not None:
+            with PROFILER.span('rule_estimator'):
+                estimator = RuleEstimator(self, add_complexes, add_contingencies)
+                self.war.rule_budget = estimator.check_budget(max_rules, budget_action)
+
+        with PROFILER.span('process'):
+            if workers and workers > 1:
+                self.run_parallel(workers, add_complexes, add_contingencies)
+            else:
+                for react_container in self.reaction_pool:
+                    self.process_container(react_container, add_complexes, add_contingencies)
+        if PROFILER.enabled and self.complex_cache is not None:
+            PROFILER.set_stats('required_complexes_cache', self.complex_cache.get_stats())
+
+    def process_container(self, react_container, add_complexes=True, add_contingencies=True):
+        """
+        Applies complexes and contingencies on a single ReactionContainer
+        and runs all its reactions.
+        Containers are independent from each other at this stage.
+        """
+        # initially container has one reaction 
+        # (changes after running the process because of OR and K+/K-)
+        complexes = []
+        if add_complexes:
+            complexes = self.get_complexes(react_container.name) 
+        with PROFILER.span('process.complex_applicator'):
+            ComplexApplicator(react_container, complexes, self.complex_cache).apply_complexes() 
+
+        # after applying complexes we may have more reactions in a single container.
+        factorised = None
+        if add_contingencies:
+            with PROFILER.span('process.contingency_applicator'):
+                factorised = self.apply_contingencies(react_container)
+
+        # single contingency is applied for all reactions. If K+/K- reactions are dubbled.
+        self.update_reactions()
+        with PROFILER.span('process.run_reaction'):
+            if factorised:
+                factorised.run_reactions()
+                self.reaction_pool[react_container.name] = factorised
+                react_container = factorised
+            else:
+                for reaction in react_container:
+                    reaction.run_reaction()
+        PROFILER.count('reactions', len(react_container))
+
+    def run_parallel(self, workers, add_complexes=True, add_contingencies=True):
+        """
+        Runs process_container for all containers in a pool of worker processes.
+
+        Workers get a copy of this object (fork) and return processed containers. 
+        Results are merged back in the reaction pool order, so the result 
+        is the same as in the serial run:
+        - ReactionContainer replaces the one in reaction_pool,
+        - contingency root replaces the one in contingency_pool 
+          (states are updated while contingencies are applied),
+        - reactants (updated by complexes and contingencies) 
+          replace the original ones in molecule_pool,
+        - reactions with not applied contingencies are added to war.
+        Each container gets its own range of molecule ids (ID_BLOCK),
+        so ids created in different workers do not collide.
+        """
+        names = [container.name for container in self.reaction_pool]
+        first_id = molecule.get_id.next()
+        pool = multiprocessing.Pool(workers, init_worker, \
+            (self, first_id, add_complexes, add_contingencies))
+        try:
+            results = pool.map(process_in_worker, enumerate(names), 1)
+        finally:
+            pool.close()
+            pool.join()
+        molecule.reset_id(first_id + len(names) * ID_BLOCK)
+
+        new_reactants = {}
+        for name, (container, cont_root, not_applied) in zip(names, results):
+            old = self.reaction_pool[name][0]
+            new = container[0]
+            new_reactants[id(old.left_reactant)] = new.left_reactant
+            new_reactants[id(old.right_reactant)] = new.right_reactant
+            self.reaction_pool[name] = container
+            if cont_root is not None:
+                self.contingency_pool[name] = cont_root
+            self.war.not_applied_contingencies += not_applied
+        self.molecule_pool[:] = [new_reactants.get(id(mol), mol) for mol in self.molecule_pool]
+
+
+# Number of molecule ids reserved for a single container in run_parallel.
+ID_BLOCK = 10 ** 7
+
+# Data used by the worker processes of Rxncon.run_parallel.
+WORKER_DATA = {}
+
+def init_worker(rxncon, first_id, add_complexes, add_contingencies):
+    """Stores data for process_in_worker (called once in each worker)."""
+    WORKER_DATA['rxncon'] = rxncon
+    WORKER_DATA['first_id'] = first_id
+    WORKER_DATA['flags'] = (add_complexes, add_contingencies)
+
+def process_in_worker(args):
+    """
+    Processes single ReactionContainer (index, name) in a worker.
+    Returns container, its contingency root and reactions 
+    with not applied contingencies.
+    """
+    index, name = args
+    rxncon = WORKER_DATA['rxncon']
+    molecule.reset_id(WORKER_DATA['first_id'] + index * ID_BLOCK)
+    war_start = len(rxncon.war.not_applied_contingencies)
+    rxncon.process_container(rxncon.reaction_pool[name], *WORKER_DATA['flags'])
+    # process_container may replace the container (FactorisedReactions)
+    container = rxncon.reaction_pool[name]
+    if molecule.get_id.next() >= WORKER_DATA['first_id'] + (index + 1) * ID_BLOCK:
+        raise RxnconError('Too many molecules created for %s.' % name)
+    return container, rxncon.contingency_pool.get(name), \
+        rxncon.war.not_applied_contingencies[war_start:]
 
 
 if __name__ == '__main__':
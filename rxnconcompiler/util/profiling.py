@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""
+Module profiling.py - instrumentation of the compilation stages.
+
+Class Profiler - collects named time spans, counters and stats.
+PROFILER       - the Profiler used by all modules (disabled by default).
+
+Usage:
+    from rxnconcompiler.util.profiling import PROFILER
+    with PROFILER.span('create_complexes'):
+        ...
+    if PROFILER.enabled: PROFILER.count('clones.reaction')
+
+When the profiler is disabled span returns a shared object
+that does nothing and count returns at once,
+in hot functions the enabled check is done before the call.
+Spans are inclusive (a span contains the spans called inside).
+With workers > 1 (Rxncon.run_parallel) only the main process
+is measured: containers processed in workers are not counted.
+"""
+
+import json
+import time
+
+
+class NullSpan(object):
+    """Span used when the profiler is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NULL_SPAN = NullSpan()
+
+
+class Span(object):
+    """Measures time of a with block and adds it to the profiler."""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add_time(self.name, time.time() - self.start)
+        return False
+
+
+class Profiler(object):
+    """
+    Keeps time spans (name: [calls, seconds]),
+    counters (name: number) and stats (name: dict, e.g. cache stats).
+    Names are kept in the order they were first used.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        """Removes all collected data."""
+        self.spans = {}
+        self.span_names = []
+        self.counters = {}
+        self.stats = {}
+
+    def enable(self):
+        """Starts collecting data (collected data is removed)."""
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        """Stops collecting data (collected data is kept)."""
+        self.enabled = False
+
+    def span(self, name):
+        """Returns context manager measuring time of the named stage."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def add_time(self, name, seconds):
+        """Adds one call of the named stage."""
+        if name not in self.spans:
+            self.spans[name] = [0, 0.0]
+            self.span_names.append(name)
+        self.spans[name][0] += 1
+        self.spans[name][1] += seconds
+
+    def count(self, name, number=1):
+        """Increases the named counter."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + number
+
+    def set_stats(self, name, stats):
+        """Keeps dict with stats (e.g. get_stats of a cache)."""
+        if self.enabled:
+            self.stats[name] = dict(stats)
+
+    def get_data(self):
+        """Returns all collected data as dict (used for JSON)."""
+        spans = {}
+        for name in self.span_names:
+            calls, seconds = self.spans[name]
+            spans[name] = {'calls': calls, 'seconds': seconds}
+        return {'spans': spans, 'counters': dict(self.counters), 'stats': dict(self.stats)}
+
+    def get_table(self):
+        """Returns collected data as a text table."""
+        lines = ['%-40s %10s %12s' % ('stage', 'calls', 'seconds')]
+        for name in self.span_names:
+            calls, seconds = self.spans[name]
+            lines.append('%-40s %10i %12.4f' % (name, calls, seconds))
+        if self.counters:
+            lines.append('')
+            lines.append('%-40s %10s' % ('counter', 'value'))
+            for name in sorted(self.counters):
+                lines.append('%-40s %10i' % (name, self.counters[name]))
+        for name in sorted(self.stats):
+            stats = ', '.join(['%s: %s' % (key, self.stats[name][key]) \
+                for key in sorted(self.stats[name])])
+            lines.append('')
+            lines.append('%s: %s' % (name, stats))
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        """Returns collected data as JSON string."""
+        return json.dumps(self.get_data(), indent=4, sort_keys=True)
+
+
+PROFILER = Profiler()
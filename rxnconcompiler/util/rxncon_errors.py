@@ -10,6 +10,8 @@ class SbgnBuilderError(RxnconError): pass
 
 class SbgnErError(RxnconError): pass
 
+class RuleBudgetError(RxnconError): pass
+
 
 
 class BnglError(Exception): pass
@@ -16,6 +16,8 @@ class RxnconWarnings:
         # Contingncy state must indicate (via the domain) which product to use.  
         self.produced_in_more = {}
         self.not_applied_contingencies = []
+        # estimated number of rules exceeds the budget (RuleEstimator).
+        self.rule_budget = None
 
     def calculate_missing_states(self, reaction_pool, contingency_pool):
         """
@@ -20,7 +20,7 @@ from test_acceptance.test_rules_acceptance import RuleAcceptanceTests
 # test_biological_complex
 from test_biological_complex.test_biological_complex import BiologicalComplexTests, AlternativeComplexesTests
 from test_biological_complex.test_complex_applicator import ComplexApplicatorTests
-from test_biological_complex.test_complex_builder import BiologicalComplexBuilderTests
+from test_biological_complex.test_complex_builder import BiologicalComplexBuilderTests, RequiredComplexesCacheTests
 
 # test_bngl
 from test_bngl.test_bngl import BnglTests
@@ -40,20 +40,23 @@ from test_definitions.test_definitions import ReactionDefinitionTests
 
 # test_molecule
 from test_molecule.test_domain_factory import DomainFactoryTests, DomainAcceptanceTests
-from test_molecule.test_molecule import MoleculeTests
-from test_molecule.test_state import StateFactoryTests, StateTests
+from test_molecule.test_molecule import MoleculeTests, MoleculePoolTests
+from test_molecule.test_state import StateFactoryTests, StateTests, StateTableTests
 
 # test_parser
 from test_parser.test_rxncon_parser import RxnconTextParserTests, RxnconXlsParserTests, RxnconParserTests
+from test_parser.test_parse_cache import ParseCacheTests
 
 # test_reaction
 from test_reaction.test_rate import RateTests
 from test_reaction.test_reaction import ReactionTests
-from test_reaction.test_reaction_container import ReactionContainerTests
+from test_reaction.test_reaction_container import ReactionContainerTests, ReactionPoolTests
 from test_reaction.test_reaction_factory import ReactionFactoryTests
+from test_reaction.test_rule_estimator import RuleEstimatorTests
 
 # test_util
 from test_util.test_util import UtilTests
+from test_util.test_profiling import ProfilerTests
 
 
 if __name__ == '__main__':
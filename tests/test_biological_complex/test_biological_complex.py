@@ -4,18 +4,58 @@
 Unit Tests for biological_complex.py module.
 """
 
+import copy
 from unittest import main, TestCase
 
 from rxnconcompiler.rxncon import Rxncon
 from rxnconcompiler.biological_complex.biological_complex import BiologicalComplex, AlternativeComplexes
 from rxnconcompiler.molecule.state import get_state
 from rxnconcompiler.molecule.molecule import Molecule
+from test_data.bngl_rules.rules_basic_data import DATA as BASIC
+from test_data.bngl_rules.rules_mapk_data import DATA as MAPK
+from test_data.bngl_rules.rules_input_data import DATA as INPUT
+from test_data.bngl_rules.rules_geometry_data import DATA as GEOMETRY
+from test_data.bngl_rules.rules_difficult_data import DATA as DIFFICULT
+from test_data.bngl_rules.rules_pheromon_data import DATA as PHEROMON
 
 Ste11 = """Ste11_[KD]_P+_Ste7_[(ALS359)]; ! <Ste11-7>
 <Ste11-7>; OR Ste7--Ste11; OR <Ste7-5-5-11>
 <Ste7-5-5-11>; AND Ste5_[MEKK]--Ste11; AND Ste5_[MEK]--Ste7; AND Ste5_[BDSte5]--Ste5_[BDSte5]"""
 
 
+def get_bonds_by_scan(compl):
+    """
+    Previous implementation of BiologicalComplex.get_bonds
+    (every molecule-state is compared with all pairs).
+    """
+    mol_state = []
+    for mol in sorted(compl.molecules, key=lambda mol: mol.name):
+        for state in mol.binding_partners:
+            mol_state.append((mol, state))
+    pairs = []
+    while mol_state:
+        ms = mol_state.pop()
+        done = False
+        for p in pairs:
+            if len(p) == 1 and p[0][1] == ms[1]:
+                if not done and (ms[1].homodimer or p[0][0].name != ms[0].name):
+                    p.append(ms)
+                    done = True
+        if not done:
+            pairs.append([ms])
+    bonds = {}
+    counter = 1
+    for p in pairs:
+        if len(p) == 2:
+            bonds[p[0]] = counter
+            bonds[p[1]] = counter
+            counter += 1
+        elif len(p) == 1 and p[0][1].type == 'Intraprotein':
+            bonds[p[0]] = counter
+            counter += 1
+    return bonds
+
+
 class BiologicalComplexTests(TestCase):
     """
     Unit Tests for BiologicalComplex Class.
@@ -91,6 +131,84 @@ class BiologicalComplexTests(TestCase):
         self.assertIn(2, bonds.values())
         self.assertIn(3, bonds.values())
 
+    def test_get_bonds_fixtures(self):
+        """
+        Tests that bonds (and their numbers) are the same as 
+        from the previous implementation for all complexes 
+        in reactions from test_data/bngl_rules.
+        """
+        complexes = []
+        for data_set in [BASIC, MAPK, INPUT, GEOMETRY, DIFFICULT, PHEROMON]:
+            for data in data_set:
+                for reaction in data:
+                    rxncon = Rxncon(reaction)
+                    rxncon.run_process()
+                    for container in rxncon.reaction_pool:
+                        for react in container:
+                            complexes += react.substrat_complexes + react.product_complexes
+        # big complexes (many bonds are paired in buckets)
+        chain = BiologicalComplex()
+        for index in range(1, 30):
+            chain.add_state(get_state('M%i--M%i' % (index, index + 1)))
+        complexes.append(chain)
+        oligomer = BiologicalComplex()
+        oligomer.molecules = [Molecule('A') for _ in range(10)] + [Molecule('B') for _ in range(10)]
+        for mol in oligomer.molecules:
+            mol.add_bond(get_state('A--B'))
+            mol.add_bond(get_state('%s_[x]--%s_[x]' % (mol.name, mol.name)))
+        complexes.append(oligomer)
+        checked = 0
+        for compl in complexes:
+            bonds = [(id(mol), id(state), number) for (mol, state), number \
+                in compl.get_bonds().items()]
+            expected = [(id(mol), id(state), number) for (mol, state), number \
+                in get_bonds_by_scan(compl).items()]
+            self.assertEqual(sorted(bonds), sorted(expected))
+            checked += len(expected)
+        self.assertTrue(checked > 1000)
+
+    def test_molecules_index(self):
+        """
+        Tests that molecules index follows changes of the molecules list.
+        """
+        compl = BiologicalComplex()
+        compl.molecules = [Molecule('A'), Molecule('B')]
+        self.assertEqual(len(compl.get_molecules('A')), 1)
+        compl.molecules.append(Molecule('A'))
+        self.assertEqual(len(compl.get_molecules('A')), 2)
+        compl.molecules.remove(Molecule('A'))
+        self.assertEqual(len(compl.get_molecules('A')), 1)
+        self.assertTrue(compl.has_molecule('B'))
+        compl.rename_molecule(compl.get_molecules('B')[0], 'BmRNA')
+        self.assertFalse(compl.has_molecule('B'))
+        self.assertTrue(compl.has_molecule('BmRNA'))
+        self.assertEqual(len(compl.clone().get_molecules('BmRNA')), 1)
+        self.assertEqual(len(copy.deepcopy(compl).get_molecules('BmRNA')), 1)
+
+    def test_get_paths(self):
+        """Tests paths and branches in the tree complex."""
+        mol_a = self.comp.get_molecules('A')[0]
+        mol_k = self.comp.get_molecules('K')[0]
+        self.assertEqual(str(self.comp.get_shortest_path(mol_a, mol_k)), '[A, B, E, K]')
+        self.assertEqual(len(self.comp.get_branches('A')), 6)
+        self.assertEqual(sorted(str(x) for x in self.comp.get_partners('B')), ['A', 'E', 'F'])
+
+    def test_get_shortest_path(self):
+        """
+        Tests that shortest path is the first path from get_paths
+        sorted by length and str.
+        """
+        for comp in [self.comp, self.compl1, self.compl2]:
+            for mol1 in comp.molecules:
+                for mol2 in comp.molecules:
+                    paths = comp.get_paths(mol1, mol2)
+                    expected = []
+                    if paths:
+                        length = len(paths[0])
+                        expected = sorted([p for p in paths if len(p) == length], key=str)[0]
+                    self.assertEqual(str(comp.get_shortest_path(mol1, mol2)), str(expected))
+        self.assertEqual(self.comp.get_shortest_path(Molecule('A'), Molecule('X')), [])
+
 
 class AlternativeComplexesTests(TestCase):
     """
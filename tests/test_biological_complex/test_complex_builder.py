@@ -7,7 +7,8 @@ Unit tests fror complex_builder module.
 from unittest import main, TestCase
 
 from rxnconcompiler.biological_complex.biological_complex import BiologicalComplex
-from rxnconcompiler.biological_complex.complex_builder import ComplexBuilder
+from rxnconcompiler.biological_complex.complex_builder import ComplexBuilder, RequiredComplexesCache
+from rxnconcompiler.rxncon import Rxncon
 from rxnconcompiler.molecule.state import get_state
 from rxnconcompiler.molecule.molecule import Molecule
 
@@ -80,5 +81,47 @@ class BiologicalComplexBuilderTests(TestCase):
         self.assertEqual(str(self.comp.complex_addition(comp_sec, Molecule('A'))), result)
 
 
+class RequiredComplexesCacheTests(TestCase):
+    """
+    Unit Tests for RequiredComplexesCache class.
+    """
+    def setUp(self):
+        """Two reactions use the same boolean."""
+        self.quick = 'A_ppi_B; ! <AC>\nA_ppi_D; ! <AC>\n<AC>; OR A--C; OR A--E'
+
+    def test_hits_and_misses(self):
+        """Required complexes are built once for the same boolean and root."""
+        rxncon = Rxncon(self.quick)
+        rxncon.run_process()
+        self.assertEqual(rxncon.complex_cache.misses, 1)
+        self.assertEqual(rxncon.complex_cache.hits, 1)
+        self.assertEqual(rxncon.complex_cache.get_stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_copies(self):
+        """Each call returns new complexes identical to the built ones."""
+        alter = Rxncon(self.quick).complex_pool['<AC>']
+        root = alter[0].get_molecules('A')[0]
+        builder = ComplexBuilder()
+        cache = RequiredComplexesCache()
+        first = cache.get_required_complexes(alter, root, \
+            lambda: builder.build_required_complexes(alter.clone(), root))
+        second = cache.get_required_complexes(alter, root, None)
+        self.assertEqual(str(first), str(second))
+        self.assertEqual([comp.is_positive for comp in first], [comp.is_positive for comp in second])
+        self.assertIsNot(first[0], second[0])
+        self.assertIsNot(first[0].molecules[0], second[0].molecules[0])
+
+    def test_same_output(self):
+        """Output is the same without cache."""
+        rxncon = Rxncon(self.quick)
+        rxncon.run_process()
+        no_cache = Rxncon(self.quick)
+        no_cache.complex_cache = None
+        no_cache.run_process()
+        for name in ['A_ppi_B', 'A_ppi_D']:
+            self.assertEqual(str([reaction.substrat_complexes for reaction in rxncon.reaction_pool[name]]), \
+                str([reaction.substrat_complexes for reaction in no_cache.reaction_pool[name]]))
+
+
 if __name__ == '__main__':
     main()
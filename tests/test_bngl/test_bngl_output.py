@@ -5,6 +5,7 @@ Unit tests for bngl_output.py module.
 """
 
 from unittest import main, TestCase
+from StringIO import StringIO
 
 from rxnconcompiler.molecule.state import get_state
 from rxnconcompiler.rxncon import Rxncon
@@ -51,6 +52,29 @@ class BnglTranslatorTests(TestCase):
         result = self.translator.get_rule_str(rule)
         self.assertEqual(expected, result)
 
+    def test_complex_str_cache(self):
+        """
+        Tests that cached strings are the same as built strings
+        and that complexes with different states get different strings.
+        """
+        complexes = []
+        for reaction in self.rections:
+            complexes += reaction.substrat_complexes + reaction.product_complexes
+        for compl in complexes + complexes:
+            self.assertEqual(self.translator.get_complex_str(compl), \
+                self.translator.build_complex_str(compl))
+        stats = self.translator.complex_cache.get_stats()
+        self.assertEqual(stats['misses'], stats['size'])
+        self.assertTrue(stats['hits'] >= len(complexes))
+        self.assertNotEqual(self.rections[0].substrat_complexes[0].get_canonical_key(), \
+            self.rections[0].product_complexes[0].get_canonical_key())
+        # least recently used strings are removed
+        translator = BnglTranslator()
+        translator.complex_cache.maxsize = 2
+        for compl in complexes:
+            translator.get_complex_str(compl)
+        self.assertTrue(len(translator.complex_cache) <= 2)
+
     def test_get_binding_domain(self):
         """"""
         bt = BnglTranslator()
@@ -86,6 +110,70 @@ Ste11
 Ste7(ALS359~U)                                                                             100
 end seed species\n\n"""
         self.assertEqual(result, expected)
+
+    def test_write_to(self):
+        """
+        Tests that streamed output is the same as get_src 
+        and as the sections formatted with format_string.
+        """
+        stream = StringIO()
+        self.output.write_to(stream)
+        self.assertEqual(stream.getvalue(), self.output.get_src())
+        self.output.create_sections_txt()
+        model = self.output.parameters_txt + self.output.molecules_txt + \
+            self.output.species_txt + self.output.format_string('observables', '') + \
+            self.output.rules_txt
+        expected = self.output.worning_txt + self.output.format_string('model', model) + \
+            self.output.action_txt
+        self.assertEqual(stream.getvalue(), expected)
+
+    def test_iter_stripped(self):
+        """Tests that pieces are stripped like a joined string."""
+        for pieces in [['  \n', ' a ', '\n', ' b\n', '\n  '], [], ['  ', '\n'], ['a    \n']]:
+            self.assertEqual(''.join(self.output.iter_stripped(pieces)), ''.join(pieces).strip())
+
+    def test_local_functions(self):
+        """
+        Tests that rules for K+/K- modifications of one molecule 
+        are written as a single rule with local function rate
+        and that other rules stay.
+        """
+        rxncon = Rxncon("""A_P+_B; K+ B_[x]-{P}; K- B_[y]-{P}
+A_ppi_B; K+ A--C
+C_ppi_A
+C_P+_B_[x]
+D_P+_B_[y]""")
+        rxncon.run_process(True, True)
+        rule_factory = RuleFactory(rxncon.reaction_pool, rxncon.contingency_pool)
+        output = BnglOutput(rule_factory.rule_pool, rxncon.molecule_pool, None, True)
+        src = output.get_src()
+        self.assertIn('begin observables\nMolecules B_x_P B(x~P)\nMolecules B_y_P B(y~P)\nend observables', src)
+        self.assertIn('f1(x) = if(B_x_P(x)>0,if(B_y_P(x)>0,k1_3,k1_1),if(B_y_P(x)>0,k1_4,k1_2))\n', src)
+        self.assertIn('# Local function: B_[x]-{P}, B_[y]-{P} (4 rules -> 1, 3 saved)\n' + \
+            'A + B(A~U)%x -> A + B(A~P)    f1(x)\n', src)
+        self.assertIn('k1_4 1\n', src)
+        self.assertIn('#>>>>>>>>> Rule: 2_2\n', src)
+        self.assertEqual(output.get_saved_rules(), {1: 3})
+        self.assertNotIn('begin functions', self.output.get_src())
+
+    def test_local_functions_two_copies(self):
+        """
+        Tests that rules stay expanded when a species 
+        can contain a second B (observables would count it too).
+        """
+        for extra in ['B_ppi_B', 'B_[c1]_ppi_E\nE_ppi_B_[c2]', 'B_ppi_E\nE_ppi_F\nF_ppi_B']:
+            rxncon = Rxncon("""A_P+_B; K+ B_[x]-{P}; K- B_[y]-{P}
+C_P+_B_[x]
+D_P+_B_[y]
+""" + extra)
+            rxncon.run_process(True, True)
+            rule_factory = RuleFactory(rxncon.reaction_pool, rxncon.contingency_pool)
+            output = BnglOutput(rule_factory.rule_pool, rxncon.molecule_pool, None, True)
+            self.assertNotIn('B', output.get_single_copy_molecules())
+            self.assertEqual(output.get_saved_rules(), {})
+            src = output.get_src()
+            self.assertIn('#>>>>>>>>> Rule: 1_4\n', src)
+            self.assertNotIn('begin functions', src)
         
 
 
@@ -12,7 +12,9 @@ from unittest import main, TestCase
 from rxnconcompiler.parser.rxncon_parser import parse_text
 from rxnconcompiler.contingency.contingency_factory import ContingencyFactory
 from rxnconcompiler.contingency.contingency import Contingency
+from rxnconcompiler.contingency.contingency_factory import ContingencyWrapper
 from rxnconcompiler.bngl.requirements import RequirementsGenerator, RequirementsFactory
+from rxnconcompiler.bngl.requirements import minimise_requirements
 
 """
         
@@ -109,6 +111,20 @@ IGNORED = """A_ppi_B; K+ B-{P}
 A_ppi_B; 0 A-{P}
 A_ppi_B; ? B--C"""
 
+CONTRADICTORY = """A_ppi_B; ! A-{P}
+A_ppi_B; x <MM>
+<MM>; OR A-{P}
+<MM>; OR B-{P}"""
+
+SUBSUMED = """A_ppi_B; ! <MM>
+<MM>; OR A-{P}
+<MM>; OR <MM2>
+<MM2>; AND A-{P}
+<MM2>; AND B-{P}"""
+
+MERGED = """A_ppi_B; ! A-{P}
+A_ppi_B; ! B-{P}"""
+
 REQUIREMENTS_TEST = [(RXNCON_INPUT, 2), (EMPTY_BOOL, 1), \
     (NO_CONTINGENCIES, 1), (ONLY_EXCLAMATION, 1), \
     (ONLY_X, 1), (EXCLAMATION_AND_X, 1), (AND, 1), \
@@ -176,6 +192,38 @@ class RequirementsGeneratorTests(TestCase):
         walker.get_requirements()
         self.assertEqual(walker.requirements, [[]])
 
+    def test_minimise(self):
+        """Checks removing of contradictory, subsumed and merged requirements."""
+        walker = self.get_walker(CONTRADICTORY) 
+        walker.get_requirements()
+        self.assertEqual(str(walker.requirements), '[[! A_[bd]-{P}, x B_[bd]-{P}]]')
+        # removed while combinations of AND children were generated.
+        self.assertEqual(walker.stats['pruned'], 1)
+        self.assertEqual(walker.stats['generated'], 1)
+
+        walker = self.get_walker(SUBSUMED) 
+        walker.get_requirements()
+        self.assertEqual(str(walker.requirements), '[[! A_[bd]-{P}]]')
+        self.assertEqual(walker.stats['subsumed'], 1)
+
+        self.assertEqual(walker.stats['generated'], 2)
+        self.assertEqual(walker.stats['requirements'], 1)
+
+        walker = self.get_walker(SUBSUMED) 
+        walker.get_requirements(minimise=False)
+        self.assertEqual(len(walker.requirements), 2)
+
+    def test_minimise_merged(self):
+        """[X, ! B] + [X, x B] ---> [X]"""
+        a_cont, b_cont = self.get_walker(MERGED).root.children
+        a_pos = ContingencyWrapper(a_cont, 'positive')
+        b_pos = ContingencyWrapper(b_cont, 'positive')
+        b_neg = ContingencyWrapper(b_cont, 'negative')
+        stats = {}
+        result = minimise_requirements([[a_pos, b_pos], [a_pos, b_neg, a_pos]], stats)
+        self.assertEqual(result, [[a_pos]])
+        self.assertEqual(stats, {'contradictory': 0, 'merged': 1, 'subsumed': 0})
+
 
 class RequirementsFactoryTests(TestCase):
     """Tests for ReguirementsGenerator class."""
@@ -186,6 +234,14 @@ class RequirementsFactoryTests(TestCase):
         req_dict = rf.get_requirements_dict()
         self.assertEqual(len(req_dict), 4)
 
+    def test_stats(self):
+        table = parse_text(SUBSUMED + '\n' + MORE_REACTIONS)
+        stats = RequirementsFactory(table).get_stats()
+        self.assertEqual(stats['generated'], 5)
+        self.assertEqual(stats['pruned'], 0)
+        self.assertEqual(stats['subsumed'], 1)
+        self.assertEqual(stats['requirements'], 4)
+
 
 if __name__ == '__main__':
     main()
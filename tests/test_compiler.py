@@ -41,6 +41,26 @@ class CompilerTests(TestCase):
         from_xls = Compiler(DATA_PATH + 'Tiger_et_al_TableS1.xls').translate()
         self.assertIn('begin model', from_xls)
 
+    def test_reaction_ids(self):
+        """Tests that Compiler keeps only indicated reactions."""
+        comp = Compiler(DATA_PATH + 'Tiger_et_al_TableS1.xls', ['1'])
+        self.assertEqual(1, len(comp.xls_tables['reaction_list']))
+        self.assertEqual(comp.translate(), Compiler(DATA_PATH + 'Tiger_et_al_TableS1.xls').filter([1]).translate())
+
+    def test_single_parse(self):
+        """Tests that all outputs are produced from the same xls_tables."""
+        comp = Compiler(DATA_PATH + 'Tiger_et_al_TableS1.xls')
+        tables = comp.xls_tables
+        self.assertEqual(comp.translate(), comp.translate())
+        params, rules = comp.get_rules_and_parameters()
+        self.assertTrue(rules.startswith('begin reaction rules'))
+        self.assertIn(rules.strip(), comp.translate())
+        self.assertIn('reaction_list', comp.get_json())
+        self.assertIn('reaction_list', comp.get_json('reaction_list'))
+        self.assertIs(tables, comp.xls_tables)
+        self.assertIs(comp, comp.filter())
+        self.assertIs(tables['contingency_list'], comp.filter(['1']).xls_tables['contingency_list'])
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
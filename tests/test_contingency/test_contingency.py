@@ -40,6 +40,16 @@ class ContingencyTests(TestCase):
         self.assertEqual(cont.ctype, '!')
         self.assertEqual(cont_copy.ctype, 'k+')
 
+    def test_hash(self):
+        """Tests whether hash follows changes of ctype and state."""
+        cont = Contingency('A_ppi_B', '!', get_state('A--D'))
+        self.assertEqual(hash(cont), hash('! A_[AssocD]--D_[AssocA]'))
+        cont.ctype = 'x'
+        self.assertEqual(hash(cont), hash('x A_[AssocD]--D_[AssocA]'))
+        cont.state = get_state('A-{P}')
+        self.assertEqual(str(cont), 'x A_[bd]-{P}')
+        self.assertEqual(hash(cont), hash('x A_[bd]-{P}'))
+
     def test_count_children(self):
         """Tests counting contingency children."""
         cont = Contingency('A_ppi_B', '!', 'A--D')
@@ -97,6 +107,19 @@ class BooleanContingencyTests(TestCase):
         result = self.boolean.clone()
         self.assertEqual(result.count_leafs(), 3)
 
+    def test_deep_tree(self):
+        """Tests traversal of a tree deeper than the recursion limit."""
+        root = Contingency('A_ppi_B')
+        node = root
+        for i in range(5000):
+            child = Contingency('<B%i>' % i, 'and', get_state('<B%i>' % (i + 1)))
+            node.add_child(child)
+            node = child
+        node.add_child(Contingency('<B5000>', 'and', get_state('A-{P}')))
+        self.assertEqual(len(root.get_children()), 5001)
+        self.assertEqual(root.count_leafs(), 1)
+        self.assertEqual(str(root.get_leafs()), '[and A_[bd]-{P}]')
+
 class ComplexContingencyTests(TestCase):
     """
     Unit Tests for Contingency class.
@@ -53,6 +53,36 @@ class ContingencyApplicatorTests(TestCase):
         self.assertEqual(len(lmol.binding_sites), 2)
         self.assertEqual(len(rmol.binding_sites), 1)
 
+    def test_factorised(self):
+        """
+        Tests that FactorisedReactions builds the same reactions
+        (order, rids, rates, states) as applying contingencies one by one.
+        """
+        conts = [Contingency('A_ppi_B', '!', get_state('A_[T1]-{P}')), \
+                 Contingency('A_ppi_B', 'K+', get_state('A_[T666]-{P}')), \
+                 Contingency('A_ppi_B', 'K+', get_state('[Start]')), \
+                 Contingency('A_ppi_B', 'x', get_state('B_[T2]-{P}')), \
+                 Contingency('A_ppi_B', 'K-', get_state('A--C'))]
+        ComplexApplicator(self.rcont, []).apply_complexes() 
+        rcont2 = Rxncon('A_ppi_B').reaction_pool['A_ppi_B']
+        ComplexApplicator(rcont2, []).apply_complexes() 
+        cap = ContingencyApplicator()
+        for cont in conts:
+            cap.apply_on_container(self.rcont, cont)
+        factorised = cap.apply_factorised(rcont2, conts)
+        self.assertEqual(len(factorised.modifiers), 2)
+        self.assertEqual(len(factorised), 4)
+        self.assertEqual(len(self.rcont), 4)
+        for react, react2 in zip(self.rcont, factorised):
+            self.assertEqual(react2.rid, react.rid)
+            self.assertEqual(str(react2.rate), str(react.rate))
+            for compl, compl2 in zip(react.substrat_complexes, react2.substrat_complexes):
+                self.assertEqual(str(compl2.molecules), str(compl.molecules))
+                for mol, mol2 in zip(compl.molecules, compl2.molecules):
+                    self.assertEqual(mol2.modifications, mol.modifications)
+                    self.assertEqual(mol2.modification_sites, mol.modification_sites)
+                    self.assertEqual(mol2.binding_partners, mol.binding_partners)
+
 
 if __name__ == '__main__':
     main()
@@ -21,6 +21,7 @@ from rxnconcompiler.parser.rxncon_parser import parse_text, parse_xls
 from rxnconcompiler.contingency.contingency_factory import ContingencyFactory, ContingencyWrapper
 from rxnconcompiler.contingency.contingency import Contingency
 from rxnconcompiler.molecule.state import get_state
+from rxnconcompiler.util.rxncon_errors import RxnconParserError
 
 import test_data
 DATA_PATH = test_data.__path__[0] + os.sep + 'xls_files' + os.sep
@@ -60,6 +61,19 @@ OR_AND_OR = """A_ppi_B; ! <MM>
 <MM3>; OR A--C
 <MM3>; OR A--D"""
 
+DEEP_REVERSED = """<MM3>; AND C-{P}
+<MM3>; AND D-{P}
+<MM2>; OR <MM3>
+<MM2>; OR B-{P}
+<MM>; AND <MM2>
+<MM>; AND A-{P}
+A_ppi_B; ! <MM>"""
+
+CYCLE = """A_ppi_B; ! <MM>
+<MM>; AND <MM2>
+<MM2>; OR <MM3>
+<MM3>; AND <MM>"""
+
 
 class ContingencyFactoryTests(TestCase):
     """Checks whether proper contingencies pool is generated for simple example."""
@@ -99,6 +113,55 @@ class ContingencyFactoryTests(TestCase):
         self.pool = factory.parse_contingencies()
         self.assertEqual(self.pool['A_ppi_B'].count_leafs(), 4)
 
+    def test_deep_reversed(self):
+        """
+        Asserts that nested booleans are built 
+        when children rows come before their parents.
+        """
+        table = parse_text(DEEP_REVERSED)
+        factory = ContingencyFactory(table)
+        self.pool = factory.parse_contingencies()
+        self.assertEqual(self.pool['A_ppi_B'].count_leafs(), 4)
+        self.assertEqual(str(self.pool['A_ppi_B'].get_leafs()), \
+            '[and C_[bd]-{P}, and D_[bd]-{P}, or B_[bd]-{P}, and A_[bd]-{P}]')
+
+    def test_cycle(self):
+        """Asserts that booleans containing each other are reported."""
+        table = parse_text(CYCLE)
+        factory = ContingencyFactory(table)
+        self.assertRaisesRegexp(RxnconParserError, '<MM> -> <MM2> -> <MM3> -> <MM>', \
+            factory.parse_contingencies)
+
+    def test_leafs(self):
+        """
+        Asserts that leafs of the pool are cached
+        and follow new children and removed contingencies.
+        """
+        leafs = self.pool.get_leafs()
+        self.assertEqual(len(leafs), 5)
+        self.assertIs(self.pool.get_leafs(), leafs)
+        self.assertEqual(len(self.pool.get_kind_contingencies('Covalent Modification')), 3)
+        boolean = self.pool['A_ppi_B'].children[2]
+        boolean.add_child(Contingency('<MM>', 'and', get_state('E-{P}')))
+        self.assertEqual(len(self.pool.get_kind_contingencies('Covalent Modification')), 4)
+        self.pool.remove_contingency(boolean)
+        self.assertEqual(len(self.pool.get_leafs()), 2)
+        self.assertEqual(len(self.pool.get_required_states()), 2)
+
+    def test_leafs_replaced_root(self):
+        """Asserts that cached leafs follow a root replaced in the pool."""
+        self.assertEqual(len(self.pool.get_leafs()), 5)
+        root = Contingency('A_ppi_B')
+        root.add_child(Contingency('A_ppi_B', 'k+', get_state('A-{P}')))
+        self.pool['A_ppi_B'] = root
+        self.assertEqual(self.pool.get_leafs(), root.children)
+        self.assertEqual(self.pool.get_ctype_index().keys(), [('Covalent Modification', 'k+')])
+        self.assertEqual(len(self.pool.get_kind_contingencies('Covalent Modification')), 1)
+        del self.pool['A_ppi_B']
+        self.assertEqual(self.pool.get_leafs(), [])
+        self.pool.update({'A_ppi_B': root})
+        self.assertEqual(self.pool.get_leafs(), root.children)
+
 class ContingencyApoptosisTests(TestCase):
     """Checks whether proper contingencies pool is generated for apoptosis."""
     def setUp(self):
@@ -33,6 +33,8 @@ class InterfaceTests(TestCase):
             os.remove('test.json')
         if os.path.exists('test.rxncon'):
             os.remove('test.rxncon')
+        if os.path.exists('test.bngl'):
+            os.remove('test.bngl')
 
     def test_get_bngl(self):
         """
@@ -41,6 +43,15 @@ class InterfaceTests(TestCase):
         self.assertIn('begin model', interface.get_bngl(self.xls_tables))
         self.assertIn('begin model', interface.get_bngl(self.tiger_path))
 
+    def test_get_bngl_file(self):
+        """
+        Tests that BNGL code streamed to a file 
+        is the same as returned string.
+        """
+        interface.get_bngl(self.xls_tables, file_name='test.bngl')
+        self.assertTrue(os.path.exists('test.bngl'))
+        self.assertEqual(open('test.bngl').read(), interface.get_bngl(self.xls_tables))
+
     def test_filter_reactions(self):
         """
         Tests whether it is possible to filter reaction in the rxncon json dictionary.
@@ -55,6 +66,20 @@ class InterfaceTests(TestCase):
         self.assertTrue(interface.get_bngl_reactions(self.xls_tables)[1].startswith('begin reaction rules'))
         self.assertTrue(interface.get_bngl_reactions(self.tiger_path)[1].startswith('begin reaction rules'))
 
+    def test_compiler_session(self):
+        """
+        Tests that a Compiler can be passed instead of the input
+        and that the results are the same as for raw input.
+        """
+        comp = interface.get_compiler(self.tiger_path)
+        self.assertIs(comp, interface.get_compiler(comp))
+        self.assertEqual(interface.get_bngl(comp), interface.get_bngl(self.tiger_path))
+        self.assertEqual(interface.get_bngl_reactions(comp, ['1']), \
+            interface.get_bngl_reactions(self.tiger_path, ['1']))
+        self.assertEqual(interface.get_rxncon(comp), interface.get_rxncon(self.tiger_path))
+        self.assertEqual(interface.get_json(comp), interface.get_json(self.tiger_path))
+        self.assertEqual(1, len(interface.filter_reactions(comp, ['1'])['reaction_list']))
+
     def test_get_rxncon(self):
         """
         Tests string is returnes.
@@ -160,6 +185,8 @@ class CliTests(TestCase):
             os.remove('test.rxncon')
         if os.path.exists('rxnconcompiler.output'):
             os.remove('rxnconcompiler.output')
+        if os.path.exists('test.profile'):
+            os.remove('test.profile')
         os.chdir(self.cpath)
 
     def test_basic(self):
@@ -229,5 +256,17 @@ class CliTests(TestCase):
         cont = f.read()
         self.assertIn('Ste11 p+ Pbs2', cont)  
 
+    def test_profile(self):
+        """
+        Tests profile data is written as json.
+        """
+        com = "python interface.py 'A_ppi_B' --profile-json test.profile 2> /dev/null"
+        os.system(com)
+        self.assertTrue(os.path.exists('rxnconcompiler.output'))
+        f = open('test.profile') 
+        cont = f.read()
+        self.assertIn('"bngl_output"', cont)
+        self.assertIn('"rules": 1', cont)
+
 if __name__ == '__main__': 
     main()
@@ -7,7 +7,7 @@ Unit Tests for molecule.py module.
 from unittest import main, TestCase
 
 from unittest import TestCase, main
-from rxnconcompiler.molecule.molecule import Molecule
+from rxnconcompiler.molecule.molecule import Molecule, MoleculePool
 from rxnconcompiler.molecule.state import get_state
 from rxnconcompiler.contingency.contingency import Contingency
 
@@ -88,6 +88,31 @@ class MoleculeTests(TestCase):
         for cont in conts:
             mol.add_contingency(cont)
         self.assertIn('Ste7_[Fus3]-{P}', str(mol.modification_sites))
+
+
+class MoleculePoolTests(TestCase):
+    """
+    Unit Tests for MoleculePool class.
+    """
+    def test_get_system_molecules(self):
+        """
+        Tests that molecules with the same name are merged
+        and that changes of molecules in the pool are included.
+        """
+        pool = MoleculePool()
+        mol1 = Molecule('A')
+        mol1.add_bond(get_state('A--B'))
+        mol2 = Molecule('A')
+        mol2.add_bond(get_state('A--B'))
+        mol2.add_modification(get_state('A_[T111]-{P}'))
+        pool.extend([mol1, mol2, Molecule('B')])
+        mol1.add_binding_site(get_state('A--C'))
+        result = pool.get_system_molecules()
+        self.assertEqual(sorted(result.keys()), ['A', 'B'])
+        self.assertEqual(len(result['A'].binding_partners), 1)
+        self.assertEqual(len(result['A'].binding_sites), 1)
+        self.assertEqual(len(result['A'].modifications), 1)
+        self.assertEqual(result['B'].get_contingencies(), [])
         
         
 
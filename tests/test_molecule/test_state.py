@@ -4,9 +4,12 @@
 Unit Tets for state.py module.
 """
 
+import copy
 from unittest import main, TestCase
 
-from rxnconcompiler.molecule.state import get_state, State, Component
+from rxnconcompiler.molecule.state import get_state, State, Component, StateTable, \
+	STATE_KEYS, clear_state_keys
+from rxnconcompiler.contingency.contingency import Contingency
 
 class StateFactoryTests(TestCase):
 	"""Unit Tests for StateFactory class."""
@@ -69,6 +72,91 @@ class StateTests(TestCase):
 		self.assertEqual(state.components[1].name, 'C')
 		self.assertEqual(state.components[1].cid, '2')
 
+	def test_key(self):
+		"""
+		Tests cached state key: str and hash are the same 
+		as without cache, equal keys are one object.
+		"""
+		state1 = get_state("A--B")
+		state2 = get_state("A--B")
+		self.assertEqual(hash(state1), hash("A_[AssocB]--B_[AssocA]"))
+		self.assertTrue(str(state1) is str(state2))
+		self.assertEqual(state1, state2)
+		self.assertEqual(len(set([state1, state2])), 1)
+		# equality ignores domains
+		self.assertEqual(get_state("A_[x]--B"), state1)
+		self.assertNotEqual(hash(get_state("A_[x]--B")), hash(state1))
+		self.assertNotEqual(get_state("A--C"), state1)
+		# key follows changes of the state
+		state = get_state("A-{P}")
+		self.assertEqual(str(state), "A_[bd]-{P}")
+		state.modifier = 'Ub'
+		self.assertEqual(str(state), "A_[bd]-{Ub}")
+		self.assertEqual(hash(state), hash("A_[bd]-{Ub}"))
+
+	def test_clear_keys(self):
+		"""Tests that states stay equal after STATE_KEYS is emptied."""
+		state1 = get_state("A--B")
+		str(state1)
+		clear_state_keys()
+		self.assertEqual(STATE_KEYS, {})
+		state2 = get_state("A--B")
+		self.assertEqual(state1, state2)
+		self.assertEqual(hash(state1), hash(state2))
+		self.assertEqual(len(STATE_KEYS), 1)
+
+	def test_deepcopy(self):
+		"""Tests whether deepcopy keeps all attributes and copies components."""
+		state = get_state("A--A", "1--2")
+		state.loc = True
+		new = copy.deepcopy(state)
+		self.assertEqual(str(new), str(state))
+		self.assertEqual(new, state)
+		self.assertTrue(new.loc)
+		self.assertTrue(new.homodimer)
+		self.assertEqual(new.components[1].cid, '2')
+		self.assertFalse(new.components[0] is state.components[0])
+		self.assertFalse(hasattr(new, '__dict__'))
+
+class StateTableTests(TestCase):
+	"""Unit Tests for StateTable class."""
+
+	def setUp(self):
+		self.table = StateTable()
+		self.a_p = Contingency(None, '!', get_state('A-{P}'))
+		self.b_p = Contingency(None, '!', get_state('B-{P}'))
+		self.not_b_p = Contingency(None, 'x', get_state('B-{P}'))
+		self.a_b = Contingency(None, 'x', get_state('A--B'))
+
+	def test_bits(self):
+		"""Equal states get the same bit, bits are given in order."""
+		self.assertEqual(self.table.get_bit(get_state('A-{P}')), 0)
+		self.assertEqual(self.table.get_bit(get_state('A--B')), 1)
+		self.assertEqual(self.table.get_bit(get_state('A-{P}')), 0)
+		self.assertEqual(len(self.table), 2)
+		self.assertEqual(self.table.get_mask([get_state('A--B')]), 2)
+		self.assertEqual([str(state) for state in self.table.get_states(3)], \
+			['A_[bd]-{P}', 'A_[AssocB]--B_[AssocA]'])
+
+	def test_masks(self):
+		"""Tests present / absent masks and set algebra on them."""
+		first = self.table.get_masks([self.a_p, self.not_b_p, self.a_b])
+		self.assertEqual(first, (1, 6))
+		second = self.table.get_masks([self.a_p, self.not_b_p])
+		self.assertTrue(self.table.is_subset(second, first))
+		self.assertFalse(self.table.is_subset(first, second))
+		self.assertEqual(self.table.get_common_masks([first, second]), (1, 2))
+		self.assertFalse(self.table.is_contradictory(*first))
+		self.assertTrue(self.table.is_contradictory(*self.table.get_masks([self.b_p, self.not_b_p])))
+
+	def test_select(self):
+		"""Selected contingencies keep the order."""
+		conts = [self.a_b, self.b_p, self.a_p]
+		present, absent = self.table.get_masks(conts)
+		self.assertEqual(self.table.select(conts, present, absent), conts)
+		self.assertEqual(self.table.select(conts, present, 0), [self.b_p, self.a_p])
+		self.assertEqual(self.table.select([self.not_b_p], present, absent), [])
+
 
 if __name__ == '__main__':
 	main()
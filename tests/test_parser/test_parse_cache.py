@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""
+Unit Tests for parse_cache.py module.
+"""
+
+import os
+import shutil
+import tempfile
+from unittest import main, TestCase
+
+from rxnconcompiler.parser import rxncon_parser
+from rxnconcompiler.parser.rxncon_parser import parse_xls, parse_rxncon, read_xls
+from rxnconcompiler.parser.parse_cache import ParseCache, set_parse_cache, get_parse_cache
+
+import test_data
+XLS_DATA_PATH = test_data.__path__[0] + os.sep + 'xls_files' + os.sep
+
+
+class ParseCacheTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        set_parse_cache(None)
+        shutil.rmtree(self.directory)
+
+    def test_off(self):
+        """Cache is off by default."""
+        self.assertEqual(get_parse_cache(), None)
+
+    def test_parse(self):
+        """Second parse of the same content is read from the cache."""
+        cache = set_parse_cache(self.directory)
+        path = XLS_DATA_PATH + 'apoptosis_small.xls'
+        first = parse_rxncon(path)
+        self.assertEqual(first, read_xls(path))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        # copy with other name: key depends on content only.
+        copy = os.path.join(self.directory, 'copy.xls')
+        shutil.copy(path, copy)
+        self.assertEqual(parse_xls(copy), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.get_stats()['size'], 1)
+
+    def test_no_xlrd(self):
+        """Hit does not read the file with xlrd."""
+        set_parse_cache(self.directory)
+        path = XLS_DATA_PATH + 'apoptosis_small.xls'
+        tables = parse_xls(path)
+        readexcel = rxncon_parser.readexcel
+        rxncon_parser.readexcel = None
+        try:
+            self.assertEqual(parse_xls(path), tables)
+        finally:
+            rxncon_parser.readexcel = readexcel
+
+    def test_corrupted(self):
+        """Entry that can not be read is parsed again."""
+        cache = ParseCache(self.directory)
+        path = XLS_DATA_PATH + 'apoptosis_small.xls'
+        tables = cache.parse(path, read_xls)
+        open(cache.get_path(cache.get_key(path)), 'wb').write('broken')
+        self.assertEqual(cache.parse(path, read_xls), tables)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_evict(self):
+        """Least recently used entries are removed when cache is too big."""
+        cache = ParseCache(self.directory)
+        for index in range(3):
+            cache.put('key%i' % index, {'data': 'x' * 1000})
+            os.utime(cache.get_path('key%i' % index), (index, index))
+        cache.get('key0')
+        cache.max_size = 2500
+        cache.evict()
+        self.assertTrue(cache.get('key0') is not None)
+        self.assertEqual(cache.get('key1'), None)
+        self.assertTrue(cache.get('key2') is not None)
+
+
+if __name__ == '__main__':
+    main()
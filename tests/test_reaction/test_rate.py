@@ -9,7 +9,7 @@ from unittest import main, TestCase
 from unittest import TestCase, main
 from rxnconcompiler.rxncon import Rxncon
 from rxnconcompiler.compiler import Compiler
-from rxnconcompiler.reaction.rate import Rate
+from rxnconcompiler.reaction.rate import Rate, get_switch_function
 from rxnconcompiler.molecule.state import get_state
 from rxnconcompiler.contingency.contingency import Contingency
 
@@ -56,6 +56,14 @@ class RateTests(TestCase):
         reaction_p.rate.update_function(cont, False, '1_1', '1_2')
         self.assertEqual(reaction_p.rate.get_ids(), ['1_1'])
 
+    def test_switch_function(self):
+        """Tests local function choosing rate by observables."""
+        self.assertEqual(get_switch_function(['A_P'], {(True,): 'k1_1', (False,): 'k1_2'}), \
+            'if(A_P(x)>0,k1_1,k1_2)')
+        rates = {(True, True): 'k1_1', (True, False): 'k1_2', (False, True): 'k1_3', (False, False): 'k1_4'}
+        self.assertEqual(get_switch_function(['A_P', 'A_Ub'], rates, 'y'), \
+            'if(A_P(y)>0,if(A_Ub(y)>0,k1_1,k1_2),if(A_Ub(y)>0,k1_3,k1_4))')
+
     def test_k_and_rate(self):
         """
         Tests whether rate is correctly created from a reaction.
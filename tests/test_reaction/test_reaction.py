@@ -45,6 +45,26 @@ class ReactionTests(TestCase):
         self.assertEqual(str(self.degradation.get_modifier()), '[Complex: Proteasome]')
         self.assertEqual(str(self.phosphorylation.get_modifier()), '[Complex: Kinase]')
 
+    def test_clone(self):
+        """
+        Cloned reaction has its own complexes, molecules and lists
+        but shares State objects with the origin.
+        """
+        new = self.interaction.clone()
+        old_mol = self.interaction.product_complexes[0].molecules[0]
+        new_mol = new.product_complexes[0].molecules[0]
+        self.assertFalse(new.product_complexes[0] is self.interaction.product_complexes[0])
+        self.assertFalse(new_mol is old_mol)
+        self.assertEqual(new_mol._id, old_mol._id)
+        self.assertEqual(str(new.product_complexes), str(self.interaction.product_complexes))
+        self.assertTrue(new_mol.binding_partners[0] is old_mol.binding_partners[0])
+        self.assertFalse(new_mol.binding_partners is old_mol.binding_partners)
+        new_mol.remove_bond(new_mol.binding_partners[0])
+        self.assertEqual(len(old_mol.binding_partners), 1)
+        self.assertFalse(new.rate is self.interaction.rate)
+        self.assertEqual(new.rate._rate_names, self.interaction.rate._rate_names)
+        self.assertFalse(new.rate._rate_names is self.interaction.rate._rate_names)
+
     def test_run_reactions_ppi_with_bool(self):
         """
         Test whether bonds are created after running reaction.
@@ -7,6 +7,8 @@ Unit Tests for reaction_container.py module.
 from unittest import main, TestCase
 
 from rxnconcompiler.rxncon import Rxncon
+from rxnconcompiler.reaction.reaction_container import rid_key
+from rxnconcompiler.molecule.state import get_state
 
 REACTIONS = """PolII_TRSC_Gene 
 Ribo_TRSL_A
@@ -61,6 +63,67 @@ class ReactionContainerTests(TestCase):
         self.bool.empty()
         self.assertEqual(len(self.bool), 0)
 
+    def test_common_contingencies(self):
+        """
+        Common and specific contingencies (StateTable masks)
+        are the same as set intersection and difference.
+        """
+        common = self.bool.get_common_contingencies()
+        all_cont = [set(reaction.get_contingencies()) for reaction in self.bool]
+        self.assertEqual(set(common), all_cont[0].intersection(*all_cont))
+        self.assertEqual(len(common), len(set(common)))
+        for reaction, cont in zip(self.bool, all_cont):
+            specific = reaction.get_specific_contingencies(common)
+            self.assertEqual(set(specific), cont - set(common))
+            self.assertTrue(specific)
+        self.assertEqual(self.interaction.get_common_contingencies(), [])
+
+
+class ReactionPoolTests(TestCase):
+    """
+    Tests for ReactionPool indexes.
+    """
+    def setUp(self):
+        """Prepares ReactionPool through Rxncon."""
+        self.rxn = Rxncon("""Kinase_P+_Target
+Kinase2_P+_Target_[x]
+Phosphatase_P-_Target
+A_ppi_B""")
+        self.pool = self.rxn.reaction_pool
+
+    def test_find_modification_product(self):
+        """
+        Tests that products are found by molecule name and modifier
+        and that index follows changes of the pool.
+        """
+        state = get_state('Target-{P}')
+        self.assertEqual(sorted([str(s) for s in self.pool.find_modification_product(state)]), \
+            ['Target_[Kinase]-{P}', 'Target_[x]-{P}'])
+        self.assertEqual(self.pool.find_modification_product(get_state('B-{P}')), [])
+        self.assertEqual(len(self.pool.get_destroyed_states()), 1)
+        new_pool = Rxncon('Kinase3_P+_B').reaction_pool
+        self.pool.update_pool(new_pool)
+        self.assertEqual(str(self.pool.find_modification_product(get_state('B-{P}'))), '[B_[Kinase3]-{P}]')
+        self.assertEqual(len(self.pool.get_product_states()), 4)
+        del self.pool['Kinase3_P+_B']
+        self.assertEqual(self.pool.find_modification_product(get_state('B-{P}')), [])
+
+    def test_order(self):
+        """
+        Tests that containers are iterated by numeric reaction id
+        and that the order follows changes of the pool.
+        """
+        self.assertEqual([cont.rid for cont in self.pool], [1, 2, 3, 4])
+        self.assertEqual(self.pool.get_highest_id(), 4)
+        new_pool = Rxncon('\n'.join(['A%i_ppi_B' % i for i in range(8)])).reaction_pool
+        self.pool.update_pool(new_pool)
+        self.assertEqual([cont.rid for cont in self.pool], \
+            [1, 2, 3, 4] + [str(i) for i in range(5, 13)])
+        self.assertEqual(self.pool.get_highest_id(), 12)
+        del self.pool['A_ppi_B']
+        self.assertEqual([cont.rid for cont in self.pool][:3], [1, 2, 3])
+        self.assertEqual(rid_key('12_2'), (12, 2))
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+"""
+Unit Tests for rule_estimator.py module.
+"""
+
+from unittest import main, TestCase
+
+from rxnconcompiler.rxncon import Rxncon
+from rxnconcompiler.compiler import Compiler
+from rxnconcompiler.reaction.rule_estimator import RuleEstimator
+from rxnconcompiler.util.rxncon_errors import RuleBudgetError
+from rxnconcompiler.util.profiling import PROFILER
+
+REACTIONS = """A_ppi_B; ! <bool>
+<bool>; OR A--C; OR A--D
+A_ppi_C
+A_ppi_D
+A_P+_B; K+ A--C; K- A--D; K+ [Start]
+C_P+_D; k+ <bool2>
+<bool2>; AND C--A; AND A--D
+"""
+
+DEEP = """A_ppi_B; ! <bool>
+<bool>; OR <b1>; OR <b2>
+<b1>; AND A--C; AND A--D
+<b2>; AND A--E; AND E--F
+A_ppi_C
+A_ppi_D
+A_ppi_E
+E_ppi_F
+B_ppi_C; x <bool3>
+<bool3>; OR B--D; OR B--E
+B_ppi_D
+B_ppi_E
+C_ppi_D; K+ <bool4>
+<bool4>; AND C--A; AND A--D
+"""
+
+
+class RuleEstimatorTests(TestCase):
+    """
+    Tests for number of reactions estimated before run_process.
+    """
+    def test_estimates(self):
+        """Estimates are the same as numbers of reactions after run_process."""
+        rxncon = Rxncon(REACTIONS)
+        estimator = RuleEstimator(rxncon)
+        estimates = estimator.get_estimates()
+        rxncon.run_process()
+        self.assertEqual(estimates, [(container.name, len(container)) \
+            for container in rxncon.reaction_pool])
+        self.assertEqual(dict(estimates)['A_P+_B'], 4)
+        self.assertEqual(estimator.get_total(), sum([len(cont) for cont in rxncon.reaction_pool]))
+
+    def test_exact(self):
+        """Calculated numbers are the same as numbers of built complexes, nothing is cloned."""
+        PROFILER.enable()
+        estimates = RuleEstimator(Rxncon(DEEP)).get_estimates()
+        PROFILER.disable()
+        self.assertEqual(PROFILER.counters.get('clones.complex', 0), 0)
+        self.assertEqual(RuleEstimator(Rxncon(DEEP), exact=True).get_estimates(), estimates)
+        rxncon = Rxncon(DEEP)
+        rxncon.run_process()
+        self.assertEqual(estimates, [(container.name, len(container)) \
+            for container in rxncon.reaction_pool])
+
+    def test_flags(self):
+        """Without contingencies and complexes every container has one reaction."""
+        rxncon = Rxncon(REACTIONS)
+        estimator = RuleEstimator(rxncon, False, False)
+        self.assertEqual(estimator.get_total(), len(rxncon.reaction_pool))
+
+    def test_budget(self):
+        """Budget raises error or adds warning."""
+        estimator = RuleEstimator(Rxncon(REACTIONS))
+        total = estimator.get_total()
+        self.assertEqual(estimator.check_budget(total), None)
+        self.assertRaises(RuleBudgetError, estimator.check_budget, total - 1)
+        self.assertIn('A_P+_B 4', estimator.check_budget(total - 1, 'warn'))
+        self.assertRaises(RuleBudgetError, Compiler(REACTIONS, max_rules=2).translate)
+        bngl = Compiler(REACTIONS, max_rules=2, budget_action='warn').translate()
+        self.assertIn('# WARNING: Estimated %i rules exceed the budget of 2 rules' % total, bngl)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ Unit tests for rxncon.py
 from unittest import main, TestCase
 from rxnconcompiler.bngl.bngl import Bngl
 from rxnconcompiler.rxncon import Rxncon
+from rxnconcompiler.contingency.contingency_applicator import FactorisedReactions
 
 
 class RxnconTests(TestCase):
@@ -135,6 +136,42 @@ class RxnconTests(TestCase):
         # two molecules in product complexes.
         self.assertEqual(len(reaction.product_complexes[0]), 2)
 
+    def test_run_process_parallel(self):
+        """
+        Tests that containers processed by worker processes
+        give the same BNGL as the serial run.
+        """
+        quick = 'A_ppi_B; ! <b>; K+ B-{Ub}; x A--E\n<b>; AND A--C; AND C--D\nC_p+_B\nB_trsl_F'
+        serial = Rxncon(quick)
+        serial.run_process(False, True)
+        parallel = Rxncon(quick)
+        parallel.run_process(False, True, workers=2)
+        self.assertEqual(len(parallel.reaction_pool['A_ppi_B']), len(serial.reaction_pool['A_ppi_B']))
+        self.assertEqual(str(parallel.molecule_pool), str(serial.molecule_pool))
+        self.assertEqual(Bngl(parallel.reaction_pool, parallel.molecule_pool, parallel.contingency_pool, parallel.war).get_src(), \
+            Bngl(serial.reaction_pool, serial.molecule_pool, serial.contingency_pool, serial.war).get_src())
+
+    def test_run_process_factorised(self):
+        """
+        Tests that with factorise_k reactions of K+/K- containers 
+        are not kept (FactorisedReactions in the pool, rules made 
+        when written) and BNGL is the same (also with workers).
+        """
+        quick = 'A_ppi_B; ! <b>; K+ B-{Ub}; K- A-{P}; x A--E\n<b>; AND A--C; AND C--D\nC_p+_B\nB_trsl_F'
+        serial = Rxncon(quick)
+        serial.run_process(False, True)
+        expected = Bngl(serial.reaction_pool, serial.molecule_pool, serial.contingency_pool, serial.war).get_src()
+        for workers in [None, 2]:
+            factorised = Rxncon(quick)
+            factorised.run_process(False, True, workers=workers, factorise_k=True)
+            container = factorised.reaction_pool['A_ppi_B']
+            self.assertEqual(type(container), FactorisedReactions)
+            self.assertEqual(list.__len__(container), 0)
+            self.assertEqual(len(container), len(serial.reaction_pool['A_ppi_B']))
+            bngl = Bngl(factorised.reaction_pool, factorised.molecule_pool, factorised.contingency_pool, factorised.war)
+            self.assertEqual(bngl.get_src(), expected)
+            self.assertEqual(list.__len__(bngl.rule_pool['A_ppi_B']), 0)
+
     def test_warnings(self):
         """
         Checks whether states that are not produced are indicated.
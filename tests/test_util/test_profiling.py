@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""
+Unit Tets for profiling.py module.
+"""
+
+import json
+from unittest import main, TestCase
+
+from rxnconcompiler.util.profiling import Profiler, PROFILER, NULL_SPAN
+from rxnconcompiler.compiler import Compiler
+
+MODEL = """A_ppi_B; ! A-{P}; K+ B-{P}
+C_P+_A
+D_P+_B"""
+
+
+class ProfilerTests(TestCase):
+    """
+    Tests for spans and counters.
+    """
+    def tearDown(self):
+        PROFILER.disable()
+        PROFILER.reset()
+
+    def test_disabled(self):
+        """Disabled profiler does not collect anything."""
+        profiler = Profiler()
+        self.assertTrue(profiler.span('stage') is NULL_SPAN)
+        with profiler.span('stage'):
+            profiler.count('counter')
+        profiler.set_stats('cache', {'hits': 1})
+        self.assertEqual(profiler.get_data(), {'spans': {}, 'counters': {}, 'stats': {}})
+
+    def test_enabled(self):
+        """Spans and counters are collected in order."""
+        profiler = Profiler()
+        profiler.enable()
+        for i in range(3):
+            with profiler.span('second'):
+                pass
+        with profiler.span('first'):
+            profiler.count('counter', 2)
+        self.assertEqual(profiler.span_names, ['second', 'first'])
+        data = json.loads(profiler.to_json())
+        self.assertEqual(data['spans']['second']['calls'], 3)
+        self.assertEqual(data['counters'], {'counter': 2})
+        self.assertIn('second', profiler.get_table())
+
+    def test_compiler(self):
+        """Compilation stages and counters are recorded."""
+        PROFILER.enable()
+        Compiler(MODEL).translate()
+        data = PROFILER.get_data()
+        for name in ['parse', 'create_complexes', 'process', 'process.run_reaction', \
+            'rule_factory', 'bngl_output']:
+            self.assertIn(name, data['spans'])
+        self.assertEqual(data['spans']['process.run_reaction']['calls'], 3)
+        self.assertEqual(data['spans']['parse']['calls'], 1)
+        self.assertEqual(data['counters']['rules'], 4)
+        self.assertEqual(data['counters']['reactions'], 4)
+        self.assertIn('complex_str_cache', data['stats'])
+        self.assertIn('required_complexes_cache', data['stats'])
+
+
+if __name__ == '__main__':
+    main()